@@ -10,15 +10,21 @@ Features:
 - Uses backtesting.py's robust backtesting engine
 - Provides similar interface to SimBroker for easy migration
 - Supports AI-generated strategies
+- Walk-forward optimization with cached indicators
 
 Version: 1.0.0
 Last Updated: 2025-10-31
 """
 
 import sys
+import os
+import pickle
+import itertools
+import multiprocessing as mp
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Callable, Union
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import logging
@@ -53,7 +59,8 @@ class BacktestingAdapter:
         margin: float = 1.0,
         trade_on_close: bool = False,
         hedging: bool = False,
-        exclusive_orders: bool = False
+        exclusive_orders: bool = False,
+        spread: float = 0.0
     ):
         """
         Initialize backtesting adapter
@@ -67,6 +74,7 @@ class BacktestingAdapter:
             trade_on_close: Whether to trade on close or next open
             hedging: Whether to allow hedging
             exclusive_orders: Whether orders are exclusive
+            spread: Bid-ask spread (or slippage) as a fraction of price
         """
         self.data = data
         self.strategy_class = strategy_class
@@ -76,6 +84,7 @@ class BacktestingAdapter:
         self.trade_on_close = trade_on_close
         self.hedging = hedging
         self.exclusive_orders = exclusive_orders
+        self.spread = spread
         
         # Initialize backtest
         self.bt = Backtest(
@@ -86,7 +95,8 @@ class BacktestingAdapter:
             margin=self.margin,
             trade_on_close=self.trade_on_close,
             hedging=self.hedging,
-            exclusive_orders=self.exclusive_orders
+            exclusive_orders=self.exclusive_orders,
+            spread=self.spread
         )
         
         self.results = None
@@ -139,6 +149,107 @@ class BacktestingAdapter:
         logger.info("Optimization complete!")
         return self.results
     
+    def walk_forward_optimize(
+        self,
+        train_size: int,
+        test_size: int,
+        step: Optional[int] = None,
+        anchored: bool = False,
+        maximize: Union[str, Callable] = 'Equity Final [$]',
+        constraint: Optional[callable] = None,
+        max_workers: Optional[int] = None,
+        **param_ranges
+    ) -> Dict[str, Any]:
+        """
+        Walk-forward optimization over rolling in-sample/out-of-sample windows
+        
+        Each window is optimized on its in-sample bars and then run with the
+        best parameters on the following out-of-sample bars. Windows are
+        optimized in parallel across processes, and the out-of-sample equity
+        curves are stitched together into one curve.
+        
+        Indicators declared with ``self.I`` on raw data columns are computed
+        once per parameter value over the bars from the start of the data up
+        to the end of the in-sample or out-of-sample window, and sliced per
+        window. They are not recomputed for every (window x combination),
+        out-of-sample windows start with warmed-up indicators, and no
+        indicator value is computed from bars after the window it is used in,
+        even for indicators that are not causal (e.g. centered smoothing).
+        
+        Args:
+            train_size: In-sample window length in bars
+            test_size: Out-of-sample window length in bars
+            step: Bars between window starts (default: test_size)
+            anchored: Keep the in-sample start fixed (expanding window)
+            maximize: Stat key or callable(stats) -> float to maximize
+            constraint: Optional constraint function on parameter combinations
+            max_workers: Process pool size (default: CPU count)
+            **param_ranges: Parameter ranges to optimize
+            
+        Returns:
+            Dict with 'windows' (DataFrame of per-window results),
+            'equity' (stitched out-of-sample equity Series) and
+            'return_pct' (total out-of-sample return)
+        """
+        if not param_ranges:
+            raise ValueError("At least one parameter range is required")
+        
+        windows = _walk_forward_windows(len(self.data), train_size, test_size, step or test_size, anchored)
+        if not windows:
+            raise ValueError(
+                f"Not enough data ({len(self.data)} bars) for train_size={train_size}, test_size={test_size}"
+            )
+        
+        names = list(param_ranges.keys())
+        combos = [
+            dict(zip(names, values))
+            for values in itertools.product(*(_as_values(param_ranges[n]) for n in names))
+        ]
+        if constraint is not None:
+            combos = [c for c in combos if constraint(_AttrDict(c))]
+        if not combos:
+            raise ValueError("No admissible parameter combinations to test")
+        
+        bt_kwargs = {
+            'cash': self.cash,
+            'commission': self.commission,
+            'margin': self.margin,
+            'trade_on_close': self.trade_on_close,
+            'hedging': self.hedging,
+            'exclusive_orders': self.exclusive_orders,
+            'spread': self.spread,
+        }
+        worker_args = (self.data, self.strategy_class, bt_kwargs, combos, maximize)
+        
+        logger.info(f"Walk-forward: {len(windows)} windows x {len(combos)} combinations")
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(windows))
+        mp_context = _walk_forward_context(worker_args) if max_workers > 1 else None
+        
+        if mp_context is None:
+            _init_walk_forward_worker(*worker_args)
+            window_results = [_run_walk_forward_window(w) for w in windows]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=mp_context,
+                initializer=_init_walk_forward_worker,
+                initargs=worker_args
+            ) as executor:
+                window_results = list(executor.map(_run_walk_forward_window, windows))
+        
+        # Stitch out-of-sample equity curves by chaining their returns
+        oos_returns = pd.concat([r.pop('oos_returns') for r in window_results])
+        oos_returns = oos_returns[~oos_returns.index.duplicated(keep='first')]
+        equity = self.cash * (1 + oos_returns).cumprod()
+        
+        logger.info("Walk-forward optimization complete!")
+        return {
+            'windows': pd.DataFrame(window_results),
+            'equity': equity,
+            'return_pct': (equity.iloc[-1] / self.cash - 1) * 100 if len(equity) else 0.0,
+        }
+    
     def plot(self, **kwargs):
         """
         Plot backtest results (interactive Bokeh chart)
@@ -222,12 +333,194 @@ class BacktestingAdapter:
         logger.info(f"Trades exported to {filepath}")
 
 
+# ============================================================================
+# WALK-FORWARD OPTIMIZATION HELPERS
+# ============================================================================
+
+# Per-process state, set once by _init_walk_forward_worker
+_WF_STATE: Dict[str, Any] = {}
+
+
+class _AttrDict(dict):
+    """Dict with attribute access, as passed to optimize() constraints"""
+    
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError:
+            raise AttributeError(item) from None
+
+
+def _as_values(value) -> list:
+    """Normalize a parameter range to a list of values"""
+    if isinstance(value, (list, tuple, range, np.ndarray, pd.Index)):
+        return list(value)
+    return [value]
+
+
+def _walk_forward_windows(
+    n_bars: int,
+    train_size: int,
+    test_size: int,
+    step: int,
+    anchored: bool
+) -> List[Tuple[int, int, int]]:
+    """Build (train_start, test_start, test_end) bar offsets"""
+    windows = []
+    start = 0
+    while start + train_size + test_size <= n_bars:
+        train_start = 0 if anchored else start
+        windows.append((train_start, start + train_size, start + train_size + test_size))
+        start += step
+    return windows
+
+
+def _walk_forward_context(worker_args: tuple):
+    """Pick a multiprocessing context able to ship the worker state"""
+    if 'fork' in mp.get_all_start_methods():
+        return mp.get_context('fork')
+    try:
+        pickle.dumps(worker_args)
+    except Exception as e:
+        logger.warning(f"Strategy cannot be sent to worker processes ({e}), optimizing windows sequentially")
+        return None
+    return mp.get_context()
+
+
+def _init_walk_forward_worker(data, strategy_class, bt_kwargs, combos, maximize):
+    """Process pool initializer: keep shared state and a fresh indicator cache"""
+    _WF_STATE.update(
+        data=data,
+        strategy_class=strategy_class,
+        bt_kwargs=bt_kwargs,
+        combos=combos,
+        maximize=maximize,
+        indicator_cache={},
+    )
+
+
+def _indicator_key(strategy: Strategy, func: Callable, args: tuple, kwargs: dict) -> Optional[tuple]:
+    """
+    Cache key for an indicator, or None if it cannot be cached safely
+    
+    Only raw data columns (self.data.<Column>) and hashable scalars are
+    accepted as arguments.
+    """
+    arg_keys = []
+    for arg in args:
+        name = getattr(arg, 'name', None)
+        if isinstance(arg, np.ndarray):
+            if not isinstance(name, str) or name not in strategy.data.df.columns:
+                return None
+            if arg is not strategy.data[name]:
+                return None
+            arg_keys.append(('column', name))
+        elif isinstance(arg, (int, float, str, bool, type(None))):
+            arg_keys.append(('value', arg))
+        else:
+            return None
+    
+    for value in kwargs.values():
+        if not isinstance(value, (int, float, str, bool, type(None))):
+            return None
+    
+    closure = tuple(cell.cell_contents for cell in (getattr(func, '__closure__', None) or ()))
+    defaults = (getattr(func, '__defaults__', None), tuple(sorted((getattr(func, '__kwdefaults__', None) or {}).items())))
+    func_key = (getattr(func, '__module__', None), getattr(func, '__qualname__', None),
+                getattr(func, '__code__', func), closure, defaults)
+    key = (func_key, tuple(arg_keys), tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _with_indicator_cache(strategy_class: type, data: pd.DataFrame, cache: Dict, offset: int) -> type:
+    """
+    Subclass a strategy so its indicators come from a shared cache
+    
+    Indicators are computed over all of `data` and sliced from `offset`, so
+    `data` must end where the backtest does: values computed over later bars
+    would leak them into the window through non-causal indicators. Entries
+    are keyed by the length of `data`, so windows ending on the same bar
+    share them.
+    """
+    
+    class CachedIndicatorStrategy(strategy_class):
+        
+        def I(self, func, *args, name=None, plot=True, overlay=None, color=None, scatter=False, **kwargs):
+            key = _indicator_key(self, func, args, kwargs)
+            if key is None:
+                return super().I(func, *args, name=name, plot=plot, overlay=overlay,
+                                 color=color, scatter=scatter, **kwargs)
+            
+            span_key = (key, len(data))
+            if span_key not in cache:
+                full_args = [data[a[1]] if a[0] == 'column' else a[1] for a in key[1]]
+                cache[span_key] = np.asarray(func(*full_args, **kwargs))
+            
+            values = cache[span_key]
+            window = values[..., offset:offset + len(self.data)]
+            if name is None:
+                params = ','.join(str(a[1]) for a in key[1] if a[0] == 'value')
+                name = f"{getattr(func, '__name__', 'I')}({params})"
+            return super().I(lambda: window, name=name, plot=plot, overlay=overlay,
+                             color=color, scatter=scatter)
+    
+    CachedIndicatorStrategy.__name__ = strategy_class.__name__
+    CachedIndicatorStrategy.__qualname__ = strategy_class.__qualname__
+    return CachedIndicatorStrategy
+
+
+def _run_walk_forward_window(window: Tuple[int, int, int]) -> Dict[str, Any]:
+    """Optimize one in-sample window and run its out-of-sample window"""
+    train_start, test_start, test_end = window
+    data = _WF_STATE['data']
+    cache = _WF_STATE['indicator_cache']
+    maximize = _WF_STATE['maximize']
+    
+    def score(stats) -> float:
+        value = maximize(stats) if callable(maximize) else stats[maximize]
+        return -np.inf if pd.isnull(value) else float(value)
+    
+    train_bt = Backtest(
+        data.iloc[train_start:test_start],
+        _with_indicator_cache(_WF_STATE['strategy_class'], data.iloc[:test_start], cache, train_start),
+        **_WF_STATE['bt_kwargs']
+    )
+    best_params, best_score = None, -np.inf
+    for params in _WF_STATE['combos']:
+        value = score(train_bt.run(**params))
+        if best_params is None or value > best_score:
+            best_params, best_score = params, value
+    
+    test_bt = Backtest(
+        data.iloc[test_start:test_end],
+        _with_indicator_cache(_WF_STATE['strategy_class'], data.iloc[:test_end], cache, test_start),
+        **_WF_STATE['bt_kwargs']
+    )
+    test_stats = test_bt.run(**best_params)
+    
+    return {
+        'train_start': data.index[train_start],
+        'test_start': data.index[test_start],
+        'test_end': data.index[test_end - 1],
+        **best_params,
+        'in_sample_score': best_score,
+        'out_of_sample_score': score(test_stats),
+        'out_of_sample_return_pct': test_stats['Return [%]'],
+        'oos_returns': test_stats['_equity_curve']['Equity'].pct_change().fillna(0.0),
+    }
+
+
 def create_strategy_from_canonical(canonical_json: Dict[str, Any], strategy_name: str = "GeneratedStrategy") -> type:
     """
     Create a backtesting.py Strategy class from canonical JSON
     
-    This function generates a Strategy class dynamically based on
-    the canonical strategy definition.
+    The canonical rules are compiled once in init() into boolean entry/exit
+    arrays over the whole dataset (see canonical_compiler), so next() only
+    looks up the current bar and tracks position state.
     
     Args:
         canonical_json: Canonical strategy JSON
@@ -236,137 +529,34 @@ def create_strategy_from_canonical(canonical_json: Dict[str, Any], strategy_name
     Returns:
         Strategy class (subclass of backtesting.Strategy)
     """
-    
-    # Extract strategy components
-    entry_rules_raw = canonical_json.get('entry_rules', {})
-    exit_rules_raw = canonical_json.get('exit_rules', {})
-    risk_management = canonical_json.get('risk_management', {})
-    indicators_raw = canonical_json.get('indicators', {})
-    
-    # Handle entry/exit rules - can be dict with 'long'/'short' keys or list
-    if isinstance(entry_rules_raw, dict):
-        entry_rules = entry_rules_raw.get('long', []) + entry_rules_raw.get('short', [])
-    else:
-        entry_rules = entry_rules_raw
-        
-    if isinstance(exit_rules_raw, dict):
-        exit_rules = exit_rules_raw.get('long', []) + exit_rules_raw.get('short', [])
-    else:
-        exit_rules = exit_rules_raw
-    
-    # Handle indicators as dict or list
-    if isinstance(indicators_raw, dict):
-        # Convert dict to list of dicts with name
-        indicators = [
-            {'name': name, **config} 
-            for name, config in indicators_raw.items()
-        ]
-    else:
-        indicators = indicators_raw
+    from Backtest.canonical_compiler import compile_canonical_signals
     
     # Create dynamic strategy class
     class DynamicStrategy(Strategy):
         """Dynamically generated strategy from canonical JSON"""
         
         def init(self):
-            """Initialize indicators"""
-            # Add common indicators
-            close = self.data.Close
+            """Compile rules into entry/exit arrays and register indicators"""
+            signals = compile_canonical_signals(canonical_json, self.data.df)
             
-            # Store indicators based on canonical JSON
-            for indicator in indicators:
-                ind_type = indicator.get('type', '').lower()
-                ind_name = indicator.get('name', ind_type)
-                params = indicator.get('params', indicator.get('parameters', {}))
-                
-                if ind_type in ['sma', 'moving_average']:
-                    period = params.get('period', params.get('timeperiod', 20))
-                    logger.debug(f"Creating SMA indicator '{ind_name}' with period={period}")
-                    setattr(self, ind_name, self.I(SMA, close, period))
-                
-                elif ind_type == 'ema':
-                    period = params.get('period', params.get('timeperiod', 20))
-                    logger.debug(f"Creating EMA indicator '{ind_name}' with period={period}")
-                    # Use pandas EMA
-                    setattr(self, ind_name, self.I(lambda x, n: pd.Series(x).ewm(span=n).mean(), close, period))
-                
-                # Add more indicator types as needed
+            for ind_name, values in signals.indicators.items():
+                setattr(self, ind_name, self.I(lambda v=values: v, name=ind_name))
+            
+            self._entry = signals.entry
+            self._exit = signals.exit
+            self._size = signals.size
         
         def next(self):
-            """Execute strategy logic on each bar"""
-            # Check entry conditions
-            if not self.position:
-                # Check if any entry condition is met
-                should_enter = False
-                
-                for rule in entry_rules:
-                    rule_type = rule.get('type', '')
-                    
-                    # Crossover: indicator1 crosses above indicator2
-                    if rule_type == 'crossover':
-                        ind1_name = rule.get('indicator1', '')
-                        ind2_name = rule.get('indicator2', '')
-                        
-                        if hasattr(self, ind1_name) and hasattr(self, ind2_name):
-                            ind1 = getattr(self, ind1_name)
-                            ind2 = getattr(self, ind2_name)
-                            
-                            if crossover(ind1, ind2):
-                                should_enter = True
-                                # Detailed entry logging
-                                current_price = self.data.Close[-1]
-                                ind1_value = ind1[-1]
-                                ind2_value = ind2[-1]
-                                logger.info(f"[BUY SIGNAL] {ind1_name} crossed over {ind2_name} | Price: ${current_price:.2f} | {ind1_name}: {ind1_value:.2f} | {ind2_name}: {ind2_value:.2f}")
-                                print(f"[BUY] Signal at ${current_price:.2f} - {ind1_name}({ind1_value:.2f}) > {ind2_name}({ind2_value:.2f})")
-                                break
-                
-                if should_enter:
-                    # Calculate position size
-                    size = 0.95  # Default to 95% of equity
-                    position_sizing = canonical_json.get('position_sizing', {})
-                    if position_sizing.get('type') == 'fixed_percent':
-                        size = position_sizing.get('value', 0.95)
-                    
-                    shares = int(self.equity * size / self.data.Close[-1])
-                    logger.info(f"[ENTRY EXECUTED] Buying {shares} shares at ${self.data.Close[-1]:.2f} (Size: {size*100:.1f}% of equity ${self.equity:.2f})")
-                    print(f"[ENTRY] Buying {shares} shares at ${self.data.Close[-1]:.2f}")
-                    self.buy(size=size)
+            """Act on the precomputed signal for the current bar"""
+            i = len(self.data) - 1
             
-            # Check exit conditions
-            elif self.position:
-                should_exit = False
-                
-                for rule in exit_rules:
-                    rule_type = rule.get('type', '')
-                    
-                    # Crossunder: indicator1 crosses below indicator2
-                    if rule_type == 'crossunder':
-                        ind1_name = rule.get('indicator1', '')
-                        ind2_name = rule.get('indicator2', '')
-                        
-                        if hasattr(self, ind1_name) and hasattr(self, ind2_name):
-                            ind1 = getattr(self, ind1_name)
-                            ind2 = getattr(self, ind2_name)
-                            
-                            if crossover(ind2, ind1):  # ind2 crosses above ind1 = ind1 crosses below ind2
-                                should_exit = True
-                                # Detailed exit logging
-                                current_price = self.data.Close[-1]
-                                ind1_value = ind1[-1]
-                                ind2_value = ind2[-1]
-                                entry_price = self.position.pl / self.position.size if self.position.size != 0 else 0
-                                profit_pct = ((current_price - entry_price) / entry_price * 100) if entry_price != 0 else 0
-                                logger.info(f"[SELL SIGNAL] {ind1_name} crossed under {ind2_name} | Price: ${current_price:.2f} | {ind1_name}: {ind1_value:.2f} | {ind2_name}: {ind2_value:.2f}")
-                                print(f"[SELL] Signal at ${current_price:.2f} - {ind1_name}({ind1_value:.2f}) < {ind2_name}({ind2_value:.2f})")
-                                break
-                
-                if should_exit:
-                    exit_price = self.data.Close[-1]
-                    position_size = self.position.size
-                    logger.info(f"[EXIT EXECUTED] Selling {position_size} shares at ${exit_price:.2f}")
-                    print(f"[EXIT] Selling {position_size} shares at ${exit_price:.2f}")
-                    self.position.close()
+            if not self.position:
+                if self._entry[i]:
+                    logger.debug(f"[ENTRY] bar {i} at ${self.data.Close[-1]:.2f}")
+                    self.buy(size=self._size)
+            elif self._exit[i]:
+                logger.debug(f"[EXIT] bar {i} at ${self.data.Close[-1]:.2f}")
+                self.position.close()
     
     # Set the class name
     DynamicStrategy.__name__ = strategy_name
@@ -375,6 +565,34 @@ def create_strategy_from_canonical(canonical_json: Dict[str, Any], strategy_name
     return DynamicStrategy
 
 
+def run_canonical_vectorized(
+    canonical_json: Dict[str, Any],
+    data: pd.DataFrame,
+    cash: float = 10000,
+    commission: float = 0.002
+) -> Dict[str, Any]:
+    """
+    Validate a canonical strategy with the fully vectorized long-only backtest
+    
+    Much faster than running backtesting.py, at the cost of approximate
+    (fractional-unit) position sizing. Intended for quickly screening
+    AI-generated canonical strategies.
+    
+    Args:
+        canonical_json: Canonical strategy JSON
+        data: OHLCV DataFrame prepared for backtesting.py
+        cash: Initial cash
+        commission: Commission rate per side
+        
+    Returns:
+        Dict with equity, trades and summary stats
+    """
+    from Backtest.canonical_compiler import compile_canonical_signals, vectorized_backtest
+    
+    signals = compile_canonical_signals(canonical_json, data)
+    return vectorized_backtest(data, signals, cash=cash, commission=commission)
+
+
 def fetch_and_prepare_data(
     symbol: str,
     start_date: str,
@@ -0,0 +1,313 @@
+"""
+Canonical Strategy Compiler
+===========================
+
+Compiles the rule set of a canonical strategy JSON into precomputed boolean
+entry/exit arrays over a whole dataset, instead of re-evaluating the rules
+bar by bar.
+
+Supported rules:
+- crossover:  {"type": "crossover", "indicator1": "fast", "indicator2": "slow"}
+- crossunder: {"type": "crossunder", "indicator1": "fast", "indicator2": "slow"}
+- threshold:  {"type": "threshold", "indicator": "rsi", "operator": "<", "value": 30}
+              ("indicator2" may be given instead of "value")
+
+Operands may name a declared indicator or a price column (open, high, low,
+close, volume). The compiled arrays are consumed either by a tight
+position-state loop (create_strategy_from_canonical) or by the fully
+vectorized long-only backtest in this module.
+
+Version: 1.0.0
+Last Updated: 2026-10-18
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+import operator
+import logging
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+# Comparison operators accepted by threshold rules
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'above': operator.gt,
+    'below': operator.lt,
+    'greater_than': operator.gt,
+    'less_than': operator.lt,
+}
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+@dataclass
+class CompiledSignals:
+    """Precomputed signals for a canonical strategy"""
+    entry: np.ndarray
+    exit: np.ndarray
+    indicators: Dict[str, np.ndarray] = field(default_factory=dict)
+    size: float = 0.95
+
+    def __len__(self) -> int:
+        return len(self.entry)
+
+
+def _rules_list(rules_raw) -> List[Dict[str, Any]]:
+    """Flatten rules given as a list or as a dict with 'long'/'short' keys"""
+    if isinstance(rules_raw, dict):
+        return rules_raw.get('long', []) + rules_raw.get('short', [])
+    return list(rules_raw or [])
+
+
+def _indicators_list(indicators_raw) -> List[Dict[str, Any]]:
+    """Normalize indicators given as a dict keyed by name or as a list"""
+    if isinstance(indicators_raw, dict):
+        return [{'name': name, **config} for name, config in indicators_raw.items()]
+    return list(indicators_raw or [])
+
+
+def get_position_size(canonical_json: Dict[str, Any]) -> float:
+    """Fraction of equity to allocate per entry"""
+    position_sizing = canonical_json.get('position_sizing', {})
+    if position_sizing.get('type') == 'fixed_percent':
+        return position_sizing.get('value', 0.95)
+    return 0.95
+
+
+def compute_indicators(canonical_json: Dict[str, Any], data: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Compute every declared indicator over the whole dataset
+
+    Args:
+        canonical_json: Canonical strategy JSON
+        data: OHLCV DataFrame
+
+    Returns:
+        Dict of indicator name -> values
+    """
+    close = data['Close'].astype(float)
+    values = {}
+
+    for indicator in _indicators_list(canonical_json.get('indicators', {})):
+        ind_type = indicator.get('type', '').lower()
+        ind_name = indicator.get('name', ind_type)
+        params = indicator.get('params', indicator.get('parameters', {}))
+        period = params.get('period', params.get('timeperiod', 20))
+
+        if ind_type in ['sma', 'moving_average']:
+            values[ind_name] = close.rolling(period).mean().to_numpy()
+        elif ind_type == 'ema':
+            values[ind_name] = close.ewm(span=period).mean().to_numpy()
+        else:
+            logger.warning(f"Unsupported indicator type '{ind_type}' for '{ind_name}', skipping")
+
+    return values
+
+
+def _operand(name, indicators: Dict[str, np.ndarray], data: pd.DataFrame) -> Optional[np.ndarray]:
+    """Resolve a rule operand to an array (indicator, price column or constant)"""
+    if isinstance(name, (int, float)):
+        return np.full(len(data), float(name))
+    if name in indicators:
+        return indicators[name]
+    column = str(name).capitalize()
+    if column in PRICE_COLUMNS:
+        return data[column].to_numpy(dtype=float)
+    return None
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """Values shifted one bar forward (NaN on the first bar)"""
+    shifted = np.full(len(values), np.nan)
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def compile_rule(rule: Dict[str, Any], indicators: Dict[str, np.ndarray], data: pd.DataFrame) -> Optional[np.ndarray]:
+    """
+    Compile a single rule into a boolean array
+
+    Crossovers follow backtesting.lib.crossover: series1 was below series2
+    on the previous bar and is above it on the current bar.
+
+    Returns:
+        Boolean array, or None if the rule is unsupported or unresolvable
+    """
+    rule_type = rule.get('type', '')
+
+    if rule_type in ('crossover', 'crossunder'):
+        a = _operand(rule.get('indicator1', ''), indicators, data)
+        b = _operand(rule.get('indicator2', ''), indicators, data)
+        if a is None or b is None:
+            return None
+        if rule_type == 'crossunder':
+            a, b = b, a
+        with np.errstate(invalid='ignore'):
+            return (_previous(a) < _previous(b)) & (a > b)
+
+    if rule_type == 'threshold':
+        compare = OPERATORS.get(rule.get('operator', ''))
+        a = _operand(rule.get('indicator', ''), indicators, data)
+        b = _operand(rule['indicator2'] if 'indicator2' in rule else rule.get('value'), indicators, data)
+        if compare is None or a is None or b is None:
+            return None
+        with np.errstate(invalid='ignore'):
+            return compare(a, b)
+
+    return None
+
+
+def _compile_rules(rules: List[Dict[str, Any]], indicators, data) -> np.ndarray:
+    """OR together all compilable rules"""
+    signal = np.zeros(len(data), dtype=bool)
+    for rule in rules:
+        compiled = compile_rule(rule, indicators, data)
+        if compiled is None:
+            logger.warning(f"Skipping unsupported rule: {rule}")
+            continue
+        signal |= compiled
+    return signal
+
+
+def compile_canonical_signals(canonical_json: Dict[str, Any], data: pd.DataFrame) -> CompiledSignals:
+    """
+    Compile a canonical strategy into entry/exit arrays over a dataset
+
+    Args:
+        canonical_json: Canonical strategy JSON
+        data: OHLCV DataFrame (capitalized columns)
+
+    Returns:
+        CompiledSignals
+    """
+    indicators = compute_indicators(canonical_json, data)
+
+    return CompiledSignals(
+        entry=_compile_rules(_rules_list(canonical_json.get('entry_rules', {})), indicators, data),
+        exit=_compile_rules(_rules_list(canonical_json.get('exit_rules', {})), indicators, data),
+        indicators=indicators,
+        size=get_position_size(canonical_json),
+    )
+
+
+def position_state(entry: np.ndarray, exit: np.ndarray) -> np.ndarray:
+    """
+    Resolve entry/exit signals into a long/flat state per bar
+
+    Entries are only taken while flat and exits only while long, so the
+    result is 1 from an entry bar up to (excluding) its exit bar.
+
+    Returns:
+        int8 array of 1 (long) / 0 (flat), decided on each bar's close
+    """
+    state = np.zeros(len(entry), dtype=np.int8)
+    in_position = False
+    for i in range(len(entry)):
+        if in_position:
+            if exit[i]:
+                in_position = False
+        elif entry[i]:
+            in_position = True
+        state[i] = in_position
+    return state
+
+
+def vectorized_backtest(
+    data: pd.DataFrame,
+    signals: CompiledSignals,
+    cash: float = 10000,
+    commission: float = 0.002
+) -> Dict[str, Any]:
+    """
+    Fast long-only backtest over compiled signals
+
+    Like backtesting.py with trade_on_close=False, decisions taken on a
+    bar's close are filled at the next bar's open. Positions are sized as a
+    fraction of equity (signals.size) with fractional units, so results
+    closely track but do not exactly match backtesting.py.
+
+    Args:
+        data: OHLCV DataFrame used to compile the signals
+        signals: Compiled signals
+        cash: Initial cash
+        commission: Commission rate per side
+
+    Returns:
+        Dict with equity (Series), trades (DataFrame, including a trade
+        still open at the end) and summary stats
+    """
+    opens = data['Open'].to_numpy(dtype=float)
+    closes = data['Close'].to_numpy(dtype=float)
+    n = len(data)
+
+    state = position_state(signals.entry, signals.exit)
+    changes = np.flatnonzero(np.diff(state, prepend=0))
+
+    # Orders decided on bar i fill at the open of bar i + 1
+    entries = changes[state[changes] == 1] + 1
+    exits = changes[state[changes] == 0] + 1
+    entries = entries[entries < n]
+    exits = exits[exits < n]
+
+    equity = np.full(n, float(cash))
+    trades = []
+    balance = float(cash)
+    last = 0
+
+    for k, entry_bar in enumerate(entries):
+        exit_bar = exits[k] if k < len(exits) else n
+        equity[last:entry_bar] = balance
+
+        entry_price = opens[entry_bar] * (1 + commission)
+        invested = balance * signals.size
+        units = invested / entry_price
+
+        # Mark to market on closes while the trade is open
+        equity[entry_bar:exit_bar] = balance - invested + units * closes[entry_bar:exit_bar]
+
+        if exit_bar < n:
+            exit_price = opens[exit_bar] * (1 - commission)
+        else:
+            exit_price = closes[-1]
+        pnl = units * exit_price - invested
+        balance += pnl
+        last = exit_bar
+
+        trades.append({
+            'EntryBar': int(entry_bar),
+            'ExitBar': int(exit_bar) if exit_bar < n else None,
+            'EntryTime': data.index[entry_bar],
+            'ExitTime': data.index[exit_bar] if exit_bar < n else None,
+            'EntryPrice': opens[entry_bar],
+            'ExitPrice': exit_price,
+            'Size': units,
+            'PnL': pnl,
+            'ReturnPct': pnl / invested,
+        })
+
+    equity[last:] = balance
+    equity_series = pd.Series(equity, index=data.index, name='Equity')
+    trades_df = pd.DataFrame(trades)
+
+    drawdown = equity_series / equity_series.cummax() - 1
+    wins = int((trades_df['PnL'] > 0).sum()) if len(trades_df) else 0
+
+    return {
+        'equity': equity_series,
+        'trades': trades_df,
+        'final_equity': float(equity[-1]) if n else float(cash),
+        'return_pct': (float(equity[-1]) / cash - 1) * 100 if n else 0.0,
+        'max_drawdown_pct': float(drawdown.min() * 100) if n else 0.0,
+        'total_trades': len(trades_df),
+        'win_rate_pct': wins / len(trades_df) * 100 if len(trades_df) else 0.0,
+    }
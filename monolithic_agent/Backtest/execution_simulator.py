@@ -7,7 +7,7 @@ Simulates order execution with realistic fill logic including:
 - Slippage modeling
 - Partial fills
 - Liquidity constraints
-- Latency simulation
+- Latency simulation (time-ordered pending-fill queue)
 
 Last updated: 2025-10-16
 Version: 1.0.0
@@ -15,6 +15,8 @@ Version: 1.0.0
 
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
+import heapq
+import itertools
 import random
 import logging
 import math
@@ -82,6 +84,12 @@ class ExecutionSimulator:
     - Handle partial fills based on liquidity
     - Apply commissions and fees
     - Simulate execution latency
+    
+    When ``latency_ms > 0`` orders are routed through a pending-fill queue:
+    a heap keyed by activation time (order timestamp + latency). Only orders
+    whose activation time has been reached are evaluated on a bar, and any
+    unfilled remainder is re-queued for the next bar, competing for that
+    bar's volume-limited liquidity.
     """
     
     def __init__(self, config: BacktestConfig):
@@ -102,6 +110,86 @@ class ExecutionSimulator:
         self.partial_fills = 0
         self.total_slippage = 0.0
         self.total_commission = 0.0
+        
+        # Pending-fill queue: heap of (activation_time, seq, order)
+        self._pending: List[Tuple[datetime, int, Order]] = []
+        self._pending_ids: set = set()
+        self._seq = itertools.count()
+        
+        # Remaining liquidity per symbol for the bar being processed
+        self._bar_liquidity: Dict[str, Tuple[datetime, float]] = {}
+    
+    @property
+    def queue_enabled(self) -> bool:
+        """Whether orders are deferred through the pending-fill queue"""
+        return self.config.latency_ms > 0
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of orders waiting in the pending-fill queue"""
+        return len(self._pending)
+    
+    def enqueue_order(self, order: Order, activation_time: Optional[datetime] = None):
+        """
+        Schedule an order in the pending-fill queue
+        
+        Args:
+            order: Order to schedule
+            activation_time: Time the order reaches the market
+                             (defaults to order timestamp + latency)
+        """
+        if order.order_id in self._pending_ids or order.is_complete:
+            return
+        
+        if activation_time is None:
+            activation_time = self._apply_latency(order.timestamp)
+        
+        heapq.heappush(self._pending, (activation_time, next(self._seq), order))
+        self._pending_ids.add(order.order_id)
+    
+    def process_pending(
+        self,
+        timestamp: datetime,
+        market_data: Dict[str, MarketData]
+    ) -> List[Tuple[Fill, Order]]:
+        """
+        Fill queued orders whose activation time has been reached
+        
+        Orders that cannot be (fully) filled on this bar are re-queued so
+        they are evaluated again on the next bar.
+        
+        Args:
+            timestamp: Current simulation time
+            market_data: Latest market data keyed by symbol
+        
+        Returns:
+            List of (fill, order) pairs generated
+        """
+        ready = []
+        while self._pending and self._pending[0][0] <= timestamp:
+            activation_time, _, order = heapq.heappop(self._pending)
+            self._pending_ids.discard(order.order_id)
+            ready.append((activation_time, order))
+        
+        results = []
+        for activation_time, order in ready:
+            if order.is_complete:
+                continue
+            
+            data = market_data.get(order.symbol)
+            if data is None or data.timestamp < activation_time:
+                self.enqueue_order(order, activation_time)
+                continue
+            
+            fills = self._try_fill_order(order, data, fill_time=max(activation_time, data.timestamp))
+            filled = sum(fill.size for fill in fills)
+            results.extend((fill, order) for fill in fills)
+            
+            # Carry the unfilled remainder over to the next bar
+            if order.remaining_size - filled > 0:
+                self.enqueue_order(order, data.timestamp)
+        
+        return results
     
     def process_orders(
         self,
@@ -134,7 +222,8 @@ class ExecutionSimulator:
     def _try_fill_order(
         self,
         order: Order,
-        market_data: MarketData
+        market_data: MarketData,
+        fill_time: Optional[datetime] = None
     ) -> List[Fill]:
         """
         Attempt to fill an order
@@ -142,6 +231,7 @@ class ExecutionSimulator:
         Args:
             order: Order to fill
             market_data: Current market data
+            fill_time: Fill timestamp (defaults to bar time + latency)
         
         Returns:
             List of fills (0 or more)
@@ -175,7 +265,7 @@ class ExecutionSimulator:
             trade_id=generate_id(),
             order_id=order.order_id,
             signal_id=order.signal_id,
-            timestamp=self._apply_latency(market_data.timestamp),
+            timestamp=fill_time or self._apply_latency(market_data.timestamp),
             symbol=order.symbol,
             side=order.side,
             price=slipped_price,
@@ -186,6 +276,7 @@ class ExecutionSimulator:
         )
         
         fills.append(fill)
+        self._consume_liquidity(market_data, fill_size)
         
         # Update statistics
         self.fills_executed += 1
@@ -351,20 +442,38 @@ class ExecutionSimulator:
         if not self.config.allow_partial_fills:
             return remaining
         
-        # Check liquidity constraint
+        # Check liquidity constraint (shared by all orders on this bar)
         if self.config.use_volume and market_data.volume > 0:
-            max_fillable = market_data.volume * self.config.liquidity_limit_pct
+            available = self._available_liquidity(market_data)
             
-            if remaining > max_fillable:
+            if available <= 0:
+                return 0.0
+            
+            if remaining > available:
                 # Partial fill due to liquidity
-                fill_size = max_fillable
+                fill_size = max(available, self.config.min_fill_size)
                 logger.debug(
                     f"Partial fill due to liquidity: {fill_size:.2f} / {remaining:.2f}"
                 )
-                return max(fill_size, self.config.min_fill_size)
+                return min(fill_size, remaining)
         
         return remaining
     
+    def _available_liquidity(self, market_data: MarketData) -> float:
+        """Liquidity left on the current bar for a symbol"""
+        entry = self._bar_liquidity.get(market_data.symbol)
+        if entry is None or entry[0] != market_data.timestamp:
+            return market_data.volume * self.config.liquidity_limit_pct
+        return entry[1]
+    
+    def _consume_liquidity(self, market_data: MarketData, size: float):
+        """Deduct a fill from the current bar's liquidity"""
+        available = self._available_liquidity(market_data)
+        self._bar_liquidity[market_data.symbol] = (
+            market_data.timestamp,
+            max(available - size, 0.0)
+        )
+    
     def _apply_slippage(
         self,
         price: float,
@@ -446,7 +555,8 @@ class ExecutionSimulator:
             'avg_commission_per_fill': (
                 self.total_commission / self.fills_executed
                 if self.fills_executed > 0 else 0.0
-            )
+            ),
+            'pending_orders': len(self._pending)
         }
     
     def reset(self):
@@ -456,6 +566,10 @@ class ExecutionSimulator:
         self.total_slippage = 0.0
         self.total_commission = 0.0
         
+        self._pending.clear()
+        self._pending_ids.clear()
+        self._bar_liquidity.clear()
+        
         if self.config.random_seed is not None:
             random.seed(self.config.random_seed)
         
@@ -0,0 +1,421 @@
+"""
+Parallel Multi-Symbol Backtest Runner
+=====================================
+
+Runs one strategy across many symbols by dispatching each symbol (or chunk
+of symbols) to a process pool. Every worker loads its bars from the local
+bar cache (falling back to the data fetcher on a miss), runs the strategy
+through the backtesting.py adapter and returns a picklable per-symbol result.
+The per-symbol results are then merged into a single portfolio result.
+
+Capital is split equally across symbols, so the merged equity curve is the
+sum of the per-symbol equity curves.
+
+Version: 1.0.0
+Last Updated: 2026-10-18
+"""
+
+import os
+import sys
+import json
+import re
+import types
+import logging
+import math
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import numpy as np
+
+# Add parent directory to path
+PARENT_DIR = Path(__file__).parent.parent
+if str(PARENT_DIR) not in sys.path:
+    sys.path.insert(0, str(PARENT_DIR))
+
+logger = logging.getLogger(__name__)
+
+# Default location of the local bar cache
+BAR_CACHE_DIR = Path(__file__).parent / "data" / "bars"
+
+# Trading calendar used to annualize: sessions per year, minutes per session
+TRADING_DAYS_PER_YEAR = 252
+SESSION_MINUTES = 390
+
+_INTERVAL_PATTERN = re.compile(r'^(\d+)(m|h|d|wk|mo)$')
+
+
+def _finite(value, default: float = 0.0) -> float:
+    """Convert to float, replacing NaN/Infinity with default"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    if math.isnan(value) or math.isinf(value):
+        return default
+    return value
+
+
+def periods_per_year(interval: str) -> float:
+    """
+    Bars per year for a data interval, to annualize returns
+
+    Intraday bars are counted per trading session (the last bar of a
+    session may be partial, e.g. seven 1h bars per 6.5 hour session).
+
+    Args:
+        interval: Data interval ('5m', '1h', '1d', '1wk', '1mo', ...)
+
+    Returns:
+        Bars per year (TRADING_DAYS_PER_YEAR for unrecognized intervals)
+    """
+    match = _INTERVAL_PATTERN.match(str(interval).strip().lower())
+    if not match:
+        logger.warning(f"Unknown interval {interval!r}, annualizing as daily bars")
+        return float(TRADING_DAYS_PER_YEAR)
+
+    count, unit = int(match.group(1)), match.group(2)
+    if unit in ('m', 'h'):
+        bar_minutes = count * (60 if unit == 'h' else 1)
+        return float(TRADING_DAYS_PER_YEAR * math.ceil(SESSION_MINUTES / bar_minutes))
+    return {'d': TRADING_DAYS_PER_YEAR, 'wk': 52, 'mo': 12}[unit] / count
+
+
+def load_cached_bars(
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    interval: str = '1d',
+    cache_dir: Optional[Path] = None
+) -> pd.DataFrame:
+    """
+    Load OHLCV bars for a symbol from the local bar cache
+
+    On a cache miss the bars are fetched with fetch_and_prepare_data and
+    written back to the cache for subsequent runs. Ranges ending today or
+    later are still growing, so they are always fetched and never cached.
+
+    Args:
+        symbol: Stock ticker
+        start_date: Start date (YYYY-MM-DD)
+        end_date: End date (YYYY-MM-DD)
+        interval: Data interval
+        cache_dir: Cache directory (default: Backtest/data/bars)
+
+    Returns:
+        DataFrame prepared for backtesting.py
+    """
+    from Backtest.backtesting_adapter import fetch_and_prepare_data
+
+    if pd.Timestamp(end_date).date() >= date.today():
+        return fetch_and_prepare_data(symbol, start_date, end_date, interval)
+
+    cache_dir = Path(cache_dir) if cache_dir else BAR_CACHE_DIR
+    cache_path = cache_dir / f"{symbol}_{interval}_{start_date}_{end_date}.parquet"
+
+    if cache_path.exists():
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to load bar cache {cache_path.name}: {e}, fetching fresh data")
+
+    df = fetch_and_prepare_data(symbol, start_date, end_date, interval)
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(cache_path)
+    except Exception as e:
+        logger.warning(f"Failed to cache bars for {symbol}: {e}")
+
+    return df
+
+
+def load_strategy_class(strategy_code: Any) -> type:
+    """
+    Build a backtesting.py Strategy class from stored strategy code
+
+    Args:
+        strategy_code: Canonical JSON (dict or JSON string) or Python source
+                       defining a backtesting.Strategy subclass
+
+    Returns:
+        Strategy class
+    """
+    from backtesting import Strategy as BacktestStrategy
+    from Backtest.backtesting_adapter import create_strategy_from_canonical
+
+    canonical_json = None
+    if isinstance(strategy_code, dict):
+        canonical_json = strategy_code
+    elif isinstance(strategy_code, str) and strategy_code.strip().startswith('{'):
+        try:
+            canonical_json = json.loads(strategy_code)
+        except json.JSONDecodeError:
+            pass
+
+    if canonical_json is not None:
+        return create_strategy_from_canonical(
+            canonical_json,
+            canonical_json.get('strategy_name', 'GeneratedStrategy')
+        )
+
+    module = types.ModuleType("strategy_module")
+    exec(compile(strategy_code, "<strategy>", "exec"), module.__dict__)
+
+    for attr in vars(module).values():
+        if (isinstance(attr, type) and
+                issubclass(attr, BacktestStrategy) and
+                attr is not BacktestStrategy):
+            return attr
+
+    raise ValueError("No Strategy class found in code. Strategy must inherit from backtesting.Strategy")
+
+
+def run_symbol_backtest(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the strategy on a single symbol (process pool worker)
+
+    Args:
+        task: Dict with strategy_code, symbol, start_date, end_date,
+              interval, cash, commission and optional slippage and cache_dir
+
+    Returns:
+        Dict with symbol, success, error, equity (Series), trades (DataFrame)
+        and a summary of per-symbol statistics
+    """
+    symbol = task['symbol']
+
+    try:
+        from Backtest.backtesting_adapter import BacktestingAdapter
+
+        data = load_cached_bars(
+            symbol,
+            task['start_date'],
+            task['end_date'],
+            task.get('interval', '1d'),
+            task.get('cache_dir')
+        )
+        strategy_class = load_strategy_class(task['strategy_code'])
+
+        adapter = BacktestingAdapter(
+            data=data,
+            strategy_class=strategy_class,
+            cash=task['cash'],
+            commission=task['commission'],
+            spread=task.get('slippage', 0.0)
+        )
+        results = adapter.run()
+        trades = adapter.get_trades()
+
+        return {
+            'symbol': symbol,
+            'success': True,
+            'error': None,
+            'equity': results['_equity_curve']['Equity'],
+            'trades': trades[['Size', 'EntryTime', 'ExitTime', 'PnL', 'ReturnPct']],
+            'summary': {
+                'symbol': symbol,
+                'bars': len(data),
+                'final_equity': _finite(results['Equity Final [$]']),
+                'total_return_pct': _finite(results['Return [%]']),
+                'sharpe_ratio': _finite(results.get('Sharpe Ratio', 0)),
+                'max_drawdown_pct': _finite(results['Max. Drawdown [%]']),
+                'total_trades': int(results['# Trades']),
+                'win_rate_pct': _finite(results['Win Rate [%]']),
+            }
+        }
+    except Exception as e:
+        logger.error(f"Backtest failed for {symbol}: {e}")
+        return {
+            'symbol': symbol,
+            'success': False,
+            'error': str(e),
+            'summary': {'symbol': symbol, 'error': str(e)}
+        }
+
+
+def run_symbol_chunk(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Run a chunk of symbol tasks sequentially inside one worker"""
+    return [run_symbol_backtest(task) for task in tasks]
+
+
+def merge_symbol_results(
+    symbol_results: List[Dict[str, Any]],
+    initial_capital: float,
+    bars_per_year: float = TRADING_DAYS_PER_YEAR
+) -> Dict[str, Any]:
+    """
+    Merge per-symbol results into one portfolio result
+
+    Args:
+        symbol_results: Results from run_symbol_backtest
+        initial_capital: Total starting capital across all symbols
+        bars_per_year: Bars per year used to annualize returns
+                       (see periods_per_year)
+
+    Returns:
+        Dict with metrics, portfolio_values, returns, drawdowns,
+        positions and symbol_results
+    """
+    succeeded = [r for r in symbol_results if r['success']]
+    breakdown = [r['summary'] for r in symbol_results]
+
+    if not succeeded:
+        errors = "; ".join(f"{r['symbol']}: {r['error']}" for r in symbol_results)
+        return {'success': False, 'error': errors or 'No symbols to backtest', 'symbol_results': breakdown}
+
+    # Align equity curves; symbols without a bar carry their last equity
+    equity = pd.concat(
+        {r['symbol']: r['equity'] for r in succeeded}, axis=1
+    ).sort_index().ffill().bfill()
+    portfolio = equity.sum(axis=1)
+
+    returns = portfolio.pct_change().fillna(0.0)
+    drawdowns = portfolio / portfolio.cummax() - 1.0
+
+    # Open positions over time, from trade entry/exit bars
+    trades = pd.concat([r['trades'] for r in succeeded], ignore_index=True)
+    index = portfolio.index
+    open_delta = np.zeros(len(index) + 1, dtype=np.int64)
+    if len(trades):
+        np.add.at(open_delta, index.searchsorted(trades['EntryTime'].values), 1)
+        np.add.at(open_delta, index.searchsorted(trades['ExitTime'].values), -1)
+    positions = np.cumsum(open_delta[:-1])
+
+    # Drawdown duration in bars
+    underwater = (drawdowns < 0).astype(np.int64).values
+    max_dd_duration = 0
+    run_length = 0
+    for flag in underwater:
+        run_length = run_length + 1 if flag else 0
+        max_dd_duration = max(max_dd_duration, run_length)
+
+    final_value = _finite(portfolio.iloc[-1], initial_capital)
+    total_return = (final_value / initial_capital - 1.0) * 100
+    n_periods = max(len(portfolio) - 1, 1)
+    annualized_return = ((final_value / initial_capital) ** (bars_per_year / n_periods) - 1.0) * 100
+    volatility = returns.std() * np.sqrt(bars_per_year) * 100
+    sharpe = returns.mean() / returns.std() * np.sqrt(bars_per_year) if returns.std() > 0 else 0.0
+
+    trade_returns = trades['ReturnPct'] * 100 if len(trades) else pd.Series(dtype=float)
+    wins = trade_returns[trade_returns > 0]
+    losses = trade_returns[trade_returns <= 0]
+    gross_profit = trades.loc[trades['PnL'] > 0, 'PnL'].sum() if len(trades) else 0.0
+    gross_loss = -trades.loc[trades['PnL'] < 0, 'PnL'].sum() if len(trades) else 0.0
+    avg_win = wins.mean() if len(wins) else 0.0
+    avg_loss = losses.mean() if len(losses) else 0.0
+
+    metrics = {
+        'final_portfolio_value': final_value,
+        'total_return': _finite(total_return),
+        'annualized_return': _finite(annualized_return),
+        'volatility': _finite(volatility),
+        'sharpe_ratio': _finite(sharpe),
+        'max_drawdown': _finite(drawdowns.min() * 100),
+        'max_drawdown_duration': int(max_dd_duration),
+        'current_drawdown': _finite(drawdowns.iloc[-1] * 100),
+        'total_trades': int(len(trades)),
+        'winning_trades': int(len(wins)),
+        'losing_trades': int(len(losses)),
+        'win_rate': _finite(len(wins) / len(trades) * 100 if len(trades) else 0.0),
+        'avg_trade_return': _finite(trade_returns.mean() if len(trades) else 0.0),
+        'avg_winning_trade': _finite(avg_win),
+        'avg_losing_trade': _finite(avg_loss),
+        'largest_winning_trade': _finite(wins.max() if len(wins) else 0.0),
+        'largest_losing_trade': _finite(losses.min() if len(losses) else 0.0),
+        'profit_factor': _finite(gross_profit / gross_loss if gross_loss > 0 else 0.0),
+        'payoff_ratio': _finite(avg_win / abs(avg_loss) if avg_loss else 0.0),
+    }
+
+    timestamps = [str(ts) for ts in index]
+
+    return {
+        'success': True,
+        'metrics': metrics,
+        'portfolio_values': dict(zip(timestamps, portfolio.round(6).tolist())),
+        'returns': dict(zip(timestamps, returns.round(8).tolist())),
+        'drawdowns': dict(zip(timestamps, drawdowns.round(8).tolist())),
+        'positions': dict(zip(timestamps, positions.tolist())),
+        'symbol_results': breakdown,
+    }
+
+
+def run_parallel_backtest(
+    strategy_code: Any,
+    symbols: List[str],
+    start_date: str,
+    end_date: str,
+    interval: str = '1d',
+    initial_capital: float = 10000,
+    commission: float = 0.002,
+    slippage: float = 0.0,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 1,
+    cache_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """
+    Backtest a strategy across symbols in parallel
+
+    Args:
+        strategy_code: Canonical JSON or backtesting.py Python source
+        symbols: Symbols to backtest (duplicates are run once)
+        start_date: Start date (YYYY-MM-DD)
+        end_date: End date (YYYY-MM-DD)
+        interval: Data interval
+        initial_capital: Total capital, split equally across symbols
+        commission: Commission rate
+        slippage: Slippage rate, applied to fills as a bid-ask spread
+        max_workers: Process pool size (default: CPU count)
+        chunk_size: Symbols per worker task
+        cache_dir: Bar cache directory (default: Backtest/data/bars)
+
+    Returns:
+        Merged result dict (see merge_symbol_results)
+    """
+    # A repeated symbol would collapse into one equity column but still get
+    # its own share of capital and its trades counted twice
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {'success': False, 'error': 'No symbols to backtest', 'symbol_results': []}
+
+    cash_per_symbol = initial_capital / len(symbols)
+    tasks = [
+        {
+            'strategy_code': strategy_code,
+            'symbol': symbol,
+            'start_date': start_date,
+            'end_date': end_date,
+            'interval': interval,
+            'cash': cash_per_symbol,
+            'commission': commission,
+            'slippage': slippage,
+            'cache_dir': str(cache_dir) if cache_dir else None,
+        }
+        for symbol in symbols
+    ]
+    chunk_size = max(1, chunk_size)
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+
+    logger.info(
+        f"Running {len(symbols)} symbols in {len(chunks)} chunks "
+        f"across {max_workers} worker(s)"
+    )
+
+    symbol_results: List[Dict[str, Any]] = []
+    if max_workers <= 1:
+        for chunk in chunks:
+            symbol_results.extend(run_symbol_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_symbol_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                symbol_results.extend(future.result())
+
+    # Keep the breakdown in request order
+    order = {symbol: i for i, symbol in enumerate(symbols)}
+    symbol_results.sort(key=lambda r: order[r['symbol']])
+
+    return merge_symbol_results(symbol_results, initial_capital, periods_per_year(interval))
@@ -138,6 +138,10 @@ class SimBroker:
         if order is None:
             return ""
         
+        # Defer execution by the configured latency
+        if self.execution_simulator.queue_enabled:
+            self.execution_simulator.enqueue_order(order)
+        
         return order.order_id
     
     def get_order(self, order_id: str) -> dict:
@@ -335,6 +339,15 @@ class SimBroker:
     
     def _process_active_orders(self):
         """Process all active orders"""
+        if self.execution_simulator.queue_enabled:
+            pending_fills = self.execution_simulator.process_pending(
+                self.current_time,
+                self.market_data_cache
+            )
+            for fill, order in pending_fills:
+                self._process_fill(fill, order)
+            return
+        
         active_orders = self.order_manager.get_active_orders()
         
         for order in active_orders:
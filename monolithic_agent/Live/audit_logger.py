@@ -1,39 +1,82 @@
 """
 Audit Logger - Structured logging and persistent audit trail
+Writes are queued and committed in batches by a background thread over a
+single WAL-mode connection, so the trading thread never waits on disk I/O
 """
+import atexit
+import queue
 import sqlite3
+import threading
 import json
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 
 logger = logging.getLogger('LiveTrader.AuditLogger')
 
+# Marks the end of the write queue
+_STOP = object()
+
+
+class _LockedConnection:
+    """Context manager giving exclusive use of a shared connection"""
+    
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+    
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        return self.conn
+    
+    def __exit__(self, *exc):
+        self.lock.release()
+
 
 class AuditLogger:
     """
     Persistent audit logging for all trading activities
     """
     
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, max_queue_size: int = 10000, batch_size: int = 500):
         """
         Initialize audit logger
         
         Args:
             db_path: Path to SQLite database file
+            max_queue_size: Pending writes before log calls block
+            batch_size: Most writes committed in one transaction
         """
-        self.db_path = db_path
+        self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.closed = False
+        
+        # Single long-lived writer connection, used only by the writer thread
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        
+        # Separate reader connection (WAL lets it read while the writer commits)
+        self._read_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._read_conn.row_factory = sqlite3.Row
+        self._read_lock = threading.Lock()
         
         # Initialize database
         self._init_database()
         
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._writer = threading.Thread(target=self._writer_loop, name='audit-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        
         logger.info(f"AuditLogger initialized: {db_path}")
     
     def _init_database(self):
         """Create database tables if they don't exist"""
-        with sqlite3.connect(self.db_path) as conn:
+        conn = self._conn
+        with conn:
             cursor = conn.cursor()
             
             # Signals table
@@ -143,9 +186,79 @@ class AuditLogger:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_signal_id ON orders(signal_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON account_snapshots(timestamp)")
             
-            conn.commit()
-            logger.info("✓ Audit database initialized")
+        logger.info("✓ Audit database initialized")
+    
+    def _enqueue(self, sql: str, params):
+        """Queue a write for the background writer (blocks only if the queue is full)"""
+        if self.closed:
+            raise RuntimeError("AuditLogger is closed")
+        self._queue.put((sql, params))
+    
+    def _writer_loop(self):
+        """Drain the queue, committing writes in batched transactions"""
+        while True:
+            item = self._queue.get()
+            batch: List[Tuple[str, Any]] = []
+            stop = item is _STOP
+            if not stop:
+                batch.append(item)
+            
+            # Take whatever else is already waiting, up to batch_size
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            
+            if batch:
+                self._write_batch(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+    
+    def _write_batch(self, batch: List[Tuple[str, Any]]):
+        """Commit a batch in one transaction, falling back to row-by-row on error"""
+        try:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                for sql, params in batch:
+                    self._conn.execute(sql, params)
+            return
+        except sqlite3.Error as e:
+            logger.warning(f"Audit batch of {len(batch)} failed ({e}), retrying individually")
+        
+        # One bad record (e.g. a duplicate id) must not lose the rest
+        for sql, params in batch:
+            try:
+                with self._conn:
+                    self._conn.execute(sql, params)
+            except sqlite3.Error as e:
+                logger.error(f"Audit write failed: {e}")
+    
+    def flush(self):
+        """Block until every queued write has been committed"""
+        if self._writer.is_alive():
+            self._queue.join()
+    
+    def close(self):
+        """Flush pending writes and close the database connections"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+        logger.info("AuditLogger closed")
     
     def log_signal(
         self, 
@@ -158,25 +271,20 @@ class AuditLogger:
         metadata: Optional[Dict[str, Any]] = None
     ):
         """Log a trading signal"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO signals 
-                (timestamp, signal_id, symbol, signal_type, confidence, price, strategy_id, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
-                signal_id,
-                symbol,
-                signal_type,
-                confidence,
-                price,
-                strategy_id,
-                json.dumps(metadata) if metadata else None
-            ))
-            
-            conn.commit()
+        self._enqueue("""
+            INSERT INTO signals 
+            (timestamp, signal_id, symbol, signal_type, confidence, price, strategy_id, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            datetime.now().isoformat(),
+            signal_id,
+            symbol,
+            signal_type,
+            confidence,
+            price,
+            strategy_id,
+            json.dumps(metadata) if metadata else None
+        ))
     
     def log_order(
         self,
@@ -192,30 +300,25 @@ class AuditLogger:
         metadata: Optional[Dict[str, Any]] = None
     ):
         """Log an order submission"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO orders 
-                (timestamp, client_order_id, signal_id, symbol, order_type, side, 
-                 volume, price, sl, tp, status, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
-                client_order_id,
-                signal_id,
-                symbol,
-                order_type,
-                side,
-                volume,
-                price,
-                sl,
-                tp,
-                'PENDING',
-                json.dumps(metadata) if metadata else None
-            ))
-            
-            conn.commit()
+        self._enqueue("""
+            INSERT INTO orders 
+            (timestamp, client_order_id, signal_id, symbol, order_type, side, 
+             volume, price, sl, tp, status, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            datetime.now().isoformat(),
+            client_order_id,
+            signal_id,
+            symbol,
+            order_type,
+            side,
+            volume,
+            price,
+            sl,
+            tp,
+            'PENDING',
+            json.dumps(metadata) if metadata else None
+        ))
     
     def update_order(
         self,
@@ -231,53 +334,48 @@ class AuditLogger:
         error_message: Optional[str] = None
     ):
         """Update order with execution results"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            update_fields = ['status = ?', 'updated_at = ?']
-            values = [status, datetime.now().isoformat()]
-            
-            if mt5_order_id is not None:
-                update_fields.append('mt5_order_id = ?')
-                values.append(mt5_order_id)
-            
-            if mt5_deal_id is not None:
-                update_fields.append('mt5_deal_id = ?')
-                values.append(mt5_deal_id)
-            
-            if executed_price is not None:
-                update_fields.append('executed_price = ?')
-                values.append(executed_price)
-            
-            if executed_volume is not None:
-                update_fields.append('executed_volume = ?')
-                values.append(executed_volume)
-            
-            if retcode is not None:
-                update_fields.append('retcode = ?')
-                values.append(retcode)
-            
-            if retcode_message is not None:
-                update_fields.append('retcode_message = ?')
-                values.append(retcode_message)
-            
-            if attempts is not None:
-                update_fields.append('attempts = ?')
-                values.append(attempts)
-            
-            if error_message is not None:
-                update_fields.append('error_message = ?')
-                values.append(error_message)
-            
-            values.append(client_order_id)
-            
-            cursor.execute(f"""
-                UPDATE orders 
-                SET {', '.join(update_fields)}
-                WHERE client_order_id = ?
-            """, values)
-            
-            conn.commit()
+        update_fields = ['status = ?', 'updated_at = ?']
+        values = [status, datetime.now().isoformat()]
+        
+        if mt5_order_id is not None:
+            update_fields.append('mt5_order_id = ?')
+            values.append(mt5_order_id)
+        
+        if mt5_deal_id is not None:
+            update_fields.append('mt5_deal_id = ?')
+            values.append(mt5_deal_id)
+        
+        if executed_price is not None:
+            update_fields.append('executed_price = ?')
+            values.append(executed_price)
+        
+        if executed_volume is not None:
+            update_fields.append('executed_volume = ?')
+            values.append(executed_volume)
+        
+        if retcode is not None:
+            update_fields.append('retcode = ?')
+            values.append(retcode)
+        
+        if retcode_message is not None:
+            update_fields.append('retcode_message = ?')
+            values.append(retcode_message)
+        
+        if attempts is not None:
+            update_fields.append('attempts = ?')
+            values.append(attempts)
+        
+        if error_message is not None:
+            update_fields.append('error_message = ?')
+            values.append(error_message)
+        
+        values.append(client_order_id)
+        
+        self._enqueue(f"""
+            UPDATE orders 
+            SET {', '.join(update_fields)}
+            WHERE client_order_id = ?
+        """, values)
     
     def log_trade(
         self,
@@ -296,33 +394,28 @@ class AuditLogger:
         metadata: Optional[Dict[str, Any]] = None
     ):
         """Log a completed trade"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO trades 
-                (timestamp, symbol, side, entry_price, exit_price, volume, profit,
-                 commission, swap, duration_seconds, entry_order_id, exit_order_id,
-                 strategy_id, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
-                symbol,
-                side,
-                entry_price,
-                exit_price,
-                volume,
-                profit,
-                commission,
-                swap,
-                duration_seconds,
-                entry_order_id,
-                exit_order_id,
-                strategy_id,
-                json.dumps(metadata) if metadata else None
-            ))
-            
-            conn.commit()
+        self._enqueue("""
+            INSERT INTO trades 
+            (timestamp, symbol, side, entry_price, exit_price, volume, profit,
+             commission, swap, duration_seconds, entry_order_id, exit_order_id,
+             strategy_id, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            datetime.now().isoformat(),
+            symbol,
+            side,
+            entry_price,
+            exit_price,
+            volume,
+            profit,
+            commission,
+            swap,
+            duration_seconds,
+            entry_order_id,
+            exit_order_id,
+            strategy_id,
+            json.dumps(metadata) if metadata else None
+        ))
     
     def log_event(
         self,
@@ -332,22 +425,17 @@ class AuditLogger:
         details: Optional[Dict[str, Any]] = None
     ):
         """Log a system event"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO events 
-                (timestamp, event_type, severity, message, details)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
-                event_type,
-                severity,
-                message,
-                json.dumps(details) if details else None
-            ))
-            
-            conn.commit()
+        self._enqueue("""
+            INSERT INTO events 
+            (timestamp, event_type, severity, message, details)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            datetime.now().isoformat(),
+            event_type,
+            severity,
+            message,
+            json.dumps(details) if details else None
+        ))
     
     def log_account_snapshot(
         self,
@@ -361,32 +449,34 @@ class AuditLogger:
         metadata: Optional[Dict[str, Any]] = None
     ):
         """Log account state snapshot"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO account_snapshots 
-                (timestamp, balance, equity, profit, margin, margin_free, 
-                 margin_level, open_positions, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
-                balance,
-                equity,
-                profit,
-                margin,
-                margin_free,
-                margin_level,
-                open_positions,
-                json.dumps(metadata) if metadata else None
-            ))
-            
-            conn.commit()
+        self._enqueue("""
+            INSERT INTO account_snapshots 
+            (timestamp, balance, equity, profit, margin, margin_free, 
+             margin_level, open_positions, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            datetime.now().isoformat(),
+            balance,
+            equity,
+            profit,
+            margin,
+            margin_free,
+            margin_level,
+            open_positions,
+            json.dumps(metadata) if metadata else None
+        ))
+    
+    def _reader(self):
+        """
+        Reader connection, after flushing queued writes so queries see them
+        (held under a lock; use as a context manager)
+        """
+        self.flush()
+        return _LockedConnection(self._read_conn, self._read_lock)
     
     def get_recent_signals(self, limit: int = 100) -> list:
         """Get recent signals"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._reader() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -399,8 +489,7 @@ class AuditLogger:
     
     def get_recent_orders(self, limit: int = 100) -> list:
         """Get recent orders"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._reader() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -413,11 +502,11 @@ class AuditLogger:
     
     def get_trades_summary(self, days: int = 30) -> Dict[str, Any]:
         """Get trading summary for last N days"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._reader() as conn:
             cursor = conn.cursor()
             
             cutoff = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            cutoff = cutoff.replace(day=cutoff.day - days)
+            cutoff = cutoff - timedelta(days=days)
             
             cursor.execute("""
                 SELECT 
@@ -500,4 +589,5 @@ if __name__ == "__main__":
     print(f"Total Profit: ${summary['total_profit']:.2f}")
     print(f"Win Rate: {summary['win_rate']:.1f}%")
     
+    audit.close()
     print("\n✓ Audit logger test completed")
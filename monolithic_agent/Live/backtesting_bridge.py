@@ -4,8 +4,9 @@ Reuses Backtesting module's functions for signal generation, sizing, and order b
 """
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime, timedelta
+import threading
 import pandas as pd
 import logging
 
@@ -24,8 +25,201 @@ except ImportError as e:
         f"Error: {e}"
     )
 
+from bar_scheduler import parse_timeframe
+
 logger = logging.getLogger('LiveTrader.BacktestBridge')
 
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Timeframe unit -> pd.DateOffset argument, for bar close times
+_BAR_LENGTH_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'wk': 'weeks', 'mo': 'months'}
+
+# Data period for a session's first load, and shorter periods for later polls
+FULL_PERIOD = '1mo'
+_INCREMENTAL_PERIODS = [('5d', pd.Timedelta(days=5))]
+
+# Bars re-fetched before the last seen bar so indicators are warm on new bars
+WARMUP_BARS = 20
+
+# Bars kept in a session's frame
+MAX_FRAME_BARS = 1000
+
+
+def _bar_length(timeframe: str) -> pd.DateOffset:
+    count, unit = parse_timeframe(timeframe)
+    return pd.DateOffset(**{_BAR_LENGTH_UNITS[unit]: count})
+
+
+def closed_bars(df: pd.DataFrame, timeframe: str, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Drop the last bar if it is still forming
+    
+    A data source returns the current bar before it closes. Evaluating it
+    would act on partial OHLC, and an incremental session would then skip
+    the bar as seen once its final values arrive.
+    
+    Args:
+        df: Bars indexed by open time
+        timeframe: Bar timeframe (e.g., '1d', '1h', '5m')
+        now: Current time (default: now, in the index timezone)
+    
+    Returns:
+        df without a bar whose close time is still in the future
+    """
+    if df.empty:
+        return df
+    now = pd.Timestamp.now(tz=df.index.tz) if now is None else now
+    if df.index[-1] + _bar_length(timeframe) > now:
+        return df.iloc[:-1]
+    return df
+
+
+class _RecordingBroker(SimBroker):
+    """SimBroker that remembers the signals accepted on the current bar"""
+    
+    def __init__(self, config: BacktestConfig):
+        super().__init__(config)
+        self.bar_signals: List[dict] = []
+    
+    def submit_signal(self, signal: dict) -> str:
+        order_id = super().submit_signal(signal)
+        if order_id:
+            self.bar_signals.append(signal)
+        return order_id
+
+
+class BridgeSession:
+    """
+    Persistent strategy/broker state for one symbol
+    
+    Keeps the strategy instance and its SimBroker alive between polls, so
+    each poll only evaluates bars newer than the last one seen instead of
+    replaying the whole window. The closed bars and their indicator values
+    are kept in `frame`, so later polls only fetch the bars since the last
+    one plus a short warm-up overlap.
+    """
+    
+    def __init__(self, strategy_class, strategy_params: Dict[str, Any], symbol: str):
+        self.symbol = symbol
+        self.strategy_id = strategy_class.__name__
+        self.broker = _RecordingBroker(BacktestConfig(start_cash=100000))
+        self.strategy = strategy_class(self.broker, **strategy_params)
+        self.last_timestamp = None
+        self.bars_processed = 0
+        self.frame: Optional[pd.DataFrame] = None
+    
+    def fetch_period(self, timeframe: str, now: Optional[pd.Timestamp] = None) -> str:
+        """
+        Data period to load on the next poll
+        
+        The full period on the first poll; afterwards the shortest period
+        covering the bars since the last one in the frame plus WARMUP_BARS
+        of overlap, falling back to the full period after a long gap.
+        """
+        if self.frame is None or self.frame.empty:
+            return FULL_PERIOD
+        now = pd.Timestamp.now(tz=self.frame.index.tz) if now is None else now
+        start = self.frame.index[-1] - _bar_length(timeframe) * WARMUP_BARS
+        for period, span in _INCREMENTAL_PERIODS:
+            if now - span <= start:
+                return period
+        return FULL_PERIOD
+    
+    def append(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add the closed bars in df that are newer than the frame
+        
+        Overlapping bars keep the values computed on the longer history.
+        
+        Returns:
+            The frame, trimmed to the last MAX_FRAME_BARS bars
+        """
+        if self.frame is not None and not self.frame.empty:
+            df = pd.concat([self.frame, df[df.index > self.frame.index[-1]]])
+        self.frame = df.iloc[-MAX_FRAME_BARS:]
+        return self.frame
+    
+    def new_bars(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Bars in df that this session has not evaluated yet"""
+        if self.last_timestamp is None:
+            return df
+        return df[df.index > self.last_timestamp]
+    
+    def process(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate the strategy on the new bars in df
+        
+        Returns:
+            Signals DataFrame (indexed by timestamp) for the new bars only
+        """
+        bars = self.new_bars(df)
+        indicator_columns = [col for col in bars.columns if col not in PRICE_COLUMNS]
+        signals_list = []
+        
+        for timestamp, values in zip(bars.index, bars.itertuples(index=False, name=None)):
+            row = dict(zip(bars.columns, values))
+            
+            # Prepare market data dict
+            market_data = {
+                self.symbol: {
+                    'open': row['Open'],
+                    'high': row['High'],
+                    'low': row['Low'],
+                    'close': row['Close'],
+                    'volume': row.get('Volume', 0)
+                }
+            }
+            
+            # Add indicator values to market data
+            for col in indicator_columns:
+                market_data[self.symbol][col.lower()] = row[col]
+            
+            # Call strategy's on_bar method
+            # (Strategy will call broker.submit_signal internally)
+            self.broker.bar_signals = []
+            self.strategy.on_bar(timestamp, market_data)
+            self.broker.step_to(timestamp, market_data)
+            
+            signals_list.append(self._signal_row(timestamp, row))
+        
+        if len(bars):
+            self.last_timestamp = bars.index[-1]
+            self.bars_processed += len(bars)
+        
+        signals_df = pd.DataFrame(
+            signals_list,
+            columns=['timestamp', 'signal', 'confidence', 'price', 'strategy_id', 'action', 'size']
+        )
+        signals_df.set_index('timestamp', inplace=True)
+        return signals_df
+    
+    def _signal_row(self, timestamp, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Signal record for a bar, from the last signal the strategy submitted"""
+        if not self.broker.bar_signals:
+            # No signal - HOLD
+            return {
+                'timestamp': timestamp,
+                'signal': 'HOLD',
+                'confidence': 0.0,
+                'price': row['Close'],
+                'strategy_id': self.strategy_id,
+                'action': None,
+                'size': 0
+            }
+        
+        latest = self.broker.bar_signals[-1]
+        side = str(getattr(latest.get('side'), 'value', latest.get('side'))).upper()
+        action = latest.get('action')
+        return {
+            'timestamp': timestamp,
+            'signal': 'BUY' if side == 'BUY' else 'SELL',
+            'confidence': 1.0,  # Could be enhanced with strategy confidence
+            'price': latest.get('price') or row['Close'],
+            'strategy_id': self.strategy_id,
+            'action': getattr(action, 'value', action),
+            'size': latest.get('size', 0)
+        }
+
 
 class BacktestingBridge:
     """
@@ -44,16 +238,36 @@ class BacktestingBridge:
         self.strategy_params = strategy_params or {}
         self.strategy_instance = None
         self.mock_broker = None
+        self.sessions: Dict[Tuple[str, str], BridgeSession] = {}
+        self._sessions_lock = threading.Lock()
         
         logger.info(f"Initialized BacktestingBridge with strategy: {strategy_class.__name__}")
     
+    def get_session(self, symbol: str, timeframe: str) -> BridgeSession:
+        """Persistent session for a symbol/timeframe, created on first use"""
+        key = (symbol, timeframe)
+        with self._sessions_lock:
+            if key not in self.sessions:
+                self.sessions[key] = BridgeSession(self.strategy_class, self.strategy_params, symbol)
+            return self.sessions[key]
+    
+    def reset_session(self, symbol: Optional[str] = None):
+        """Drop persistent session state (for one symbol, or all)"""
+        with self._sessions_lock:
+            if symbol is None:
+                self.sessions.clear()
+            else:
+                for key in [key for key in self.sessions if key[0] == symbol]:
+                    del self.sessions[key]
+    
     def generate_signals(
         self, 
         symbol: str, 
         from_ts: datetime, 
         to_ts: datetime, 
         timeframe: str = '1d',
-        indicators: Optional[Dict[str, Any]] = None
+        indicators: Optional[Dict[str, Any]] = None,
+        incremental: bool = False
     ) -> pd.DataFrame:
         """
         Generate trading signals using the backtesting strategy
@@ -64,25 +278,40 @@ class BacktestingBridge:
             to_ts: End timestamp
             timeframe: Timeframe/interval (e.g., '1d', '1h', '5m')
             indicators: Optional dict of indicators to load
+            incremental: Keep the strategy and broker alive between calls
+                        and only evaluate bars newer than the previous call
+                        (the first call loads a month of history and warms
+                        up on the whole range; later calls only fetch the
+                        bars since the previous one)
         
         Returns:
             DataFrame with columns: timestamp, signal, confidence, price, strategy_id
-            where signal is 'BUY', 'SELL', or 'HOLD'
+            where signal is 'BUY', 'SELL', or 'HOLD'. Only closed bars are
+            evaluated. In incremental mode only the new bars are returned
+            (empty if there are none).
         """
         logger.info(f"Generating signals for {symbol} from {from_ts} to {to_ts} ({timeframe})")
         
+        if incremental:
+            session = self.get_session(symbol, timeframe)
+        else:
+            session = BridgeSession(self.strategy_class, self.strategy_params, symbol)
+        
         # Load market data with indicators
         try:
             df, metadata = load_market_data(
                 ticker=symbol,
                 indicators=indicators,
-                period='1mo',  # Load enough history
+                period=session.fetch_period(timeframe),
                 interval=timeframe
             )
         except Exception as e:
             logger.error(f"Failed to load market data: {e}")
             return pd.DataFrame()
         
+        # A still-forming bar is evaluated on a later call, once it has closed
+        df = session.append(closed_bars(df, timeframe))
+        
         # Filter to requested time range
         df = df[(df.index >= from_ts) & (df.index <= to_ts)]
         
@@ -90,72 +319,10 @@ class BacktestingBridge:
             logger.warning(f"No data available for {symbol} in range {from_ts} to {to_ts}")
             return pd.DataFrame()
         
-        # Initialize mock broker for signal generation
-        config = BacktestConfig(start_cash=100000)
-        self.mock_broker = SimBroker(config)
-        
-        # Initialize strategy
-        self.strategy_instance = self.strategy_class(self.mock_broker, **self.strategy_params)
+        self.mock_broker = session.broker
+        self.strategy_instance = session.strategy
         
-        # Collect signals
-        signals_list = []
-        
-        for timestamp, row in df.iterrows():
-            # Prepare market data dict
-            market_data = {
-                symbol: {
-                    'open': row['Open'],
-                    'high': row['High'],
-                    'low': row['Low'],
-                    'close': row['Close'],
-                    'volume': row.get('Volume', 0)
-                }
-            }
-            
-            # Add indicator values to market data
-            for col in df.columns:
-                if col not in ['Open', 'High', 'Low', 'Close', 'Volume']:
-                    market_data[symbol][col.lower()] = row[col]
-            
-            # Call strategy's on_bar method
-            # (Strategy will call broker.submit_signal internally)
-            old_signal_count = len(self.mock_broker.orders)
-            
-            self.strategy_instance.on_bar(timestamp, market_data)
-            self.mock_broker.step_to(timestamp, market_data)
-            
-            # Check if new signal was generated
-            new_signal_count = len(self.mock_broker.orders)
-            
-            if new_signal_count > old_signal_count:
-                # New signal was generated
-                latest_order = list(self.mock_broker.orders.values())[-1]
-                
-                signal_type = 'BUY' if latest_order['side'] == 'BUY' else 'SELL'
-                
-                signals_list.append({
-                    'timestamp': timestamp,
-                    'signal': signal_type,
-                    'confidence': 1.0,  # Could be enhanced with strategy confidence
-                    'price': latest_order.get('price', row['Close']),
-                    'strategy_id': self.strategy_class.__name__,
-                    'action': latest_order['action'],
-                    'size': latest_order['size']
-                })
-            else:
-                # No signal - HOLD
-                signals_list.append({
-                    'timestamp': timestamp,
-                    'signal': 'HOLD',
-                    'confidence': 0.0,
-                    'price': row['Close'],
-                    'strategy_id': self.strategy_class.__name__,
-                    'action': None,
-                    'size': 0
-                })
-        
-        signals_df = pd.DataFrame(signals_list)
-        signals_df.set_index('timestamp', inplace=True)
+        signals_df = session.process(df)
         
         logger.info(f"Generated {len(signals_df)} signals, "
                    f"{len(signals_df[signals_df['signal'] != 'HOLD'])} actionable")
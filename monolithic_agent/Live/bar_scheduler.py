@@ -0,0 +1,148 @@
+"""
+Bar-Close Scheduler - Tells the live trader which bars have closed
+Computes the next bar-close time per timeframe and coalesces symbols that
+share a timeframe, so signals are only evaluated once per closed bar
+"""
+import calendar
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Callable, Optional, Tuple
+import logging
+
+logger = logging.getLogger('LiveTrader.Scheduler')
+
+# Sunday 1970-01-04 00:00, so weekly bars open on Sunday like MT5 W1 bars
+WEEK_ANCHOR = 3 * 86400
+
+_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'wk': 604800}
+_TIMEFRAME_PATTERN = re.compile(r'^(\d+)(m|h|d|wk|mo)$')
+
+
+def parse_timeframe(timeframe: str) -> Tuple[int, str]:
+    """
+    Split a timeframe such as '5m', '1h', '1d', '1wk' or '1mo'
+
+    Returns:
+        Tuple of (count, unit)
+    """
+    match = _TIMEFRAME_PATTERN.match(timeframe.strip().lower())
+    if not match:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return int(match.group(1)), match.group(2)
+
+
+def next_bar_close(timeframe: str, now: float, utc_offset: float = 0.0) -> float:
+    """
+    Next bar-close time strictly after `now`
+
+    Bars are aligned in broker server time (UTC + utc_offset), as MT5 builds
+    them: intraday and daily bars to server midnight, weekly bars to Sunday
+    and monthly bars to the first of the month.
+
+    Args:
+        timeframe: Bar timeframe
+        now: Current time (epoch seconds)
+        utc_offset: Broker server time offset from UTC (seconds)
+
+    Returns:
+        Close time (epoch seconds, UTC)
+    """
+    count, unit = parse_timeframe(timeframe)
+    server_now = now + utc_offset
+
+    if unit == 'mo':
+        current = datetime.fromtimestamp(server_now, tz=timezone.utc)
+        months = current.year * 12 + current.month - 1
+        next_months = (months // count + 1) * count
+        year, month = divmod(next_months, 12)
+        return calendar.timegm((year, month + 1, 1, 0, 0, 0)) - utc_offset
+
+    period = count * _UNIT_SECONDS[unit]
+    anchor = WEEK_ANCHOR if unit == 'wk' else 0
+    return anchor + ((server_now - anchor) // period + 1) * period - utc_offset
+
+
+class BarCloseScheduler:
+    """
+    Tracks bar closes per timeframe so the trading loop only evaluates the
+    timeframes whose bar has just closed
+    """
+
+    def __init__(
+        self,
+        symbol_timeframes: Dict[str, str],
+        grace_seconds: float = 2.0,
+        clock: Callable[[], float] = time.time,
+        utc_offset: float = 0.0
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            symbol_timeframes: Symbol -> timeframe
+            grace_seconds: Delay after a bar close before it counts as due,
+                          so the data source has the closed bar
+            clock: Time source (epoch seconds)
+            utc_offset: Broker server time offset from UTC (seconds); bars
+                       close on server-time boundaries
+        """
+        self.grace_seconds = grace_seconds
+        self.clock = clock
+        self.utc_offset = utc_offset
+        self.last_check = clock()
+
+        # Coalesce symbols sharing a timeframe
+        self.groups: Dict[str, List[str]] = {}
+        for symbol, timeframe in symbol_timeframes.items():
+            parse_timeframe(timeframe)
+            self.groups.setdefault(timeframe, []).append(symbol)
+
+        logger.info(f"Bar-close scheduler: " + ", ".join(
+            f"{timeframe} -> {len(symbols)} symbol(s)" for timeframe, symbols in self.groups.items()
+        ))
+
+    def next_wakeup(self, now: Optional[float] = None) -> Tuple[float, Dict[str, List[str]]]:
+        """
+        Earliest upcoming wake-up and the timeframes due at it
+
+        Returns:
+            Tuple of (wake time in epoch seconds, {timeframe: symbols})
+        """
+        now = self.clock() if now is None else now
+        # Closes already inside the grace window still count as upcoming
+        closes = {
+            timeframe: next_bar_close(timeframe, now - self.grace_seconds, self.utc_offset)
+            for timeframe in self.groups
+        }
+        earliest = min(closes.values())
+        due = {timeframe: list(self.groups[timeframe]) for timeframe, close in closes.items() if close == earliest}
+        return earliest + self.grace_seconds, due
+
+    def pop_due(self, now: Optional[float] = None) -> Dict[str, List[str]]:
+        """
+        Timeframes with a bar close (plus grace delay) since the last call
+
+        Returns:
+            {timeframe: symbols} due now, empty if no bar has closed
+        """
+        now = self.clock() if now is None else now
+        since = self.last_check - self.grace_seconds
+        self.last_check = now
+        return {
+            timeframe: list(symbols)
+            for timeframe, symbols in self.groups.items()
+            if next_bar_close(timeframe, since, self.utc_offset) + self.grace_seconds <= now
+        }
+
+    def set_utc_offset(self, utc_offset: float):
+        """Update the broker server time offset (e.g. after a DST change)"""
+        if utc_offset != self.utc_offset:
+            logger.info(f"Broker server time offset: UTC{utc_offset / 3600:+g}h")
+        self.utc_offset = utc_offset
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Seconds until the next bar close (plus grace delay) is due"""
+        now = self.clock() if now is None else now
+        wake_at, _ = self.next_wakeup(now)
+        return max(wake_at - now, 0.0)
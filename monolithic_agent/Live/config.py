@@ -23,6 +23,8 @@ class LiveConfig:
     mt5_server: str = os.getenv('MT5_SERVER', '')
     mt5_path: Optional[str] = os.getenv('MT5_PATH', None)  # Path to terminal64.exe
     mt5_timeout: int = int(os.getenv('MT5_TIMEOUT', '60000'))  # milliseconds
+    symbol_info_ttl_seconds: float = float(os.getenv('SYMBOL_INFO_TTL_SECONDS', '3600'))  # contract specs
+    account_info_ttl_seconds: float = float(os.getenv('ACCOUNT_INFO_TTL_SECONDS', '5'))
     
     # Trading Parameters
     dry_run: bool = os.getenv('DRY_RUN', 'true').lower() == 'true'
@@ -41,6 +43,20 @@ class LiveConfig:
     timeframe: str = os.getenv('TIMEFRAME', '1d')
     strategy_id: str = os.getenv('STRATEGY_ID', 'default_strategy')
     magic_number: int = int(os.getenv('MAGIC_NUMBER', '123456'))
+    max_symbol_workers: int = int(os.getenv('MAX_SYMBOL_WORKERS', '8'))  # concurrent signal generation
+    # Per-symbol timeframe overrides, e.g. 'EURUSD:1h,GBPUSD:15m'
+    symbol_timeframes: Dict[str, str] = field(default_factory=lambda: dict(
+        item.split(':', 1) for item in os.getenv('SYMBOL_TIMEFRAMES', '').split(',') if ':' in item
+    ))
+    
+    # Scheduling: 'interval' evaluates signals every interval_seconds, 'bar_close' only
+    # when a bar closes (risk and connection checks still run every interval_seconds)
+    schedule_mode: str = os.getenv('SCHEDULE_MODE', 'interval')
+    bar_close_grace_seconds: float = float(os.getenv('BAR_CLOSE_GRACE_SECONDS', '2.0'))
+    # Broker server time offset from UTC for bar closes (unset: derived from MT5 ticks)
+    broker_utc_offset_hours: Optional[float] = (
+        float(os.environ['BROKER_UTC_OFFSET_HOURS']) if os.getenv('BROKER_UTC_OFFSET_HOURS') else None
+    )
     
     # Safety Features
     enable_kill_switch: bool = os.getenv('ENABLE_KILL_SWITCH', 'true').lower() == 'true'
@@ -51,6 +67,12 @@ class LiveConfig:
     log_level: str = os.getenv('LOG_LEVEL', 'INFO')
     log_dir: Path = field(default_factory=lambda: Path(os.getenv('LOG_DIR', './logs')))
     audit_db_path: Path = field(default_factory=lambda: Path(os.getenv('AUDIT_DB_PATH', './data/audit.db')))
+    
+    # State persistence
+    state_db_path: Path = field(default_factory=lambda: Path(os.getenv('STATE_DB_PATH', './data/state.db')))
+    signal_dedup_ttl_hours: float = float(os.getenv('SIGNAL_DEDUP_TTL_HOURS', '72'))
+    signal_dedup_max_entries: int = int(os.getenv('SIGNAL_DEDUP_MAX_ENTRIES', '100000'))
+    position_history_limit: int = int(os.getenv('POSITION_HISTORY_LIMIT', '1000'))
     max_log_size_mb: int = int(os.getenv('MAX_LOG_SIZE_MB', '100'))
     log_backup_count: int = int(os.getenv('LOG_BACKUP_COUNT', '10'))
     
@@ -71,6 +93,7 @@ class LiveConfig:
         # Create directories if they don't exist
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.audit_db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_db_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Validate MT5 credentials
         if not self.dry_run:
@@ -89,6 +112,16 @@ class LiveConfig:
         
         # Strip whitespace from symbols
         self.symbols = [s.strip() for s in self.symbols]
+        self.symbol_timeframes = {
+            symbol.strip(): timeframe.strip() for symbol, timeframe in self.symbol_timeframes.items()
+        }
+        
+        if self.schedule_mode not in ('bar_close', 'interval'):
+            raise ValueError(f"Invalid schedule mode: {self.schedule_mode}")
+    
+    def get_timeframe(self, symbol: str) -> str:
+        """Timeframe for a symbol (override or the default timeframe)"""
+        return self.symbol_timeframes.get(symbol, self.timeframe)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary (excluding sensitive data)"""
@@ -98,7 +131,7 @@ class LiveConfig:
                 config_dict[key] = '***REDACTED***'
             elif isinstance(value, Path):
                 config_dict[key] = str(value)
-            elif isinstance(value, list):
+            elif isinstance(value, (list, dict)):
                 config_dict[key] = value.copy()
             else:
                 config_dict[key] = value
@@ -4,9 +4,10 @@ Live Trader - Main trading loop and orchestration
 import signal
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any
 import logging
 
 from config import LiveConfig, setup_logging, MT5Constants
@@ -15,6 +16,7 @@ from order_executor import OrderExecutor
 from state_manager import StateManager
 from audit_logger import AuditLogger
 from backtesting_bridge import BacktestingBridge, get_strategy_from_file
+from bar_scheduler import BarCloseScheduler
 
 logger = logging.getLogger('LiveTrader')
 
@@ -50,6 +52,24 @@ class LiveTrader:
         strategy_class = get_strategy_from_file(strategy_path)
         self.bridge = BacktestingBridge(strategy_class)
         
+        # Signal generation fans out across symbols; everything that talks to
+        # MT5 (symbol info, orders) goes through a single worker thread since
+        # the MT5 API is not thread-safe
+        self.signal_executor = ThreadPoolExecutor(
+            max_workers=max(1, min(config.max_symbol_workers, len(config.symbols))),
+            thread_name_prefix='signals'
+        )
+        self.mt5_queue = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5')
+        
+        # Evaluate signals only on bar closes (None in interval mode)
+        self.scheduler = None
+        if config.schedule_mode == 'bar_close':
+            self.scheduler = BarCloseScheduler(
+                {symbol: config.get_timeframe(symbol) for symbol in config.symbols},
+                grace_seconds=config.bar_close_grace_seconds,
+                utc_offset=(config.broker_utc_offset_hours or 0.0) * 3600
+            )
+        
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -71,6 +91,7 @@ class LiveTrader:
             
             # Sync state with MT5
             self._sync_state()
+            self._update_server_offset()
             
             # Log startup event
             self.audit.log_event(
@@ -85,6 +106,8 @@ class LiveTrader:
             logger.info(f"   Mode: {'DRY RUN' if self.config.dry_run else 'LIVE'}")
             logger.info(f"   Symbols: {', '.join(self.config.symbols)}")
             logger.info(f"   Interval: {self.config.interval_seconds}s")
+            if self.scheduler:
+                logger.info(f"   Signals: on bar close (+{self.config.bar_close_grace_seconds}s grace)")
             logger.info(f"   Strategy: {self.bridge.strategy_class.__name__}")
             
             # Main trading loop
@@ -109,6 +132,10 @@ class LiveTrader:
         iteration = 0
         last_snapshot_time = datetime.now()
         
+        # Everything is evaluated on startup; afterwards every symbol each
+        # interval, or in bar_close mode only the timeframes whose bar closed
+        due = self._symbols_by_timeframe()
+        
         while self.running and not self.shutdown_requested:
             iteration += 1
             loop_start = datetime.now()
@@ -142,26 +169,26 @@ class LiveTrader:
                 # Sync state periodically
                 self._sync_state()
                 
-                # Process each symbol
-                for symbol in self.config.symbols:
-                    try:
-                        self._process_symbol(symbol)
-                    except Exception as e:
-                        logger.error(f"Error processing {symbol}: {e}", exc_info=True)
-                        self.audit.log_event(
-                            event_type='PROCESSING_ERROR',
-                            severity='ERROR',
-                            message=f"Error processing {symbol}: {str(e)}"
-                        )
+                # Process due symbols concurrently
+                if self.scheduler:
+                    due = {**self.scheduler.pop_due(), **due}
+                for timeframe, symbols in due.items():
+                    self._process_symbols(symbols, timeframe)
+                if self.scheduler:
+                    due = {}
                 
                 # Take account snapshot periodically (every 5 minutes)
                 if (datetime.now() - last_snapshot_time).seconds >= 300:
                     self._take_account_snapshot()
+                    self._update_server_offset()
                     last_snapshot_time = datetime.now()
                 
-                # Calculate sleep time
                 loop_duration = (datetime.now() - loop_start).total_seconds()
+                
+                # Calculate sleep time, waking early for a bar close
                 sleep_time = max(0, self.config.interval_seconds - loop_duration)
+                if self.scheduler:
+                    sleep_time = min(sleep_time, self.scheduler.seconds_until_next())
                 
                 logger.info(f"Loop completed in {loop_duration:.2f}s, sleeping {sleep_time:.2f}s")
                 
@@ -177,6 +204,82 @@ class LiveTrader:
                 )
                 time.sleep(self.config.interval_seconds)
     
+    def _symbols_by_timeframe(self) -> Dict[str, list]:
+        """Configured symbols grouped by timeframe"""
+        groups: Dict[str, list] = {}
+        for symbol in self.config.symbols:
+            groups.setdefault(self.config.get_timeframe(symbol), []).append(symbol)
+        return groups
+    
+    def _process_symbols(self, symbols: list, timeframe: Optional[str] = None):
+        """
+        Process a batch of symbols concurrently
+        
+        Signal generation runs on the signal executor for all symbols at
+        once. As each finishes, its signal handling (symbol info, dedup,
+        order submission) is queued on the single MT5 worker, so orders go
+        out in completion order without ever calling MT5 concurrently.
+        Per-symbol timings are logged, slowest first.
+        
+        Args:
+            symbols: Trading symbols
+            timeframe: Timeframe to evaluate (default: per-symbol config)
+        """
+        batch_start = time.perf_counter()
+        timings: Dict[str, Dict[str, float]] = {}
+        generation = {
+            self.signal_executor.submit(self._timed, self._generate_symbol_signal, symbol, timeframe): symbol
+            for symbol in symbols
+        }
+        handling = {}
+        
+        for future in as_completed(generation):
+            symbol = generation[future]
+            try:
+                latest_signal, _, elapsed = future.result()
+                timings[symbol] = {'signal': elapsed, 'queued_at': time.perf_counter()}
+            except Exception as e:
+                self._log_processing_error(symbol, e)
+                continue
+            if latest_signal is not None:
+                handling[self.mt5_queue.submit(
+                    self._timed, self._handle_symbol_signal, symbol, latest_signal
+                )] = symbol
+        
+        for future in as_completed(handling):
+            symbol = handling[future]
+            try:
+                _, started, elapsed = future.result()
+                timing = timings[symbol]
+                timing['order'] = elapsed
+                timing['queue_wait'] = started - timing['queued_at']
+            except Exception as e:
+                self._log_processing_error(symbol, e)
+        
+        total = time.perf_counter() - batch_start
+        for symbol, timing in sorted(timings.items(), key=lambda item: -item[1]['signal'] - item[1].get('order', 0)):
+            logger.info(
+                f"   {symbol}: signal {timing['signal']:.2f}s"
+                + (f", queue {timing['queue_wait']:.2f}s, order {timing['order']:.2f}s" if 'order' in timing else '')
+            )
+        logger.info(f"Processed {len(symbols)} symbols in {total:.2f}s")
+    
+    @staticmethod
+    def _timed(func, *args):
+        """Call func, returning (result, start time, elapsed seconds)"""
+        start = time.perf_counter()
+        result = func(*args)
+        return result, start, time.perf_counter() - start
+    
+    def _log_processing_error(self, symbol: str, error: Exception):
+        """Log and audit a per-symbol processing failure"""
+        logger.error(f"Error processing {symbol}: {error}", exc_info=error)
+        self.audit.log_event(
+            event_type='PROCESSING_ERROR',
+            severity='ERROR',
+            message=f"Error processing {symbol}: {str(error)}"
+        )
+    
     def _process_symbol(self, symbol: str):
         """
         Process trading signals for a symbol
@@ -184,13 +287,23 @@ class LiveTrader:
         Args:
             symbol: Trading symbol
         """
-        logger.info(f"Processing {symbol}...")
+        latest_signal = self._generate_symbol_signal(symbol)
+        if latest_signal is not None:
+            self._handle_symbol_signal(symbol, latest_signal)
+    
+    def _generate_symbol_signal(self, symbol: str, timeframe: Optional[str] = None):
+        """
+        Generate the latest signal for a symbol (no MT5 calls, safe to run
+        concurrently)
         
-        # Get symbol info
-        symbol_info = self.connector.get_symbol_info(symbol)
-        if not symbol_info:
-            logger.warning(f"Could not get symbol info for {symbol}")
-            return
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe to evaluate (default: per-symbol config)
+        
+        Returns:
+            Latest signal row, or None if there is nothing new
+        """
+        logger.info(f"Processing {symbol}...")
         
         # Generate signals
         end_time = datetime.now()
@@ -201,15 +314,36 @@ class LiveTrader:
                 symbol=symbol,
                 from_ts=start_time,
                 to_ts=end_time,
-                timeframe=self.config.timeframe
+                timeframe=timeframe or self.config.get_timeframe(symbol),
+                incremental=True
             )
-            
-            if signals.empty:
-                logger.info(f"No signals generated for {symbol}")
-                return
-            
-            # Get the latest signal
-            latest_signal = signals.iloc[-1]
+        except Exception as e:
+            logger.error(f"Signal generation failed for {symbol}: {e}", exc_info=True)
+            return None
+        
+        if signals.empty:
+            logger.info(f"No new bars for {symbol}")
+            return None
+        
+        # Get the latest signal
+        return signals.iloc[-1]
+    
+    def _handle_symbol_signal(self, symbol: str, latest_signal):
+        """
+        Record and act on a symbol's latest signal (calls MT5, run on the
+        MT5 queue)
+        
+        Args:
+            symbol: Trading symbol
+            latest_signal: Latest signal row
+        """
+        # Get symbol info
+        symbol_info = self.connector.get_symbol_info(symbol)
+        if not symbol_info:
+            logger.warning(f"Could not get symbol info for {symbol}")
+            return
+        
+        try:
             signal_id = f"{symbol}_{latest_signal.name.strftime('%Y%m%d%H%M%S')}"
             
             # Check if signal already processed
@@ -238,7 +372,7 @@ class LiveTrader:
                 logger.info(f"HOLD signal for {symbol}")
         
         except Exception as e:
-            logger.error(f"Signal generation failed for {symbol}: {e}", exc_info=True)
+            logger.error(f"Signal handling failed for {symbol}: {e}", exc_info=True)
     
     def _execute_signal(self, signal_id: str, symbol: str, signal, symbol_info: dict):
         """
@@ -422,10 +556,20 @@ class LiveTrader:
             logger.error(f"✗ Failed to close position: {result.get('message')}")
     
     def _sync_state(self):
-        """Synchronize internal state with MT5"""
-        positions = self.connector.get_positions()
-        self.state.sync_with_mt5(positions)
-        logger.debug(f"State synced: {len(positions)} positions")
+        """Synchronize internal state with MT5 (only changed tickets are applied)"""
+        changes = self.connector.get_position_changes()
+        if changes is None:
+            return
+        changed = self.state.apply_position_changes(changes)
+        logger.debug(f"State synced: {len(changes['tickets'])} positions, {changed} changed")
+    
+    def _update_server_offset(self):
+        """Align bar closes to broker server time (re-checked for DST changes)"""
+        if not self.scheduler or self.config.broker_utc_offset_hours is not None:
+            return
+        offset = self.connector.get_server_utc_offset(self.config.symbols[0])
+        if offset is not None:
+            self.scheduler.set_utc_offset(offset)
     
     def _take_account_snapshot(self):
         """Take and log account snapshot"""
@@ -490,9 +634,17 @@ class LiveTrader:
         logger.info(f"Daily P/L: ${state_summary['daily_pnl']:.2f}")
         logger.info("="*50)
         
+        # Stop worker pools before closing the MT5 connection
+        self.signal_executor.shutdown(wait=True, cancel_futures=True)
+        self.mt5_queue.shutdown(wait=True, cancel_futures=True)
+        
         # Close MT5 connection
         self.connector.shutdown()
         
+        # Commit any queued audit records
+        self.audit.close()
+        self.state.processed_signals.close()
+        
         logger.info("✓ Shutdown complete")
 
 
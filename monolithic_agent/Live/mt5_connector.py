@@ -2,8 +2,11 @@
 MetaTrader5 Connection Manager
 Handles MT5 initialization, login, reconnection, and graceful shutdown
 """
-import MetaTrader5 as mt5
-from typing import Optional, Dict, Any, List
+try:
+    import MetaTrader5 as mt5
+except ImportError:  # MetaTrader5 is only published for Windows
+    mt5 = None
+from typing import Optional, Dict, Any, List, Callable
 from datetime import datetime
 import logging
 import time
@@ -13,31 +16,85 @@ from config import LiveConfig, MT5Constants
 
 logger = logging.getLogger('LiveTrader.MT5Connector')
 
+# Contract-spec fields of symbol_info; quotes are fetched separately and never cached
+SYMBOL_SPEC_FIELDS = (
+    'name', 'volume_min', 'volume_max', 'volume_step', 'trade_contract_size',
+    'trade_tick_size', 'trade_tick_value', 'point', 'digits', 'trade_mode',
+    'currency_base', 'currency_profit', 'currency_margin'
+)
+
+# Position fields compared when diffing snapshots
+POSITION_DIFF_FIELDS = ('volume', 'price_open', 'sl', 'tp')
+
+# Mark-to-market fields, which move on every tick and are refreshed
+# without being reported as changes
+POSITION_MARK_FIELDS = ('price_current', 'profit', 'swap')
+
+# Largest distance from a half-hour boundary accepted when deriving the
+# server time offset from a tick
+SERVER_OFFSET_TOLERANCE_SECONDS = 120
+
 
 class MT5ConnectionError(Exception):
     """Raised when MT5 connection fails"""
     pass
 
 
+class TTLCache:
+    """Small key -> value cache with per-entry expiry"""
+    
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: Dict[Any, tuple] = {}  # key -> (expires_at, value)
+    
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            return default
+        return entry[1]
+    
+    def set(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl_seconds, value)
+    
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
 class MT5Connector:
     """
     Manages MetaTrader5 connection lifecycle
     """
     
-    def __init__(self, config: LiveConfig):
+    def __init__(self, config: LiveConfig, mt5_module=None, clock: Callable[[], float] = time.monotonic):
         """
         Initialize MT5 connector
         
         Args:
             config: Live trading configuration
+            mt5_module: MetaTrader5 API module (default: the installed
+                       MetaTrader5 package; tests pass a fake)
+            clock: Time source for the caches
         """
         self.config = config
+        self.mt5 = mt5_module if mt5_module is not None else mt5
         self.is_connected = False
         self.account_info = None
         self.terminal_info = None
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 5
         
+        # Contract specs rarely change; account info is refreshed often but
+        # shared between the health check and callers
+        self._symbol_specs = TTLCache(getattr(config, 'symbol_info_ttl_seconds', 3600), clock)
+        self._account_cache = TTLCache(getattr(config, 'account_info_ttl_seconds', 5), clock)
+        
+        # Last positions snapshot (ticket -> position dict) for diffing
+        self._position_snapshot: Dict[int, Dict[str, Any]] = {}
+        
         logger.info("MT5Connector initialized")
     
     def initialize(self) -> bool:
@@ -49,6 +106,10 @@ class MT5Connector:
         """
         logger.info("Initializing MT5 connection...")
         
+        if self.mt5 is None:
+            logger.error("MetaTrader5 package is not installed (it is only available on Windows)")
+            return False
+        
         try:
             # Initialize MT5 with optional terminal path
             if self.config.mt5_path:
@@ -57,27 +118,28 @@ class MT5Connector:
                     logger.error(f"MT5 terminal not found at: {terminal_path}")
                     return False
                 
-                if not mt5.initialize(str(terminal_path), timeout=self.config.mt5_timeout):
-                    logger.error(f"MT5 initialize failed: {mt5.last_error()}")
+                if not self.mt5.initialize(str(terminal_path), timeout=self.config.mt5_timeout):
+                    logger.error(f"MT5 initialize failed: {self.mt5.last_error()}")
                     return False
             else:
                 # Auto-detect terminal
-                if not mt5.initialize(timeout=self.config.mt5_timeout):
-                    logger.error(f"MT5 initialize failed: {mt5.last_error()}")
+                if not self.mt5.initialize(timeout=self.config.mt5_timeout):
+                    logger.error(f"MT5 initialize failed: {self.mt5.last_error()}")
                     return False
             
             # Login to account
             if not self._login():
-                mt5.shutdown()
+                self.mt5.shutdown()
                 return False
             
             # Get terminal and account info
-            self.terminal_info = mt5.terminal_info()
-            self.account_info = mt5.account_info()
+            self.terminal_info = self.mt5.terminal_info()
+            self.account_info = self.mt5.account_info()
+            self._account_cache.set('account', self.account_info)
             
             if not self.terminal_info or not self.account_info:
                 logger.error("Failed to retrieve terminal/account info")
-                mt5.shutdown()
+                self.mt5.shutdown()
                 return False
             
             self.is_connected = True
@@ -114,14 +176,14 @@ class MT5Connector:
         
         logger.info(f"Logging in to account {self.config.mt5_login}...")
         
-        authorized = mt5.login(
+        authorized = self.mt5.login(
             login=self.config.mt5_login,
             password=self.config.mt5_password,
             server=self.config.mt5_server
         )
         
         if not authorized:
-            error = mt5.last_error()
+            error = self.mt5.last_error()
             logger.error(f"MT5 login failed: {error}")
             return False
         
@@ -132,7 +194,7 @@ class MT5Connector:
         """Gracefully shutdown MT5 connection"""
         if self.is_connected:
             logger.info("Shutting down MT5 connection...")
-            mt5.shutdown()
+            self.mt5.shutdown()
             self.is_connected = False
             logger.info("✓ MT5 connection closed")
     
@@ -157,11 +219,12 @@ class MT5Connector:
         
         # Shutdown existing connection
         try:
-            mt5.shutdown()
+            self.mt5.shutdown()
         except:
             pass
         
         self.is_connected = False
+        self.invalidate_caches()
         
         # Attempt re-initialization
         return self.initialize()
@@ -177,14 +240,17 @@ class MT5Connector:
             return False
         
         try:
-            # Try to get account info as a health check
-            account = mt5.account_info()
+            # Try to get account info as a health check; the result is
+            # cached for get_account_info
+            account = self.mt5.account_info()
             if account is None:
                 logger.warning("Connection check failed: account_info returned None")
                 self.is_connected = False
+                self._account_cache.invalidate()
                 return False
             
             self.account_info = account
+            self._account_cache.set('account', account)
             return True
         
         except Exception as e:
@@ -216,9 +282,13 @@ class MT5Connector:
             return None
         
         try:
-            info = mt5.account_info()
+            info = self._account_cache.get('account')
             if info is None:
-                return None
+                info = self.mt5.account_info()
+                if info is None:
+                    return None
+                self.account_info = info
+                self._account_cache.set('account', info)
             
             return {
                 'login': info.login,
@@ -253,41 +323,76 @@ class MT5Connector:
             return None
         
         try:
-            # Ensure symbol is visible in MarketWatch
-            if not mt5.symbol_select(symbol, True):
-                logger.warning(f"Failed to select symbol: {symbol}")
-                return None
-            
-            info = mt5.symbol_info(symbol)
-            if info is None:
-                logger.warning(f"Symbol info not available: {symbol}")
-                return None
+            spec = self._symbol_specs.get(symbol)
+            if spec is None:
+                # Ensure symbol is visible in MarketWatch
+                if not self.mt5.symbol_select(symbol, True):
+                    logger.warning(f"Failed to select symbol: {symbol}")
+                    return None
+                
+                info = self.mt5.symbol_info(symbol)
+                if info is None:
+                    logger.warning(f"Symbol info not available: {symbol}")
+                    return None
+                
+                spec = {field: getattr(info, field) for field in SYMBOL_SPEC_FIELDS}
+                self._symbol_specs.set(symbol, spec)
+                quote = info
+            else:
+                # Specs are cached; only the quote is fetched
+                quote = self.mt5.symbol_info_tick(symbol)
+                if quote is None:
+                    logger.warning(f"Tick not available: {symbol}")
+                    self._symbol_specs.invalidate(symbol)
+                    return None
             
             return {
-                'name': info.name,
-                'bid': info.bid,
-                'ask': info.ask,
-                'last': info.last,
-                'volume': info.volume_min,
-                'volume_min': info.volume_min,
-                'volume_max': info.volume_max,
-                'volume_step': info.volume_step,
-                'trade_contract_size': info.trade_contract_size,
-                'trade_tick_size': info.trade_tick_size,
-                'trade_tick_value': info.trade_tick_value,
-                'point': info.point,
-                'digits': info.digits,
-                'spread': info.spread,
-                'trade_mode': info.trade_mode,
-                'currency_base': info.currency_base,
-                'currency_profit': info.currency_profit,
-                'currency_margin': info.currency_margin
+                **spec,
+                'bid': quote.bid,
+                'ask': quote.ask,
+                'last': quote.last,
+                'volume': spec['volume_min'],
+                'spread': round((quote.ask - quote.bid) / spec['point']) if spec['point'] else 0,
             }
         
         except Exception as e:
             logger.error(f"Failed to get symbol info for {symbol}: {e}")
             return None
     
+    def get_server_utc_offset(self, symbol: str, now: Optional[float] = None) -> Optional[float]:
+        """
+        Broker server time offset from UTC, from the symbol's last tick
+        
+        MT5 reports tick times in server time, so the difference from the
+        current UTC time is the offset (rounded to half hours). A stale tick
+        (market closed) rarely lands near a half-hour boundary and is
+        rejected.
+        
+        Args:
+            symbol: Trading symbol with a recent tick
+            now: Current UTC time (epoch seconds, default: time.time())
+        
+        Returns:
+            Offset in seconds, or None if it cannot be determined
+        """
+        if not self.ensure_connected():
+            return None
+        
+        try:
+            tick = self.mt5.symbol_info_tick(symbol)
+        except Exception as e:
+            logger.error(f"Failed to get tick for {symbol}: {e}")
+            return None
+        if tick is None or not getattr(tick, 'time', 0):
+            return None
+        
+        difference = tick.time - (time.time() if now is None else now)
+        offset = round(difference / 1800) * 1800
+        if abs(difference - offset) > SERVER_OFFSET_TOLERANCE_SECONDS or abs(offset) > 14 * 3600:
+            logger.warning(f"Cannot derive server time offset from {symbol} tick (stale or skewed)")
+            return None
+        return float(offset)
+    
     def get_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get open positions
@@ -303,36 +408,78 @@ class MT5Connector:
         
         try:
             if symbol:
-                positions = mt5.positions_get(symbol=symbol)
+                positions = self.mt5.positions_get(symbol=symbol)
             else:
-                positions = mt5.positions_get()
+                positions = self.mt5.positions_get()
             
             if positions is None:
                 return []
             
-            return [
-                {
-                    'ticket': pos.ticket,
-                    'time': datetime.fromtimestamp(pos.time),
-                    'symbol': pos.symbol,
-                    'type': 'BUY' if pos.type == 0 else 'SELL',
-                    'volume': pos.volume,
-                    'price_open': pos.price_open,
-                    'price_current': pos.price_current,
-                    'sl': pos.sl,
-                    'tp': pos.tp,
-                    'profit': pos.profit,
-                    'swap': pos.swap,
-                    'magic': pos.magic,
-                    'comment': pos.comment
-                }
-                for pos in positions
-            ]
+            return [self._position_to_dict(pos) for pos in positions]
         
         except Exception as e:
             logger.error(f"Failed to get positions: {e}")
             return []
     
+    @staticmethod
+    def _position_to_dict(pos) -> Dict[str, Any]:
+        """Convert an MT5 position record to a dict"""
+        return {
+            'ticket': pos.ticket,
+            'time': datetime.fromtimestamp(pos.time),
+            'symbol': pos.symbol,
+            'type': 'BUY' if pos.type == 0 else 'SELL',
+            'volume': pos.volume,
+            'price_open': pos.price_open,
+            'price_current': pos.price_current,
+            'sl': pos.sl,
+            'tp': pos.tp,
+            'profit': pos.profit,
+            'swap': pos.swap,
+            'magic': pos.magic,
+            'comment': pos.comment
+        }
+    
+    def get_position_changes(self) -> Optional[Dict[str, Any]]:
+        """
+        Diff open positions against the previous call
+        
+        Positions are fetched in one positions_get call and compared by
+        ticket, so callers only need to touch what changed. Only structural
+        fields (POSITION_DIFF_FIELDS) make a position 'updated'; price and
+        profit moves are returned separately in 'marks'.
+        
+        Returns:
+            Dict with 'opened', 'updated' (position dicts), 'closed',
+            'tickets' (all open tickets) and 'marks' (ticket ->
+            POSITION_MARK_FIELDS values), or None if positions could not be
+            fetched (the snapshot is kept, so nothing is reported as closed)
+        """
+        if not self.ensure_connected():
+            return None
+        
+        try:
+            positions = self.mt5.positions_get()
+        except Exception as e:
+            logger.error(f"Failed to get positions: {e}")
+            return None
+        if positions is None:
+            return None
+        
+        current = {pos.ticket: self._position_to_dict(pos) for pos in positions}
+        previous = self._position_snapshot
+        
+        opened = [pos for ticket, pos in current.items() if ticket not in previous]
+        updated = [
+            pos for ticket, pos in current.items()
+            if ticket in previous and any(pos[f] != previous[ticket][f] for f in POSITION_DIFF_FIELDS)
+        ]
+        closed = [ticket for ticket in previous if ticket not in current]
+        marks = {ticket: {f: pos[f] for f in POSITION_MARK_FIELDS} for ticket, pos in current.items()}
+        
+        self._position_snapshot = current
+        return {'opened': opened, 'updated': updated, 'closed': closed, 'tickets': list(current), 'marks': marks}
+    
     def get_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get pending orders
@@ -348,9 +495,9 @@ class MT5Connector:
         
         try:
             if symbol:
-                orders = mt5.orders_get(symbol=symbol)
+                orders = self.mt5.orders_get(symbol=symbol)
             else:
-                orders = mt5.orders_get()
+                orders = self.mt5.orders_get()
             
             if orders is None:
                 return []
@@ -389,10 +536,10 @@ class MT5Connector:
             return None
         
         try:
-            result = mt5.order_check(request)
+            result = self.mt5.order_check(request)
             
             if result is None:
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 logger.error(f"order_check failed: {error}")
                 return None
             
@@ -442,10 +589,13 @@ class MT5Connector:
             logger.info(f"Sending order: {request['action']} {request['volume']} "
                        f"{request['symbol']} @ {request.get('price', 'market')}")
             
-            result = mt5.order_send(request)
+            result = self.mt5.order_send(request)
+            
+            # Balance/margin change once an order goes through
+            self._account_cache.invalidate()
             
             if result is None:
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 logger.error(f"order_send failed: {error}")
                 return None
             
@@ -478,7 +628,12 @@ class MT5Connector:
     
     def get_last_error(self) -> tuple:
         """Get last MT5 error"""
-        return mt5.last_error()
+        return self.mt5.last_error()
+    
+    def invalidate_caches(self):
+        """Drop cached symbol specs and account info"""
+        self._symbol_specs.invalidate()
+        self._account_cache.invalidate()
     
     def __enter__(self):
         """Context manager entry"""
@@ -3,12 +3,120 @@ State Manager - Track positions, orders, and trading state
 """
 from typing import Dict, Any, List, Optional
 from datetime import datetime, date
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
+from pathlib import Path
+import sqlite3
+import threading
+import time
 import logging
 
 logger = logging.getLogger('LiveTrader.StateManager')
 
 
+class SignalDedupStore:
+    """
+    Time-windowed set of processed signal IDs, persisted to SQLite
+    
+    Lookups hit an in-memory insertion-ordered dict (O(1)); entries older
+    than the TTL, or beyond max_entries, are evicted from the front. Every
+    mark is written through to a small SQLite table so dedup state survives
+    restarts; expired rows are pruned periodically.
+    """
+    
+    PRUNE_EVERY = 1000  # marks between expired-row deletes
+    
+    def __init__(self, db_path: Optional[Path], ttl_seconds: float = 72 * 3600, max_entries: int = 100000):
+        """
+        Initialize dedup store
+        
+        Args:
+            db_path: SQLite file for persistence (None = memory only)
+            ttl_seconds: How long a signal ID is remembered
+            max_entries: Most signal IDs kept in memory
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()  # signal_id -> processed_at
+        self._lock = threading.Lock()
+        self._marks_since_prune = 0
+        self._conn = None
+        
+        if db_path is not None:
+            db_path = Path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS processed_signals (
+                    signal_id TEXT PRIMARY KEY,
+                    processed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_processed_signals_time ON processed_signals(processed_at)"
+            )
+            self._conn.commit()
+            self._load()
+    
+    def _load(self):
+        """Restore unexpired signal IDs from disk"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._conn:
+            self._conn.execute("DELETE FROM processed_signals WHERE processed_at < ?", (cutoff,))
+        rows = self._conn.execute(
+            "SELECT signal_id, processed_at FROM processed_signals ORDER BY processed_at DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        for signal_id, processed_at in reversed(rows):
+            self._entries[signal_id] = processed_at
+        logger.info(f"Restored {len(self._entries)} processed signal IDs")
+    
+    def _evict(self, now: float):
+        """Drop expired and overflow entries from the front"""
+        cutoff = now - self.ttl_seconds
+        while self._entries:
+            signal_id, processed_at = next(iter(self._entries.items()))
+            if processed_at >= cutoff and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+    
+    def __contains__(self, signal_id: str) -> bool:
+        with self._lock:
+            processed_at = self._entries.get(signal_id)
+            return processed_at is not None and processed_at >= time.time() - self.ttl_seconds
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def add(self, signal_id: str):
+        """Remember a signal ID (written through to disk)"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(signal_id, None)
+            self._entries[signal_id] = now
+            self._evict(now)
+            
+            if self._conn is None:
+                return
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO processed_signals (signal_id, processed_at) VALUES (?, ?)",
+                    (signal_id, now)
+                )
+                self._marks_since_prune += 1
+                if self._marks_since_prune >= self.PRUNE_EVERY:
+                    self._conn.execute(
+                        "DELETE FROM processed_signals WHERE processed_at < ?", (now - self.ttl_seconds,)
+                    )
+                    self._marks_since_prune = 0
+    
+    def close(self):
+        """Close the backing database"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
 class StateManager:
     """
     Manages live trading state including positions, daily limits, and synchronization
@@ -25,7 +133,7 @@ class StateManager:
         
         # Position tracking
         self.positions = {}  # symbol -> position dict
-        self.position_history = []  # List of all position changes
+        self.position_history = deque(maxlen=getattr(config, 'position_history_limit', 1000))  # Recent position changes
         
         # Daily limits tracking
         self.daily_trades = defaultdict(int)  # date -> trade count
@@ -33,7 +141,11 @@ class StateManager:
         
         # Signal tracking
         self.last_signal_time = {}  # symbol -> timestamp
-        self.processed_signals = set()  # Set of processed signal IDs
+        self.processed_signals = SignalDedupStore(  # Processed signal IDs (bounded, persisted)
+            getattr(config, 'state_db_path', None),
+            ttl_seconds=getattr(config, 'signal_dedup_ttl_hours', 72) * 3600,
+            max_entries=getattr(config, 'signal_dedup_max_entries', 100000)
+        )
         
         # Trading state
         self.is_trading_enabled = True
@@ -41,6 +153,23 @@ class StateManager:
         
         logger.info("StateManager initialized")
     
+    @staticmethod
+    def _position_from_mt5(pos: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a tracked position from an MT5 position dict"""
+        return {
+            'ticket': pos['ticket'],
+            'symbol': pos['symbol'],
+            'type': pos['type'],
+            'volume': pos['volume'],
+            'price_open': pos['price_open'],
+            'price_current': pos['price_current'],
+            'sl': pos['sl'],
+            'tp': pos['tp'],
+            'profit': pos['profit'],
+            'open_time': pos['time'],
+            'magic': pos['magic']
+        }
+    
     def sync_with_mt5(self, mt5_positions: List[Dict[str, Any]]):
         """
         Synchronize internal state with MT5 positions
@@ -55,23 +184,50 @@ class StateManager:
         
         # Rebuild from MT5
         for pos in mt5_positions:
-            symbol = pos['symbol']
-            self.positions[symbol] = {
-                'ticket': pos['ticket'],
-                'symbol': symbol,
-                'type': pos['type'],
-                'volume': pos['volume'],
-                'price_open': pos['price_open'],
-                'price_current': pos['price_current'],
-                'sl': pos['sl'],
-                'tp': pos['tp'],
-                'profit': pos['profit'],
-                'open_time': pos['time'],
-                'magic': pos['magic']
-            }
+            self.positions[pos['symbol']] = self._position_from_mt5(pos)
         
         logger.info(f"✓ Synced {len(self.positions)} positions")
     
+    def apply_position_changes(self, changes: Dict[str, Any]) -> int:
+        """
+        Apply a position diff from MT5Connector.get_position_changes
+        
+        Only opened, updated and closed tickets are touched; positions MT5
+        no longer reports are dropped, as with a full sync. Mark-to-market
+        values ('marks') are refreshed quietly and not counted as changes.
+        
+        Args:
+            changes: Dict with 'opened', 'updated', 'closed', 'tickets' and
+                     optionally 'marks'
+        
+        Returns:
+            Number of positions added, updated or removed
+        """
+        closed = set(changes['closed'])
+        live_tickets = set(changes['tickets'])
+        stale = [
+            symbol for symbol, pos in self.positions.items()
+            if pos.get('ticket') in closed or pos.get('ticket') not in live_tickets
+        ]
+        for symbol in stale:
+            del self.positions[symbol]
+        
+        for pos in changes['opened'] + changes['updated']:
+            self.positions[pos['symbol']] = self._position_from_mt5(pos)
+        
+        marks = changes.get('marks', {})
+        for pos in self.positions.values():
+            mark = marks.get(pos.get('ticket'))
+            if mark:
+                pos['price_current'] = mark['price_current']
+                pos['profit'] = mark['profit']
+        
+        changed = len(stale) + len(changes['opened']) + len(changes['updated'])
+        if changed:
+            logger.info(f"✓ Position sync: {len(changes['opened'])} opened, "
+                       f"{len(changes['updated'])} updated, {len(stale)} removed")
+        return changed
+    
     def has_position(self, symbol: str) -> bool:
         """Check if we have an open position for symbol"""
         return symbol in self.positions
@@ -24,7 +24,8 @@ import json
 import re
 import logging
 from typing import Dict, List, Optional
-import google.generativeai as genai
+
+from .gemini_handles import gemini_model
 
 logger = logging.getLogger(__name__)
 
@@ -63,8 +64,7 @@ class ChatIntentClassifier:
                 logger.warning("GEMINI_API_KEY not found, falling back to rule-based classification")
                 self.use_gemini = False
             else:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+                self.model = gemini_model(api_key, 'gemini-2.0-flash-exp')
                 logger.info("Initialized ChatIntentClassifier with Gemini")
         
         if not self.use_gemini:
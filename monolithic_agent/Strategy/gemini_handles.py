@@ -0,0 +1,90 @@
+"""
+Shared Gemini Model Handles
+===========================
+
+Reusable, thread-safe GenerativeModel handles keyed by
+(API key, model, generation config).
+
+genai.configure() sets one process-global API key, so modules that each
+configure their own key race each other under concurrent requests. Handles
+from this module carry their own GenerativeServiceClient instead, and are
+built once so the client setup and its connection are reused.
+
+Usage:
+    from .gemini_handles import gemini_model
+    model = gemini_model(api_key, 'gemini-2.5-flash')
+    response = model.generate_content(prompt)
+"""
+
+import json
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+_lock = threading.Lock()
+_clients: Dict[str, Any] = {}
+_models: Dict[tuple, Any] = {}
+
+
+def _fingerprint(api_key: str) -> str:
+    """Identify a key without keeping the secret in the pool keys."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def gemini_model(
+    api_key: str,
+    model_name: str,
+    generation_config: Optional[Dict[str, Any]] = None,
+    safety_settings: Optional[Any] = None
+):
+    """
+    Get the shared GenerativeModel for this key, model and config.
+
+    Args:
+        api_key: Gemini API key the handle is bound to
+        model_name: Gemini model name
+        generation_config: Optional generation config
+        safety_settings: Optional safety settings
+
+    Returns:
+        google.generativeai.GenerativeModel
+
+    Raises:
+        ImportError: If google-generativeai is not installed
+    """
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
+
+    fingerprint = _fingerprint(api_key)
+    handle_key = (
+        fingerprint,
+        model_name,
+        json.dumps(generation_config, sort_keys=True, default=str),
+        json.dumps(safety_settings, sort_keys=True, default=str),
+    )
+
+    with _lock:
+        model = _models.get(handle_key)
+        if model is not None:
+            return model
+
+        client = _clients.get(fingerprint)
+        if client is None:
+            client = glm.GenerativeServiceClient(client_options={'api_key': api_key})
+            _clients[fingerprint] = client
+
+        model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config,
+            safety_settings=safety_settings
+        )
+        model._client = client
+        _models[handle_key] = model
+        return model
+
+
+def clear_handles():
+    """Drop all pooled handles (for testing or key rotation)."""
+    with _lock:
+        _clients.clear()
+        _models.clear()
@@ -63,9 +63,9 @@ class GeminiStrategyIntegrator:
         if self.api_key and self.api_key != 'your_gemini_api_key_here':
             try:
                 import google.generativeai as genai
-                genai.configure(api_key=self.api_key)
+                from .gemini_handles import gemini_model
                 # Use gemini-2.5-flash for fast, efficient responses
-                self.model = genai.GenerativeModel('gemini-2.5-flash')
+                self.model = gemini_model(self.api_key, 'gemini-2.5-flash')
                 self.client = genai
                 self.allow_custom_formatting = True  # AI can provide formatted_response
                 print("✓ Gemini API initialized successfully (custom formatting enabled)")
@@ -26,7 +26,8 @@ import re
 import copy
 import logging
 from typing import Dict, List, Optional, Any
-import google.generativeai as genai
+
+from .gemini_handles import gemini_model
 
 logger = logging.getLogger(__name__)
 
@@ -50,8 +51,7 @@ class StrategySchemaModifier:
                 logger.warning("GEMINI_API_KEY not found, falling back to rule-based modification")
                 self.use_gemini = False
             else:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+                self.model = gemini_model(api_key, 'gemini-2.0-flash-exp')
                 logger.info("Initialized StrategySchemaModifier with Gemini")
         
         if not self.use_gemini:
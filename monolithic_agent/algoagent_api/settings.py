@@ -102,17 +102,37 @@ WSGI_APPLICATION = 'algoagent_api.wsgi.application'
 ASGI_APPLICATION = 'algoagent_api.asgi.application'
 
 # Channels Configuration
-CHANNEL_LAYERS = {
-    'default': {
-        # Use in-memory channel layer for development (no Redis required)
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
-        # For production, use Redis:
-        # 'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        # 'CONFIG': {
-        #     "hosts": [('127.0.0.1', 6379)],
-        # },
-    },
-}
+# Set CHANNELS_REDIS_URL (e.g. redis://127.0.0.1:6379/0) to use the Redis
+# channel layer, so websocket groups (shared backtest streams) fan out across
+# ASGI workers. The cache moves to the same Redis so stream ownership claims
+# are shared too. Without it, both stay in-process (development and tests).
+CHANNELS_REDIS_URL = os.getenv('CHANNELS_REDIS_URL')
+
+if CHANNELS_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                "hosts": [CHANNELS_REDIS_URL],
+                "capacity": 1000,
+            },
+        },
+    }
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CHANNELS_REDIS_URL,
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'CONFIG': {
+                "capacity": 1000,
+            },
+        },
+    }
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
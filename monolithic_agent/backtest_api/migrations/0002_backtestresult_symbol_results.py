@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtest_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestresult',
+            name='symbol_results',
+            field=models.JSONField(blank=True, default=list, help_text='Per-symbol result breakdown'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtest_api', '0002_backtestresult_symbol_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestresult',
+            name='preview',
+            field=models.JSONField(blank=True, default=dict, help_text='Downsampled (LTTB) series for charts'),
+        ),
+        migrations.AddField(
+            model_name='backtestresult',
+            name='series_length',
+            field=models.IntegerField(default=0, help_text='Number of bars in the stored series'),
+        ),
+        migrations.AddField(
+            model_name='backtestresult',
+            name='series_path',
+            field=models.CharField(blank=True, help_text='Compressed series archive in the result store', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='backtestresult',
+            name='drawdowns',
+            field=models.JSONField(blank=True, default=dict, help_text='Time series of drawdowns'),
+        ),
+        migrations.AlterField(
+            model_name='backtestresult',
+            name='portfolio_values',
+            field=models.JSONField(blank=True, default=dict, help_text='Time series of portfolio values'),
+        ),
+        migrations.AlterField(
+            model_name='backtestresult',
+            name='positions',
+            field=models.JSONField(blank=True, default=dict, help_text='Position sizes over time'),
+        ),
+        migrations.AlterField(
+            model_name='backtestresult',
+            name='returns',
+            field=models.JSONField(blank=True, default=dict, help_text='Time series of returns'),
+        ),
+    ]
@@ -6,6 +6,8 @@ Django models for storing backtest configurations, runs, and results.
 """
 
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
@@ -181,11 +183,17 @@ class BacktestResult(models.Model):
     alpha = models.DecimalField(max_digits=15, decimal_places=6, null=True, blank=True)
     beta = models.DecimalField(max_digits=15, decimal_places=6, null=True, blank=True)
     
-    # Time series data (stored as JSON for flexibility)
-    portfolio_values = models.JSONField(help_text="Time series of portfolio values")
-    returns = models.JSONField(help_text="Time series of returns")
-    drawdowns = models.JSONField(help_text="Time series of drawdowns")
-    positions = models.JSONField(help_text="Position sizes over time")
+    # Time series data (inline JSON, only populated for legacy results)
+    portfolio_values = models.JSONField(default=dict, blank=True, help_text="Time series of portfolio values")
+    returns = models.JSONField(default=dict, blank=True, help_text="Time series of returns")
+    drawdowns = models.JSONField(default=dict, blank=True, help_text="Time series of drawdowns")
+    positions = models.JSONField(default=dict, blank=True, help_text="Position sizes over time")
+    
+    # Time series data (columnar archive, see result_store)
+    series_path = models.CharField(max_length=255, blank=True, help_text="Compressed series archive in the result store")
+    series_length = models.IntegerField(default=0, help_text="Number of bars in the stored series")
+    preview = models.JSONField(default=dict, blank=True, help_text="Downsampled (LTTB) series for charts")
+    symbol_results = models.JSONField(default=list, blank=True, help_text="Per-symbol result breakdown")
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -193,6 +201,13 @@ class BacktestResult(models.Model):
         return f"Results for {self.run.run_id}"
 
 
+@receiver(post_delete, sender=BacktestResult)
+def delete_result_series_archive(sender, instance, **kwargs):
+    """Remove the stored series archive along with its result"""
+    from .result_store import delete_result_series
+    delete_result_series(instance.series_path)
+
+
 class Trade(models.Model):
     """Model for storing individual trades"""
     TRADE_TYPE_CHOICES = [
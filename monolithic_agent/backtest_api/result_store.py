@@ -0,0 +1,173 @@
+"""
+Backtest Result Store for AlgoAgent
+===================================
+
+Columnar on-disk storage for BacktestResult time series.
+
+Each run's series (portfolio values, returns, drawdowns, positions) are
+written to one compressed NumPy archive referenced by the result row, with
+a downsampled preview (LTTB) precomputed at save time. The result API serves
+the preview by default and full-resolution slices on request, so large runs
+no longer have to be parsed from JSON on every call.
+"""
+
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Series stored for every backtest result
+SERIES_NAMES = ('portfolio_values', 'returns', 'drawdowns', 'positions')
+
+DEFAULT_PREVIEW_POINTS = 500
+
+
+def get_store_dir() -> Path:
+    """Directory holding result archives"""
+    store_dir = Path(getattr(settings, 'BACKTEST_RESULTS_DIR', settings.BASE_DIR / 'backtest_results_store'))
+    store_dir.mkdir(parents=True, exist_ok=True)
+    return store_dir
+
+
+def get_preview_points() -> int:
+    """Number of points in a result preview"""
+    return int(getattr(settings, 'BACKTEST_PREVIEW_POINTS', DEFAULT_PREVIEW_POINTS))
+
+
+def lttb(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Args:
+        y: Series values (x is the bar index)
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted indices of the selected points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n) if n_out >= n else np.linspace(0, n - 1, max(n_out, 0), dtype=np.int64)
+
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    # Bucket edges over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+
+        # Average of the next bucket
+        avg_x = (end + next_end - 1) / 2.0
+        avg_y = y[end:next_end].mean()
+
+        xs = np.arange(start, end)
+        areas = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+
+    return selected
+
+
+def _split_series(series) -> Tuple[np.ndarray, np.ndarray]:
+    """Split a {timestamp: value} dict (or list of pairs) into arrays"""
+    if isinstance(series, dict):
+        items = list(series.items())
+    else:
+        items = list(series or [])
+    timestamps = np.array([str(ts) for ts, _ in items], dtype=str)
+    values = np.array([float(v) for _, v in items], dtype=float)
+    return timestamps, values
+
+
+def save_result_series(run_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write a run's time series to a compressed archive
+
+    Args:
+        run_id: Backtest run id (used as file name)
+        result: Runner output containing the SERIES_NAMES series
+
+    Returns:
+        Dict with series_path, series_length and preview, ready to be
+        stored on the BacktestResult row
+    """
+    arrays = {}
+    length = 0
+    for name in SERIES_NAMES:
+        timestamps, values = _split_series(result.get(name, {}))
+        arrays[f'{name}__timestamps'] = timestamps
+        arrays[f'{name}__values'] = values
+        length = max(length, len(values))
+
+    path = get_store_dir() / f"{run_id}.npz"
+    np.savez_compressed(path, **arrays)
+
+    logger.info(f"Stored {length} bars of result series for {run_id} in {path.name}")
+
+    return {
+        'series_path': path.name,
+        'series_length': length,
+        'preview': build_preview(arrays, get_preview_points()),
+    }
+
+
+def build_preview(arrays: Dict[str, np.ndarray], n_points: int) -> Dict[str, Any]:
+    """Downsample every series with LTTB into {timestamps, values} lists"""
+    preview = {}
+    for name in SERIES_NAMES:
+        timestamps = arrays[f'{name}__timestamps']
+        values = arrays[f'{name}__values']
+        keep = lttb(values, n_points)
+        preview[name] = {
+            'timestamps': timestamps[keep].tolist(),
+            'values': values[keep].tolist(),
+        }
+    return preview
+
+
+def load_result_series(
+    series_path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    names=SERIES_NAMES
+) -> Dict[str, Any]:
+    """
+    Load a slice of stored series at full resolution
+
+    Args:
+        series_path: Archive file name stored on the result row
+        start: First bar index (inclusive)
+        end: Last bar index (exclusive, default: end of series)
+        names: Series to load
+
+    Returns:
+        Dict of series name -> {timestamps, values}
+    """
+    path = get_store_dir() / Path(series_path).name
+    series = {}
+    with np.load(path, allow_pickle=False) as archive:
+        for name in names:
+            series[name] = {
+                'timestamps': archive[f'{name}__timestamps'][start:end].tolist(),
+                'values': archive[f'{name}__values'][start:end].tolist(),
+            }
+    return series
+
+
+def delete_result_series(series_path: str):
+    """Remove a stored archive if present"""
+    if not series_path:
+        return
+    path = get_store_dir() / Path(series_path).name
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
@@ -72,7 +72,7 @@ class BacktestRunRequestSerializer(serializers.Serializer):
     symbols = serializers.ListField(
         child=serializers.CharField(max_length=20),
         min_length=1,
-        max_length=50
+        max_length=200
     )
     
     # Optional config overrides
@@ -23,6 +23,7 @@ import pandas as pd
 from datetime import datetime
 
 from .models import BacktestConfig, BacktestRun, BacktestResult, Trade, BacktestAlert
+from .result_store import save_result_series, load_result_series
 from .serializers import (
     BacktestConfigSerializer, BacktestRunSerializer, BacktestResultSerializer,
     TradeSerializer, BacktestAlertSerializer, BacktestRunRequestSerializer,
@@ -104,16 +105,71 @@ class BacktestRunViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def result(self, request, pk=None):
-        """Get detailed results for a backtest run"""
+        """
+        Get detailed results for a backtest run
+        
+        Returns the downsampled series preview by default. Full-resolution
+        series are returned with ?resolution=full (optionally sliced with
+        ?start=&end= bar offsets) or with a "Range: items=<start>-<end>"
+        header ("items=<start>-" and suffix "items=-<count>" included),
+        which yields a 206 partial response.
+        """
         run = self.get_object()
         try:
             result = run.result
-            serializer = BacktestResultSerializer(result)
-            return Response(serializer.data)
         except BacktestResult.DoesNotExist:
             return Response({
                 'error': 'Results not available for this run'
             }, status=status.HTTP_404_NOT_FOUND)
+        
+        data = BacktestResultSerializer(result).data
+        
+        # Legacy results keep their series inline
+        if not result.series_path:
+            return Response(data)
+        
+        range_header = request.headers.get('Range')
+        if range_header is None and request.query_params.get('resolution') != 'full':
+            return Response(data)
+        
+        total = result.series_length
+        try:
+            if range_header is not None:
+                unit, _, spec = range_header.partition('=')
+                first, _, last = spec.partition('-')
+                if unit.strip() != 'items':
+                    raise ValueError(f'Unsupported range unit: {unit}')
+                if first.strip():
+                    start = int(first)
+                    end = int(last) + 1 if last.strip() else total
+                else:
+                    # Suffix range: the last N items
+                    count = int(last)
+                    if count < 0:
+                        raise ValueError(f'Invalid suffix length: {last}')
+                    start, end = total - count, total
+            else:
+                start = int(request.query_params.get('start', 0))
+                end = int(request.query_params.get('end', total))
+        except ValueError as e:
+            return Response({'error': 'Invalid range', 'details': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        start, end = max(start, 0), min(end, total)
+        if start >= end and total > 0:
+            response = Response({'error': 'Range not satisfiable'}, status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'items */{total}'
+            return response
+        
+        data['series'] = load_result_series(result.series_path, start, end)
+        data['range'] = {'start': start, 'end': end, 'total': total}
+        
+        if range_header is None:
+            response = Response(data)
+        else:
+            response = Response(data, status=status.HTTP_206_PARTIAL_CONTENT)
+            response['Content-Range'] = f'items {start}-{end - 1}/{total}'
+        response['Accept-Ranges'] = 'items'
+        return response
     
     @action(detail=True, methods=['get'])
     def trades(self, request, pk=None):
@@ -208,30 +264,25 @@ class BacktestAPIViewSet(viewsets.ViewSet):
             
             # Try to start the backtest
             try:
-                from Backtest.interactive_backtest_runner import InteractiveBacktestRunner
+                from Backtest.parallel_runner import run_parallel_backtest
                 
                 # Update run status
                 run.status = 'running'
                 run.started_at = timezone.now()
                 run.save()
                 
-                # Initialize backtest runner
-                runner = InteractiveBacktestRunner()
-                
-                # Prepare backtest parameters
-                backtest_params = {
-                    'strategy_name': strategy.name,
-                    'strategy_code': strategy.strategy_code,
-                    'symbols': data['symbols'],
-                    'start_date': config.start_date.isoformat(),
-                    'end_date': config.end_date.isoformat(),
-                    'initial_capital': float(config.initial_capital),
-                    'commission': float(config.commission),
-                    'slippage': float(config.slippage)
-                }
-                
-                # Run backtest (this would typically be async in production)
-                result = runner.run_backtest(backtest_params)
+                # Run each symbol in a process pool and merge the results
+                # (this would typically be async in production)
+                result = run_parallel_backtest(
+                    strategy_code=strategy.strategy_code,
+                    symbols=data['symbols'],
+                    start_date=config.start_date.isoformat(),
+                    end_date=config.end_date.isoformat(),
+                    interval=config.timeframe,
+                    initial_capital=float(config.initial_capital),
+                    commission=float(config.commission),
+                    slippage=float(config.slippage)
+                )
                 
                 if result.get('success', False):
                     # Create result record
@@ -257,10 +308,8 @@ class BacktestAPIViewSet(viewsets.ViewSet):
                         largest_losing_trade_pct=metrics.get('largest_losing_trade', 0),
                         profit_factor=metrics.get('profit_factor', 0),
                         payoff_ratio=metrics.get('payoff_ratio', 0),
-                        portfolio_values=result.get('portfolio_values', {}),
-                        returns=result.get('returns', {}),
-                        drawdowns=result.get('drawdowns', {}),
-                        positions=result.get('positions', {})
+                        symbol_results=result.get('symbol_results', []),
+                        **save_result_series(run.run_id, result)
                     )
                     
                     # Update run summary
@@ -283,7 +332,8 @@ class BacktestAPIViewSet(viewsets.ViewSet):
                             'max_drawdown': backtest_result.max_drawdown_pct,
                             'total_trades': backtest_result.total_trades,
                             'win_rate': backtest_result.win_rate_pct
-                        }
+                        },
+                        'symbol_results': backtest_result.symbol_results
                     })
                 else:
                     run.status = 'failed'
@@ -293,7 +343,8 @@ class BacktestAPIViewSet(viewsets.ViewSet):
                     
                     return Response({
                         'error': 'Backtest execution failed',
-                        'details': result.get('error', 'Unknown error')
+                        'details': result.get('error', 'Unknown error'),
+                        'symbol_results': result.get('symbol_results', [])
                     }, status=status.HTTP_400_BAD_REQUEST)
                     
             except ImportError as e:
@@ -0,0 +1,160 @@
+"""
+Backtest result store tests
+===========================
+
+Covers the columnar series archive, the LTTB preview and range requests
+against the run result endpoint (Django test database, temporary store dir).
+"""
+
+import os
+from datetime import date
+
+import django
+import numpy as np
+import pandas as pd
+import pytest
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "algoagent_api.settings")
+django.setup()
+
+from rest_framework.test import APIClient
+
+from backtest_api.models import BacktestConfig, BacktestResult, BacktestRun
+from backtest_api.result_store import SERIES_NAMES, load_result_series, lttb, save_result_series
+from strategy_api.models import Strategy
+
+N_BARS = 1000
+
+
+def runner_result(n_bars=N_BARS):
+    timestamps = [str(ts) for ts in pd.date_range("2024-01-01", periods=n_bars, freq="h")]
+    equity = 10000 + np.cumsum(np.sin(np.arange(n_bars) / 10.0))
+    return {
+        'portfolio_values': dict(zip(timestamps, equity)),
+        'returns': dict(zip(timestamps, np.r_[0.0, np.diff(equity) / equity[:-1]])),
+        'drawdowns': dict(zip(timestamps, equity / np.maximum.accumulate(equity) - 1)),
+        'positions': dict(zip(timestamps, np.arange(n_bars) % 3)),
+    }
+
+
+@pytest.fixture
+def store_dir(tmp_path, settings):
+    settings.BACKTEST_RESULTS_DIR = tmp_path
+    settings.BACKTEST_PREVIEW_POINTS = 50
+    return tmp_path
+
+
+def test_series_round_trip(store_dir):
+    result = runner_result()
+    stored = save_result_series('run-1', result)
+
+    assert stored['series_path'] == 'run-1.npz'
+    assert stored['series_length'] == N_BARS
+    assert (store_dir / 'run-1.npz').exists()
+
+    series = load_result_series(stored['series_path'])
+    for name in SERIES_NAMES:
+        assert series[name]['timestamps'] == list(result[name].keys())
+        np.testing.assert_allclose(series[name]['values'], list(result[name].values()))
+
+    window = load_result_series(stored['series_path'], 10, 20, names=['returns'])
+    assert list(window) == ['returns']
+    assert window['returns']['timestamps'] == list(result['returns'].keys())[10:20]
+
+
+def test_preview_is_downsampled(store_dir):
+    stored = save_result_series('run-1', runner_result())
+
+    for name in SERIES_NAMES:
+        assert len(stored['preview'][name]['timestamps']) == 50
+        assert len(stored['preview'][name]['values']) == 50
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    y = np.zeros(1000)
+    y[437] = 50.0
+    y[712] = -30.0
+
+    keep = lttb(y, 40)
+
+    assert len(keep) == 40
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+    assert 437 in keep and 712 in keep
+
+
+def test_lttb_short_series_kept_whole():
+    np.testing.assert_array_equal(lttb(np.arange(10.0), 10), np.arange(10))
+    np.testing.assert_array_equal(lttb(np.arange(10.0), 500), np.arange(10))
+
+
+@pytest.fixture
+def stored_run(db, store_dir):
+    config = BacktestConfig.objects.create(
+        name='cfg', start_date=date(2024, 1, 1), end_date=date(2024, 3, 1)
+    )
+    strategy = Strategy.objects.create(name='SMA cross', strategy_code='{}')
+    run = BacktestRun.objects.create(run_id='run-1', config=config, strategy=strategy, symbols=['AAPL'])
+    BacktestResult.objects.create(
+        run=run,
+        final_portfolio_value=11000, total_return_pct=10, annualized_return_pct=10,
+        volatility=1, sharpe_ratio=1, max_drawdown_pct=-5, max_drawdown_duration=3,
+        current_drawdown_pct=0, total_trades=0, winning_trades=0, losing_trades=0,
+        win_rate_pct=0, avg_trade_return_pct=0, avg_winning_trade_pct=0,
+        avg_losing_trade_pct=0, largest_winning_trade_pct=0, largest_losing_trade_pct=0,
+        profit_factor=0, payoff_ratio=0,
+        **save_result_series(run.run_id, runner_result())
+    )
+    return run
+
+
+def get_result(run, **kwargs):
+    return APIClient().get(f'/api/backtests/runs/{run.pk}/result/', **kwargs)
+
+
+def test_result_serves_preview_by_default(stored_run):
+    response = get_result(stored_run)
+
+    assert response.status_code == 200
+    assert 'series' not in response.data
+    assert len(response.data['preview']['portfolio_values']['values']) == 50
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ('items=100-199', 100, 200),
+    ('items=990-', 990, N_BARS),
+    ('items=-25', N_BARS - 25, N_BARS),
+    ('items=-5000', 0, N_BARS),
+    ('items=950-5000', 950, N_BARS),
+])
+def test_range_returns_partial_content(stored_run, header, start, end):
+    response = get_result(stored_run, HTTP_RANGE=header)
+
+    assert response.status_code == 206
+    assert response['Content-Range'] == f'items {start}-{end - 1}/{N_BARS}'
+    assert response['Accept-Ranges'] == 'items'
+    assert response.data['range'] == {'start': start, 'end': end, 'total': N_BARS}
+    values = response.data['series']['portfolio_values']['values']
+    full = load_result_series(stored_run.result.series_path)['portfolio_values']['values']
+    assert values == full[start:end]
+
+
+@pytest.mark.parametrize("header", ['items=2000-2100', 'items=-0'])
+def test_unsatisfiable_range(stored_run, header):
+    response = get_result(stored_run, HTTP_RANGE=header)
+
+    assert response.status_code == 416
+    assert response['Content-Range'] == f'items */{N_BARS}'
+
+
+@pytest.mark.parametrize("header", ['bytes=0-10', 'items=a-b', 'items=-', 'items=--5'])
+def test_malformed_range(stored_run, header):
+    assert get_result(stored_run, HTTP_RANGE=header).status_code == 400
+
+
+def test_full_resolution_query(stored_run):
+    response = get_result(stored_run, data={'resolution': 'full', 'start': 10, 'end': 20})
+
+    assert response.status_code == 200
+    assert response.data['range'] == {'start': 10, 'end': 20, 'total': N_BARS}
+    assert len(response.data['series']['drawdowns']['values']) == 10
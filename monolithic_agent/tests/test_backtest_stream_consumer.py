@@ -0,0 +1,247 @@
+"""
+BacktestStreamConsumer tests
+============================
+
+Runs the consumer under Django settings with the in-memory channel layer and
+a patched data loader, so no market data, Redis or network is needed.
+"""
+
+import asyncio
+import os
+import threading
+from unittest.mock import patch
+
+import django
+import pandas as pd
+import pytest
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "algoagent_api.settings")
+django.setup()
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.test import override_settings
+
+from trading.consumers import BacktestCancelled, BacktestStreamConsumer
+from trading.streams import stream_owner
+
+IN_MEMORY_LAYER = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+def market_data(bars=5):
+    index = pd.date_range("2024-01-01", periods=bars, freq="D")
+    data = pd.DataFrame(
+        {"Open": 1.0, "High": 1.2, "Low": 0.9, "Close": 1.1, "Volume": 10.0}, index=index
+    )
+    return data, "AAPL"
+
+
+def gated_loader(gate: threading.Event, bars=5):
+    """Data loader that blocks until the test opens the gate"""
+    def load(**kwargs):
+        gate.wait(5)
+        return market_data(bars)
+    return load
+
+
+async def connect():
+    communicator = WebsocketCommunicator(BacktestStreamConsumer.as_asgi(), "/ws/backtest/")
+    connected, _ = await communicator.connect()
+    assert connected
+    return communicator
+
+
+async def start(communicator, **config):
+    config = {"symbol": "AAPL", "protocol": "frames", "speed": "instant", "frame_size": 1, **config}
+    await communicator.send_json_to({"action": "start_backtest", "config": config})
+
+
+async def receive_until(communicator, predicate, timeout=2):
+    """Messages up to and including the first one matching predicate"""
+    messages = []
+    while True:
+        message = await communicator.receive_json_from(timeout=timeout)
+        messages.append(message)
+        if predicate(message):
+            return messages
+
+
+def is_frame(number):
+    return lambda message: message["type"] == "frame" and message["frame"] == number
+
+
+def is_complete(message):
+    return message["type"] == "complete"
+
+
+async def join_gated_run(run_key: str, gate: threading.Event, **owner_config):
+    """Owner starts a shared run, a viewer joins, then data loading proceeds"""
+    owner, viewer = await connect(), await connect()
+    await start(owner, run_key=run_key, **owner_config)
+    await receive_until(owner, lambda message: message.get("status") == "loading_data")
+    await start(viewer, run_key=run_key)
+    await receive_until(viewer, lambda message: message.get("status") == "joined_stream")
+    gate.set()
+    return owner, viewer
+
+
+def test_bar_positions_with_negative_offset_index():
+    consumer = BacktestStreamConsumer()
+    index = pd.date_range("2024-01-02 09:30", periods=5, freq="h", tz="America/New_York")
+
+    positions = consumer.bar_positions(index, [
+        "2024-01-02 10:30:00-05:00",     # same offset as the index
+        "2024-01-02 16:30:00+00:00",     # UTC, converted to the index tz
+        "2024-01-02 12:30:00",           # naive, taken as index time
+        "2024-01-02 10:45:00-05:00",     # between bars
+        "not a timestamp",
+    ])
+
+    assert positions == [1, 2, 3, None, None]
+
+
+def test_bar_positions_with_naive_index_keeps_wall_clock():
+    consumer = BacktestStreamConsumer()
+    index = pd.date_range("2024-01-01", periods=3, freq="D")
+
+    assert consumer.bar_positions(index, ["2024-01-02", "2024-01-03 00:00:00-05:00", "2024-02-01"]) == [1, 2, None]
+
+
+SIMBROKER_STRATEGY = """
+class HoldStrategy:
+    def __init__(self, broker, symbol):
+        self.broker = broker
+
+    def on_bar(self, timestamp, market_data):
+        pass
+"""
+
+
+def test_python_strategy_checks_its_own_cancel_event():
+    consumer = BacktestStreamConsumer()
+    data = pd.DataFrame(
+        {"Open": [1.0, 1.1], "High": [1.2, 1.2], "Low": [0.9, 1.0], "Close": [1.1, 1.15], "Volume": [10, 10]},
+        index=pd.date_range("2024-01-01", periods=2, freq="D"),
+    )
+    cancelled = threading.Event()
+    cancelled.set()
+
+    with pytest.raises(BacktestCancelled):
+        consumer.execute_python_strategy(
+            strategy_code=SIMBROKER_STRATEGY, data_df=data, symbol="AAPL", initial_balance=10000,
+            lot_size=1.0, commission=0.0, cancel_event=cancelled,
+        )
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+def test_private_stream_after_leaving_shared_run_is_not_published():
+    gate = threading.Event()
+
+    async def scenario():
+        owner, viewer = await join_gated_run("leave-then-private", gate, symbol="SHARED", ack_window=1)
+        await receive_until(owner, is_frame(1))
+
+        # Owner switches to a private stream; the shared run goes on for the viewer
+        await start(owner, symbol="PRIVATE")
+        private = await receive_until(owner, is_complete)
+        shared = await receive_until(viewer, is_complete)
+
+        await owner.disconnect()
+        await viewer.disconnect()
+        return private, shared
+
+    with patch("trading.consumers.load_market_data", side_effect=gated_loader(gate)):
+        private, shared = asyncio.run(scenario())
+
+    assert {m["symbol"] for m in private if "symbol" in m} == {"PRIVATE"}
+    assert all(m.get("symbol") != "PRIVATE" for m in shared)
+    assert [m["frame"] for m in shared if m["type"] == "frame"] == [1, 2, 3, 4, 5]
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+def test_shared_run_waits_for_slowest_viewer_ack():
+    gate = threading.Event()
+
+    async def scenario():
+        owner, viewer = await join_gated_run("slowest-viewer", gate, ack_window=1)
+        await receive_until(owner, is_frame(1))
+        await receive_until(viewer, is_frame(1))
+
+        # The viewer is caught up, the owner is not: no more frames yet
+        await viewer.send_json_to({"action": "ack", "frame": 1})
+        held = await owner.receive_nothing(timeout=0.3)
+
+        await owner.send_json_to({"action": "ack", "frame": 1})
+        owner_next = await owner.receive_json_from(timeout=2)
+        viewer_next = await viewer.receive_json_from(timeout=2)
+
+        await owner.disconnect()
+        await viewer.disconnect()
+        return held, owner_next, viewer_next
+
+    with patch("trading.consumers.load_market_data", side_effect=gated_loader(gate)):
+        held, owner_next, viewer_next = asyncio.run(scenario())
+
+    assert held
+    assert owner_next["frame"] == viewer_next["frame"] == 2
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+def test_shared_run_stops_when_last_viewer_leaves():
+    gate = threading.Event()
+    run_key = "orphaned-run"
+
+    async def wait_for_release():
+        for _ in range(100):
+            if await sync_to_async(stream_owner)(run_key) is None:
+                return True
+            await asyncio.sleep(0.02)
+        return False
+
+    async def scenario():
+        owner, viewer = await join_gated_run(run_key, gate, ack_window=1)
+        await receive_until(viewer, is_frame(1))
+        await viewer.send_json_to({"action": "ack", "frame": 1})
+
+        # The owner leaving hands flow control to the viewer; the run goes on
+        await owner.disconnect()
+        await receive_until(viewer, is_frame(2))
+        still_running = await sync_to_async(stream_owner)(run_key) is not None
+
+        await viewer.disconnect()
+        return still_running, await wait_for_release()
+
+    with patch("trading.consumers.load_market_data", side_effect=gated_loader(gate, bars=50)):
+        still_running, released = asyncio.run(scenario())
+
+    assert still_running
+    assert released
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+def test_frames_pause_at_ack_window_and_resume_on_ack():
+    async def scenario():
+        client = await connect()
+        await start(client, ack_window=2)
+        first = await receive_until(client, is_frame(2))
+        paused = await client.receive_nothing(timeout=0.3)
+
+        # Acking frame 1 frees one slot, acking everything sent frees the window
+        await client.send_json_to({"action": "ack", "frame": 1})
+        third = await client.receive_json_from(timeout=2)
+        paused_again = await client.receive_nothing(timeout=0.3)
+        await client.send_json_to({"action": "ack", "frame": 3})
+        rest = await receive_until(client, is_complete)
+
+        await client.disconnect()
+        return first, paused, third, paused_again, rest
+
+    with patch("trading.consumers.load_market_data", return_value=market_data(bars=5)):
+        first, paused, third, paused_again, rest = asyncio.run(scenario())
+
+    frames = [m for m in first + [third] + rest if m["type"] == "frame"]
+    assert paused and paused_again
+    assert third["frame"] == 3
+    assert [m["frame"] for m in frames] == [1, 2, 3, 4, 5]
+    assert [m["start_bar"] for m in frames] == [0, 1, 2, 3, 4]
+    assert all(m["bar_count"] == 1 and len(m["close"]) == 1 for m in frames)
@@ -0,0 +1,135 @@
+"""
+Tests for the canonical strategy compiler.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from backtesting import Backtest, Strategy
+from backtesting.lib import crossover
+from backtesting.test import GOOG, SMA
+
+from Backtest.backtesting_adapter import create_strategy_from_canonical, run_canonical_vectorized
+from Backtest.canonical_compiler import compile_rule
+
+SMA_CROSS = {
+    'indicators': {
+        'fast': {'type': 'sma', 'params': {'period': 10}},
+        'slow': {'type': 'sma', 'params': {'period': 30}},
+    },
+    'entry_rules': [{'type': 'crossover', 'indicator1': 'fast', 'indicator2': 'slow'}],
+    'exit_rules': [{'type': 'crossunder', 'indicator1': 'fast', 'indicator2': 'slow'}],
+}
+
+
+class PerBarSmaCross(Strategy):
+    """Rules evaluated bar by bar, as before compilation"""
+
+    def init(self):
+        self.fast = self.I(SMA, self.data.Close, 10)
+        self.slow = self.I(SMA, self.data.Close, 30)
+
+    def next(self):
+        if not self.position:
+            if crossover(self.fast, self.slow):
+                self.buy(size=0.95)
+        elif crossover(self.slow, self.fast):
+            self.position.close()
+
+
+def run_event_driven(strategy_class):
+    return Backtest(GOOG, strategy_class, cash=10000, commission=0.002).run()
+
+
+def test_compiled_strategy_matches_per_bar_rules():
+    compiled = run_event_driven(create_strategy_from_canonical(SMA_CROSS))
+    per_bar = run_event_driven(PerBarSmaCross)
+
+    assert compiled['# Trades'] == per_bar['# Trades'] == 32
+    assert compiled['Equity Final [$]'] == pytest.approx(per_bar['Equity Final [$]'])
+    pd.testing.assert_series_equal(compiled._trades['EntryTime'], per_bar._trades['EntryTime'])
+    pd.testing.assert_series_equal(compiled._trades['ExitTime'], per_bar._trades['ExitTime'])
+
+
+def test_vectorized_backtest_tracks_event_driven():
+    event_driven = run_event_driven(create_strategy_from_canonical(SMA_CROSS))
+    vectorized = run_canonical_vectorized(SMA_CROSS, GOOG, cash=10000, commission=0.002)
+
+    # Same fills; the vectorized result also lists the trade still open at the end
+    closed = event_driven._trades
+    trades = vectorized['trades']
+    assert vectorized['total_trades'] == len(closed) + 1
+    assert pd.isna(trades['ExitTime'].iloc[-1])
+    assert list(trades['EntryTime'][:len(closed)]) == list(closed['EntryTime'])
+    assert list(trades['ExitTime'][:len(closed)]) == list(closed['ExitTime'])
+
+    # Fractional units vs whole shares
+    assert vectorized['final_equity'] == pytest.approx(event_driven['Equity Final [$]'], rel=0.02)
+
+
+@pytest.fixture
+def bars():
+    close = np.array([10.0, 11.0, 12.0, 11.0, 10.0, 12.0])
+    return pd.DataFrame({
+        'Open': close - 0.5,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': np.full(len(close), 100.0),
+    })
+
+
+@pytest.fixture
+def indicators():
+    return {
+        'fast': np.array([1.0, 3.0, 3.0, 1.0, 1.0, 3.0]),
+        'slow': np.full(6, 2.0),
+        'level': np.array([np.nan, 11.0, 11.0, 11.0, 11.0, 11.0]),
+    }
+
+
+@pytest.mark.parametrize("op, expected", [
+    ('>', [False, True, True, False, False, True]),
+    ('>=', [False, True, True, False, False, True]),
+    ('<', [True, False, False, True, True, False]),
+    ('<=', [True, False, False, True, True, False]),
+    ('==', [False, False, False, False, False, False]),
+    ('!=', [True, True, True, True, True, True]),
+    ('above', [False, True, True, False, False, True]),
+    ('below', [True, False, False, True, True, False]),
+    ('greater_than', [False, True, True, False, False, True]),
+    ('less_than', [True, False, False, True, True, False]),
+])
+def test_threshold_operators(op, expected, bars, indicators):
+    rule = {'type': 'threshold', 'indicator': 'fast', 'operator': op, 'value': 2}
+    np.testing.assert_array_equal(compile_rule(rule, indicators, bars), expected)
+
+
+def test_threshold_against_indicator_and_price_column(bars, indicators):
+    versus_indicator = {'type': 'threshold', 'indicator': 'fast', 'operator': '>', 'indicator2': 'slow'}
+    np.testing.assert_array_equal(
+        compile_rule(versus_indicator, indicators, bars), [False, True, True, False, False, True]
+    )
+
+    # Price columns are matched case-insensitively; NaN warm-up bars are False
+    versus_price = {'type': 'threshold', 'indicator': 'close', 'operator': '>=', 'indicator2': 'level'}
+    np.testing.assert_array_equal(
+        compile_rule(versus_price, indicators, bars), [False, True, True, True, False, True]
+    )
+
+
+def test_crossover_and_crossunder(bars, indicators):
+    cross_up = {'type': 'crossover', 'indicator1': 'fast', 'indicator2': 'slow'}
+    cross_down = {'type': 'crossunder', 'indicator1': 'fast', 'indicator2': 'slow'}
+
+    np.testing.assert_array_equal(
+        compile_rule(cross_up, indicators, bars), [False, True, False, False, False, True]
+    )
+    np.testing.assert_array_equal(
+        compile_rule(cross_down, indicators, bars), [False, False, False, True, False, False]
+    )
+
+
+def test_unsupported_rules_compile_to_none(bars, indicators):
+    assert compile_rule({'type': 'divergence'}, indicators, bars) is None
+    assert compile_rule({'type': 'threshold', 'indicator': 'fast', 'operator': '~', 'value': 2}, indicators, bars) is None
+    assert compile_rule({'type': 'crossover', 'indicator1': 'fast', 'indicator2': 'missing'}, indicators, bars) is None
@@ -0,0 +1,94 @@
+"""
+Tests for latency-aware order execution in the simulated broker.
+"""
+from datetime import datetime, timedelta
+
+from Backtest.config import BacktestConfig
+from Backtest.sim_broker import SimBroker
+
+T0 = datetime(2024, 1, 2, 9, 30)
+
+
+def make_broker(latency_ms):
+    # 10% of a 1000-share bar = 100 shares of liquidity per bar
+    return SimBroker(BacktestConfig(latency_ms=latency_ms, fee_pct=0.0, slippage_pct=0.0))
+
+
+def bar(price, volume=1000):
+    return {'AAPL': {'open': price, 'high': price + 1, 'low': price - 1, 'close': price, 'volume': volume}}
+
+
+def buy(broker, size, timestamp, signal_id):
+    return broker.submit_signal({
+        'signal_id': signal_id,
+        'timestamp': timestamp,
+        'symbol': 'AAPL',
+        'side': 'BUY',
+        'action': 'ENTRY',
+        'order_type': 'MARKET',
+        'size': size,
+    })
+
+
+def fills_for(broker, order_id):
+    return [(f['timestamp'], f['size']) for f in broker.get_fills() if f['order_id'] == order_id]
+
+
+def test_order_waits_for_its_arrival_time():
+    broker = make_broker(latency_ms=500)
+    broker.step_to(T0, bar(100))
+    order_id = buy(broker, 50, T0, 's1')
+
+    broker.step_to(T0 + timedelta(milliseconds=200), bar(101))
+    assert fills_for(broker, order_id) == []
+    assert broker.execution_simulator.pending_count == 1
+
+    broker.step_to(T0 + timedelta(seconds=1), bar(102))
+    fills = broker.get_fills()
+    assert [(f['size'], f['price']) for f in fills] == [(50, 102.0)]
+    assert broker.get_order(order_id)['status'] == 'FILLED'
+    assert broker.execution_simulator.pending_count == 0
+
+
+def test_earlier_arrival_fills_first():
+    broker = make_broker(latency_ms=500)
+    broker.step_to(T0, bar(100))
+
+    # Submitted first but sent later, so it reaches the market second
+    late = buy(broker, 80, T0 + timedelta(milliseconds=300), 'late')
+    early = buy(broker, 80, T0, 'early')
+
+    broker.step_to(T0 + timedelta(minutes=1), bar(101))
+    assert fills_for(broker, early) == [((T0 + timedelta(minutes=1)).isoformat(), 80)]
+    assert fills_for(broker, late) == [((T0 + timedelta(minutes=1)).isoformat(), 20)]
+
+
+def test_remainder_carries_over_when_liquidity_runs_out():
+    broker = make_broker(latency_ms=500)
+    broker.step_to(T0, bar(100))
+    order_id = buy(broker, 250, T0, 's1')
+
+    broker.step_to(T0 + timedelta(minutes=1), bar(101))
+    assert broker.get_order(order_id)['status'] == 'PARTIAL'
+    assert broker.get_order(order_id)['size_filled'] == 100
+
+    broker.step_to(T0 + timedelta(minutes=2), bar(102))
+    broker.step_to(T0 + timedelta(minutes=3), bar(103))
+
+    assert [size for _, size in fills_for(broker, order_id)] == [100, 100, 50]
+    assert broker.get_order(order_id)['status'] == 'FILLED'
+    assert broker.execution_simulator.get_statistics()['partial_fills'] == 2
+    assert broker.execution_simulator.pending_count == 0
+
+
+def test_zero_latency_fills_on_next_bar_without_queue():
+    broker = make_broker(latency_ms=0)
+    broker.step_to(T0, bar(100))
+    order_id = buy(broker, 50, T0, 's1')
+
+    assert not broker.execution_simulator.queue_enabled
+    assert broker.execution_simulator.pending_count == 0
+
+    broker.step_to(T0 + timedelta(minutes=1), bar(101))
+    assert fills_for(broker, order_id) == [((T0 + timedelta(minutes=1)).isoformat(), 50)]
+    assert broker.execution_simulator.pending_count == 0
@@ -0,0 +1,112 @@
+"""
+AuditLogger background writer tests
+===================================
+
+Writes go through the queued writer thread into a temporary SQLite file.
+The writer is held on its first batch where a test needs writes to pile up.
+"""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+live_dir = Path(__file__).parent.parent / "Live"
+if str(live_dir) not in sys.path:
+    sys.path.insert(0, str(live_dir))
+
+from audit_logger import AuditLogger
+
+
+@pytest.fixture
+def audit(tmp_path):
+    audit = AuditLogger(tmp_path / "audit.db")
+    yield audit
+    audit.close()
+
+
+def hold_writer(audit):
+    """Block the writer inside its first batch until the returned event is set"""
+    gate = threading.Event()
+    entered = threading.Event()
+    batches = []
+    write_batch = audit._write_batch
+
+    def gated_write_batch(batch):
+        entered.set()
+        gate.wait(timeout=5)
+        batches.append(len(batch))
+        write_batch(batch)
+
+    audit._write_batch = gated_write_batch
+    audit.log_event('startup', 'INFO', 'first write')
+    assert entered.wait(timeout=5)
+    return gate, batches
+
+
+def log_signal(audit, signal_id):
+    audit.log_signal(signal_id, 'EURUSD', 'BUY', 0.8, 1.095, 'rsi')
+
+
+def count_rows(db_path, table):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_queued_writes_commit_as_one_batch(audit):
+    gate, batches = hold_writer(audit)
+    for i in range(50):
+        audit.log_event('tick', 'INFO', f'event {i}')
+    gate.set()
+    audit.flush()
+
+    assert batches == [1, 50]
+    assert count_rows(audit.db_path, 'events') == 51
+
+
+def test_bad_row_falls_back_to_row_by_row(audit):
+    gate, batches = hold_writer(audit)
+    log_signal(audit, 'sig-1')
+    log_signal(audit, 'sig-1')  # duplicate signal_id violates UNIQUE
+    log_signal(audit, 'sig-2')
+    audit.log_event('order', 'INFO', 'after the duplicate')
+    gate.set()
+
+    signals = audit.get_recent_signals()
+
+    assert batches == [1, 4]
+    assert sorted(s['signal_id'] for s in signals) == ['sig-1', 'sig-2']
+    assert count_rows(audit.db_path, 'events') == 2
+
+
+def test_reads_wait_for_queued_writes(audit):
+    gate, _ = hold_writer(audit)
+    for i in range(20):
+        audit.log_order(f'order-{i}', None, 'EURUSD', 'MARKET', 'BUY', 0.01, 1.095)
+    audit.update_order('order-0', 'EXECUTED', executed_price=1.0951)
+    threading.Timer(0.1, gate.set).start()
+
+    orders = audit.get_recent_orders()
+
+    assert len(orders) == 20
+    assert {o['client_order_id']: o['status'] for o in orders}['order-0'] == 'EXECUTED'
+
+
+def test_close_drains_the_queue(tmp_path):
+    audit = AuditLogger(tmp_path / "audit.db")
+    gate, _ = hold_writer(audit)
+    for i in range(100):
+        audit.log_event('tick', 'INFO', f'event {i}')
+    threading.Timer(0.1, gate.set).start()
+
+    audit.close()
+
+    assert not audit._writer.is_alive()
+    assert count_rows(audit.db_path, 'events') == 101
+    with pytest.raises(RuntimeError):
+        audit.log_event('late', 'INFO', 'after close')
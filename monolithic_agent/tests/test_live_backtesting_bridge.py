@@ -0,0 +1,97 @@
+"""
+BacktestingBridge closed-bar tests
+==================================
+
+Signals are only generated from closed bars, so a bar is never evaluated on
+partial OHLC and then skipped once it closes.
+"""
+
+import sys
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+live_dir = Path(__file__).parent.parent / "Live"
+if str(live_dir) not in sys.path:
+    sys.path.insert(0, str(live_dir))
+
+from backtesting_bridge import BacktestingBridge, closed_bars
+
+
+class RecordingStrategy:
+    """Remembers the close price of every bar it is shown"""
+
+    seen = []
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def on_bar(self, timestamp, market_data):
+        RecordingStrategy.seen.append((timestamp, market_data['EURUSD']['close']))
+
+
+def hourly_bars(last_open, closes):
+    index = pd.date_range(end=last_open, periods=len(closes), freq='h')
+    return pd.DataFrame(
+        {'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 1.0}, index=index
+    )
+
+
+def test_closed_bars_drops_only_a_forming_bar():
+    bars = hourly_bars(pd.Timestamp('2024-01-03 10:00'), [1.0, 1.1, 1.2])
+
+    assert len(closed_bars(bars, '1h', now=pd.Timestamp('2024-01-03 10:30'))) == 2
+    assert len(closed_bars(bars, '1h', now=pd.Timestamp('2024-01-03 11:00'))) == 3
+    assert len(closed_bars(bars, '1d', now=pd.Timestamp('2024-01-03 23:00'))) == 2
+    assert closed_bars(bars.iloc[:0], '1h').empty
+
+
+def test_forming_bar_is_evaluated_once_with_final_values():
+    RecordingStrategy.seen = []
+    bridge = BacktestingBridge(RecordingStrategy)
+    forming_open = pd.Timestamp.now().floor('h')
+    window = dict(symbol='EURUSD', from_ts=forming_open - timedelta(days=1),
+                  to_ts=forming_open + timedelta(hours=2), timeframe='1h', incremental=True)
+
+    # The current bar is still forming at 1.25
+    partial = hourly_bars(forming_open, [1.0, 1.1, 1.25])
+    with patch('backtesting_bridge.load_market_data', return_value=(partial, {})):
+        first = bridge.generate_signals(**window)
+
+    # An hour later it has closed at 1.3 and the next bar is forming
+    later = hourly_bars(forming_open + timedelta(hours=1), [1.0, 1.1, 1.3, 1.35])
+    with patch('backtesting_bridge.load_market_data', return_value=(later, {})), \
+            patch('pandas.Timestamp.now', return_value=forming_open + timedelta(hours=1, minutes=5)):
+        second = bridge.generate_signals(**window)
+
+    assert len(first) == 2 and len(second) == 1
+    assert second.index[0] == forming_open
+    assert RecordingStrategy.seen[-1] == (forming_open, 1.3)
+    assert 1.25 not in [close for _, close in RecordingStrategy.seen]
+
+
+def test_later_polls_fetch_only_new_bars():
+    RecordingStrategy.seen = []
+    bridge = BacktestingBridge(RecordingStrategy)
+    last_open = pd.Timestamp.now().floor('h') - timedelta(hours=1)
+    window = dict(symbol='EURUSD', from_ts=last_open - timedelta(days=30),
+                  to_ts=last_open + timedelta(hours=2), timeframe='1h', incremental=True)
+
+    month = hourly_bars(last_open, [1.0] * 500).assign(RSI=50.0)
+    with patch('backtesting_bridge.load_market_data', return_value=(month, {})) as load:
+        bridge.generate_signals(**window)
+    assert load.call_args.kwargs['period'] == '1mo'
+
+    # The short fetch has cold indicators on the overlap and one new closed bar
+    recent = hourly_bars(last_open + timedelta(hours=1), [1.0] * 30 + [1.1]).assign(RSI=[None] * 30 + [60.0])
+    with patch('backtesting_bridge.load_market_data', return_value=(recent, {})) as load, \
+            patch('pandas.Timestamp.now', return_value=last_open + timedelta(hours=2, minutes=5)):
+        second = bridge.generate_signals(**window)
+
+    assert load.call_args.kwargs['period'] == '5d'
+    assert list(second.index) == [last_open + timedelta(hours=1)]
+    frame = bridge.get_session('EURUSD', '1h').frame
+    assert len(frame) == 501
+    assert frame['RSI'].iloc[-1] == 60.0 and frame['RSI'].iloc[:-1].eq(50.0).all()
@@ -0,0 +1,86 @@
+"""
+Bar-close scheduler tests
+=========================
+
+Bar boundaries in broker server time and the due-timeframe bookkeeping,
+against a fake clock.
+"""
+
+import sys
+from calendar import timegm
+from pathlib import Path
+
+live_dir = Path(__file__).parent.parent / "Live"
+if str(live_dir) not in sys.path:
+    sys.path.insert(0, str(live_dir))
+
+from bar_scheduler import BarCloseScheduler, next_bar_close
+
+HOUR = 3600
+
+
+def utc(*args) -> float:
+    return float(timegm(args + (0,) * (6 - len(args))))
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_next_close_in_utc():
+    now = utc(2024, 1, 3, 10)
+
+    assert next_bar_close('15m', now) == utc(2024, 1, 3, 10, 15)
+    assert next_bar_close('4h', now) == utc(2024, 1, 3, 12)
+    assert next_bar_close('1d', now) == utc(2024, 1, 4)
+    assert next_bar_close('1d', utc(2024, 1, 4)) == utc(2024, 1, 5)  # strictly after now
+
+
+def test_next_close_in_server_time():
+    now = utc(2024, 1, 3, 10)  # Wednesday, 12:00 on a UTC+2 server
+
+    assert next_bar_close('4h', now, 2 * HOUR) == utc(2024, 1, 3, 14)
+    assert next_bar_close('1d', now, 2 * HOUR) == utc(2024, 1, 3, 22)
+    assert next_bar_close('1d', utc(2024, 1, 3, 23), 2 * HOUR) == utc(2024, 1, 4, 22)
+    assert next_bar_close('1d', now, -5 * HOUR) == utc(2024, 1, 4, 5)
+    # Weekly bars open on Sunday server time
+    assert next_bar_close('1wk', now, 2 * HOUR) == utc(2024, 1, 6, 22)
+    assert next_bar_close('1wk', now) == utc(2024, 1, 7)
+    # Already February 1st on the server
+    assert next_bar_close('1mo', utc(2024, 1, 31, 23), 2 * HOUR) == utc(2024, 2, 29, 22)
+
+
+def test_pop_due_reports_each_close_once_after_grace():
+    clock = FakeClock(utc(2024, 1, 3, 10, 30))
+    scheduler = BarCloseScheduler(
+        {'EURUSD': '1h', 'GBPUSD': '1h', 'USDJPY': '1d'}, grace_seconds=2, clock=clock
+    )
+
+    assert scheduler.seconds_until_next() == 30 * 60 + 2
+
+    clock.now = utc(2024, 1, 3, 11) + 1
+    assert scheduler.pop_due() == {}  # inside the grace window
+
+    clock.now = utc(2024, 1, 3, 11) + 3
+    assert scheduler.pop_due() == {'1h': ['EURUSD', 'GBPUSD']}
+    clock.now = utc(2024, 1, 3, 11, 30)
+    assert scheduler.pop_due() == {}
+
+    # Several missed closes are reported once
+    clock.now = utc(2024, 1, 4) + 5
+    assert scheduler.pop_due() == {'1h': ['EURUSD', 'GBPUSD'], '1d': ['USDJPY']}
+    assert scheduler.pop_due() == {}
+
+
+def test_daily_close_follows_broker_offset():
+    clock = FakeClock(utc(2024, 1, 3, 21, 30))
+    scheduler = BarCloseScheduler({'EURUSD': '1d'}, grace_seconds=2, clock=clock)
+    scheduler.set_utc_offset(2 * HOUR)
+
+    assert scheduler.seconds_until_next() == 30 * 60 + 2
+    clock.now = utc(2024, 1, 3, 22) + 3
+    assert scheduler.pop_due() == {'1d': ['EURUSD']}
@@ -0,0 +1,189 @@
+"""
+MT5Connector caching and position sync tests
+============================================
+
+Runs against a fake MetaTrader5 module, so no terminal (or Windows) is needed.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+live_dir = Path(__file__).parent.parent / "Live"
+if str(live_dir) not in sys.path:
+    sys.path.insert(0, str(live_dir))
+
+from mt5_connector import MT5Connector
+from state_manager import StateManager
+
+
+class FakeMT5:
+    """Minimal stand-in for the MetaTrader5 module that counts API calls"""
+
+    def __init__(self):
+        self.calls = {}
+        self.positions = []
+        self.bid, self.ask = 1.1000, 1.1002
+        self.tick_time = 0
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def initialize(self, *args, **kwargs):
+        return True
+
+    def login(self, **kwargs):
+        return True
+
+    def shutdown(self):
+        pass
+
+    def last_error(self):
+        return (0, 'ok')
+
+    def terminal_info(self):
+        return SimpleNamespace(name='Fake Terminal', build=1)
+
+    def account_info(self):
+        self._count('account_info')
+        return SimpleNamespace(
+            login=1, trade_mode=0, server='Fake', balance=10000.0, equity=10000.0, profit=0.0,
+            margin=0.0, margin_free=10000.0, margin_level=0.0, leverage=100,
+            currency='USD', name='Test', company='Fake'
+        )
+
+    def symbol_select(self, symbol, enable):
+        self._count('symbol_select')
+        return True
+
+    def symbol_info(self, symbol):
+        self._count('symbol_info')
+        return SimpleNamespace(
+            name=symbol, bid=self.bid, ask=self.ask, last=0.0, volume_min=0.01,
+            volume_max=100.0, volume_step=0.01, trade_contract_size=100000,
+            trade_tick_size=0.00001, trade_tick_value=1.0, point=0.00001, digits=5,
+            spread=20, trade_mode=4, currency_base='EUR', currency_profit='USD',
+            currency_margin='EUR'
+        )
+
+    def symbol_info_tick(self, symbol):
+        self._count('symbol_info_tick')
+        return SimpleNamespace(bid=self.bid, ask=self.ask, last=0.0, time=self.tick_time)
+
+    def positions_get(self, symbol=None):
+        self._count('positions_get')
+        return tuple(self.positions)
+
+
+def make_position(ticket, symbol, profit=0.0, volume=0.1, sl=0.0):
+    return SimpleNamespace(
+        ticket=ticket, time=1700000000, symbol=symbol, type=0, volume=volume,
+        price_open=1.1, price_current=1.1, sl=sl, tp=0.0, profit=profit,
+        swap=0.0, magic=123456, comment=''
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_connector(fake, clock):
+    config = SimpleNamespace(
+        mt5_path=None, mt5_timeout=1000, dry_run=True, mt5_login=1, mt5_password='x', mt5_server='Fake',
+        symbol_info_ttl_seconds=60, account_info_ttl_seconds=5
+    )
+    connector = MT5Connector(config, mt5_module=fake, clock=clock)
+    assert connector.initialize()
+    return connector
+
+
+def test_symbol_specs_cached_quotes_fresh():
+    fake, clock = FakeMT5(), FakeClock()
+    connector = make_connector(fake, clock)
+
+    first = connector.get_symbol_info('EURUSD')
+    fake.bid, fake.ask = 1.2000, 1.2003
+    second = connector.get_symbol_info('EURUSD')
+
+    assert fake.calls['symbol_info'] == 1
+    assert fake.calls['symbol_select'] == 1
+    assert second['bid'] == 1.2000 and second['ask'] == 1.2003
+    assert second['volume_step'] == first['volume_step']
+    assert second['spread'] == 30
+
+    # Specs are reloaded once the TTL expires
+    clock.now = 61
+    connector.get_symbol_info('EURUSD')
+    assert fake.calls['symbol_info'] == 2
+
+
+def test_health_check_probes_account_info():
+    fake, clock = FakeMT5(), FakeClock()
+    connector = make_connector(fake, clock)
+    baseline = fake.calls['account_info']
+
+    # Each call probes the terminal once; the probe result is reused
+    for n in range(1, 4):
+        assert connector.get_account_info()['balance'] == 10000.0
+        assert fake.calls['account_info'] == baseline + n
+
+    # A cached account does not hide a dead terminal
+    fake.account_info = lambda: None
+    assert not connector.check_connection()
+    assert not connector.is_connected
+
+
+def test_position_diff_applies_only_changes():
+    fake, clock = FakeMT5(), FakeClock()
+    connector = make_connector(fake, clock)
+    state = StateManager(SimpleNamespace(state_db_path=None))
+
+    fake.positions = [make_position(1, 'EURUSD'), make_position(2, 'GBPUSD')]
+    changes = connector.get_position_changes()
+    assert [p['ticket'] for p in changes['opened']] == [1, 2]
+    assert state.apply_position_changes(changes) == 2
+
+    # Profit moves are refreshed without counting as changes
+    fake.positions = [make_position(1, 'EURUSD', profit=5.0), make_position(2, 'GBPUSD')]
+    changes = connector.get_position_changes()
+    assert changes['updated'] == []
+    assert state.apply_position_changes(changes) == 0
+    assert state.positions['EURUSD']['profit'] == 5.0
+
+    # Only the EURUSD stop loss changed
+    gbp_entry = state.positions['GBPUSD']
+    fake.positions = [make_position(1, 'EURUSD', profit=5.0, sl=1.05), make_position(2, 'GBPUSD')]
+    changes = connector.get_position_changes()
+    assert [p['ticket'] for p in changes['updated']] == [1]
+    assert state.apply_position_changes(changes) == 1
+    assert state.positions['EURUSD']['sl'] == 1.05
+    assert state.positions['GBPUSD'] is gbp_entry
+
+    # Unchanged snapshot is a no-op
+    assert state.apply_position_changes(connector.get_position_changes()) == 0
+
+    fake.positions = [make_position(2, 'GBPUSD')]
+    changes = connector.get_position_changes()
+    assert changes['closed'] == [1]
+    state.apply_position_changes(changes)
+    assert set(state.positions) == {'GBPUSD'}
+
+
+def test_server_offset_from_tick_time():
+    fake, clock = FakeMT5(), FakeClock()
+    connector = make_connector(fake, clock)
+    now = 1704276000.0  # 2024-01-03 10:00 UTC
+
+    fake.tick_time = int(now) + 2 * 3600 - 3  # UTC+2 server, tick 3s old
+    assert connector.get_server_utc_offset('EURUSD', now=now) == 7200.0
+
+    fake.tick_time = int(now) - 5 * 3600
+    assert connector.get_server_utc_offset('EURUSD', now=now) == -18000.0
+
+    # A stale tick from when the market closed is not mistaken for an offset
+    fake.tick_time = int(now) - 40 * 3600 - 1000
+    assert connector.get_server_utc_offset('EURUSD', now=now) is None
@@ -0,0 +1,90 @@
+"""
+SignalDedupStore tests
+======================
+
+In-memory lookups, persistence across restarts through the SQLite table,
+and eviction by age and capacity. Time is driven by a fake clock.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+live_dir = Path(__file__).parent.parent / "Live"
+if str(live_dir) not in sys.path:
+    sys.path.insert(0, str(live_dir))
+
+import state_manager
+from state_manager import SignalDedupStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(state_manager.time, 'time', lambda: now[0])
+    return now
+
+
+def test_memory_only_hit(clock):
+    store = SignalDedupStore(None, ttl_seconds=60)
+    store.add('sig-1')
+
+    assert 'sig-1' in store
+    assert 'sig-2' not in store
+    assert len(store) == 1
+
+    clock[0] += 61
+    assert 'sig-1' not in store
+
+
+def test_hit_after_restart(tmp_path, clock):
+    db_path = tmp_path / "state.db"
+    store = SignalDedupStore(db_path, ttl_seconds=60)
+    store.add('sig-1')
+    clock[0] += 30
+    store.add('sig-2')
+    store.close()
+
+    # sig-1 expires while the process is down; sig-2 is still inside the window
+    clock[0] += 40
+    restarted = SignalDedupStore(db_path, ttl_seconds=60)
+
+    assert 'sig-2' in restarted
+    assert 'sig-1' not in restarted
+    assert len(restarted) == 1
+    rows = restarted._conn.execute("SELECT signal_id FROM processed_signals").fetchall()
+    assert rows == [('sig-2',)]
+    restarted.close()
+
+
+def test_capacity_evicts_least_recently_marked(clock):
+    store = SignalDedupStore(None, ttl_seconds=3600, max_entries=3)
+    for signal_id in ('a', 'b', 'c'):
+        clock[0] += 1
+        store.add(signal_id)
+
+    clock[0] += 1
+    store.add('a')  # marked again, now the most recent
+    clock[0] += 1
+    store.add('d')
+
+    assert len(store) == 3
+    assert 'b' not in store
+    assert all(signal_id in store for signal_id in ('a', 'c', 'd'))
+
+
+def test_restart_keeps_newest_entries_at_capacity(tmp_path, clock):
+    db_path = tmp_path / "state.db"
+    store = SignalDedupStore(db_path, ttl_seconds=3600, max_entries=10)
+    for i in range(10):
+        clock[0] += 1
+        store.add(f'sig-{i}')
+    store.close()
+
+    restarted = SignalDedupStore(db_path, ttl_seconds=3600, max_entries=4)
+
+    assert len(restarted) == 4
+    assert all(f'sig-{i}' in restarted for i in range(6, 10))
+    assert 'sig-5' not in restarted
+    restarted.close()
@@ -0,0 +1,133 @@
+"""
+LiveTrader symbol processing tests
+==================================
+
+Signal generation fans out across symbols while every MT5 call goes through
+the single MT5 queue thread. Runs against fake bridge/connector/executor
+objects, so no terminal is needed.
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+live_dir = Path(__file__).parent.parent / "Live"
+if str(live_dir) not in sys.path:
+    sys.path.insert(0, str(live_dir))
+
+# live_trader first: it needs Live/config.py, not the Backtest one that
+# backtesting_bridge puts on the path
+from live_trader import LiveTrader
+from backtesting_bridge import BacktestingBridge
+from state_manager import StateManager
+
+
+class FakeBridge(BacktestingBridge):
+    """Returns one BUY signal per symbol; SLOW waits until FAST has been ordered"""
+
+    def __init__(self, fast_ordered):
+        super().__init__(object)
+        self.fast_ordered = fast_ordered
+        self.slow_waited_for_fast = None
+
+    def generate_signals(self, symbol, from_ts, to_ts, timeframe='1d', indicators=None, incremental=False):
+        if symbol == 'SLOW':
+            self.slow_waited_for_fast = self.fast_ordered.wait(timeout=5)
+        return pd.DataFrame(
+            {'signal': ['BUY'], 'confidence': [1.0], 'price': [1.1], 'strategy_id': ['test']},
+            index=[pd.Timestamp('2024-01-03 10:00')]
+        )
+
+
+class FakeConnector:
+    def __init__(self):
+        self.threads = []
+
+    def get_symbol_info(self, symbol):
+        self.threads.append(threading.current_thread().name)
+        if symbol == 'BOOM':
+            raise RuntimeError('symbol info failed')
+        return {'bid': 1.1, 'ask': 1.1002}
+
+    def get_account_info(self):
+        self.threads.append(threading.current_thread().name)
+        return {'balance': 10000.0, 'margin_free': 10000.0}
+
+
+class FakeExecutor:
+    def __init__(self, fast_ordered):
+        self.fast_ordered = fast_ordered
+        self.orders = []
+        self.threads = []
+
+    def generate_client_order_id(self, symbol, signal_id):
+        return f"order_{signal_id}"
+
+    def execute_order(self, order_request, client_order_id):
+        self.threads.append(threading.current_thread().name)
+        self.orders.append(order_request['symbol'])
+        if order_request['symbol'] == 'FAST':
+            self.fast_ordered.set()
+        return {'success': True, 'mt5_order_id': len(self.orders), 'executed_price': order_request['price']}
+
+
+class FakeAudit:
+    def __init__(self):
+        self.events = []
+
+    def log_signal(self, **kwargs):
+        pass
+
+    def log_order(self, **kwargs):
+        pass
+
+    def update_order(self, **kwargs):
+        pass
+
+    def log_event(self, **kwargs):
+        self.events.append(kwargs)
+
+
+def make_trader(symbols):
+    fast_ordered = threading.Event()
+    trader = LiveTrader.__new__(LiveTrader)
+    trader.config = SimpleNamespace(
+        get_timeframe=lambda symbol: '1h', default_risk_pct=1.0, max_position_size=1.0,
+        magic_number=123456, strategy_id='test'
+    )
+    trader.bridge = FakeBridge(fast_ordered)
+    trader.connector = FakeConnector()
+    trader.executor = FakeExecutor(fast_ordered)
+    trader.state = StateManager(SimpleNamespace(state_db_path=None))
+    trader.audit = FakeAudit()
+    trader.signal_executor = ThreadPoolExecutor(max_workers=len(symbols), thread_name_prefix='signals')
+    trader.mt5_queue = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5')
+    return trader
+
+
+def test_symbols_processed_concurrently_with_mt5_calls_on_one_thread():
+    symbols = ['SLOW', 'BOOM', 'FAST']
+    trader = make_trader(symbols)
+    try:
+        trader._process_symbols(symbols)
+    finally:
+        trader.signal_executor.shutdown()
+        trader.mt5_queue.shutdown()
+
+    # SLOW was still generating its signal when FAST's order went out
+    assert trader.bridge.slow_waited_for_fast is True
+    assert trader.executor.orders == ['FAST', 'SLOW']
+
+    # Every MT5 call and order submission ran on the one queue thread
+    mt5_threads = set(trader.connector.threads + trader.executor.threads)
+    assert len(mt5_threads) == 1
+    assert mt5_threads.pop().startswith('mt5')
+
+    # BOOM failed on its own without stopping the batch
+    assert [event['event_type'] for event in trader.audit.events] == ['PROCESSING_ERROR']
+    assert 'BOOM' in trader.audit.events[0]['message']
+    assert set(trader.state.positions) == {'FAST', 'SLOW'}
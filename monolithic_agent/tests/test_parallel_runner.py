@@ -0,0 +1,99 @@
+"""
+Tests for the multi-symbol parallel backtest runner.
+"""
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Backtest import parallel_runner
+from Backtest.parallel_runner import periods_per_year, run_parallel_backtest
+
+
+def symbol_result(symbol, cash, index):
+    equity = pd.Series(np.linspace(cash, cash * 1.1, len(index)), index=index)
+    trades = pd.DataFrame({
+        'EntryTime': [index[1]],
+        'ExitTime': [index[-1]],
+        'PnL': [cash * 0.1],
+        'ReturnPct': [0.1],
+    })
+    return {
+        'symbol': symbol,
+        'success': True,
+        'equity': equity,
+        'trades': trades,
+        'summary': {'symbol': symbol, 'success': True},
+    }
+
+
+def fake_chunk(index):
+    def run(tasks):
+        return [symbol_result(task['symbol'], task['cash'], index) for task in tasks]
+    return run
+
+
+@pytest.mark.parametrize("interval, expected", [
+    ('1d', 252),
+    ('1wk', 52),
+    ('1mo', 12),
+    ('1h', 252 * 7),
+    ('60m', 252 * 7),
+    ('5m', 252 * 78),
+    ('unknown', 252),
+])
+def test_periods_per_year(interval, expected):
+    assert periods_per_year(interval) == expected
+
+
+def test_duplicate_symbols_run_once():
+    index = pd.date_range('2024-01-02', periods=10, freq='D')
+    tasks_seen = []
+
+    def run(tasks):
+        tasks_seen.extend(tasks)
+        return fake_chunk(index)(tasks)
+
+    with patch.object(parallel_runner, 'run_symbol_chunk', side_effect=run):
+        result = run_parallel_backtest(
+            '{}', ['AAPL', 'MSFT', 'AAPL'], '2024-01-01', '2024-02-01',
+            initial_capital=10000, slippage=0.0005, max_workers=1
+        )
+
+    assert [t['symbol'] for t in tasks_seen] == ['AAPL', 'MSFT']
+    assert all(t['cash'] == 5000 and t['slippage'] == 0.0005 for t in tasks_seen)
+    assert [r['symbol'] for r in result['symbol_results']] == ['AAPL', 'MSFT']
+    assert result['metrics']['total_trades'] == 2
+    assert result['metrics']['final_portfolio_value'] == pytest.approx(11000)
+
+
+def test_intraday_returns_annualized_per_bar():
+    index = pd.date_range('2024-01-02 09:30', periods=20, freq='h')
+
+    def annualized(interval):
+        with patch.object(parallel_runner, 'run_symbol_chunk', side_effect=fake_chunk(index)):
+            result = run_parallel_backtest(
+                '{}', ['AAPL'], '2024-01-01', '2024-02-01',
+                interval=interval, initial_capital=10000, max_workers=1
+            )
+        return result['metrics']['annualized_return']
+
+    n_periods = len(index) - 1
+    assert annualized('1h') == pytest.approx((1.1 ** (252 * 7 / n_periods) - 1) * 100)
+    assert annualized('1h') > annualized('1d')
+
+
+def test_open_ended_ranges_are_not_cached(tmp_path):
+    bars = pd.DataFrame({'Close': [1.0, 2.0]}, index=pd.date_range('2024-01-02', periods=2))
+    today = pd.Timestamp.today().strftime('%Y-%m-%d')
+
+    with patch('Backtest.backtesting_adapter.fetch_and_prepare_data', return_value=bars) as fetch:
+        parallel_runner.load_cached_bars('AAPL', '2024-01-01', today, cache_dir=tmp_path)
+        parallel_runner.load_cached_bars('AAPL', '2024-01-01', today, cache_dir=tmp_path)
+        assert fetch.call_count == 2
+        assert not list(tmp_path.iterdir())
+
+        parallel_runner.load_cached_bars('AAPL', '2024-01-01', '2024-02-01', cache_dir=tmp_path)
+        parallel_runner.load_cached_bars('AAPL', '2024-01-01', '2024-02-01', cache_dir=tmp_path)
+        assert fetch.call_count == 3
@@ -0,0 +1,146 @@
+"""
+Tests for BacktestingAdapter walk-forward optimization.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from backtesting import Backtest, Strategy
+from backtesting.lib import crossover
+from backtesting.test import SMA
+
+from Backtest.backtesting_adapter import BacktestingAdapter, _walk_forward_windows, _with_indicator_cache
+
+SMA_CALLS = []
+
+
+def make_data(n_bars=300, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.002, n_bars)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1000, 5000, n_bars),
+    }, index=pd.date_range('2023-01-02', periods=n_bars, freq='D'))
+
+
+def counting_sma(values, n):
+    SMA_CALLS.append((n, len(values)))
+    return SMA(values, n)
+
+
+class SmaCross(Strategy):
+    n1 = 5
+    n2 = 20
+
+    def init(self):
+        self.fast = self.I(counting_sma, self.data.Close, self.n1)
+        self.slow = self.I(counting_sma, self.data.Close, self.n2)
+
+    def next(self):
+        if crossover(self.fast, self.slow):
+            self.position.close()
+            self.buy()
+        elif crossover(self.slow, self.fast):
+            self.position.close()
+
+
+class DefaultArgSmas(Strategy):
+    def init(self):
+        # Same code object for both, told apart only by the default
+        self.smas = [self.I(lambda c, n=n: SMA(c, n), self.data.Close) for n in (5, 20)]
+
+    def next(self):
+        pass
+
+
+def test_default_arg_indicators_are_not_conflated():
+    data = make_data()
+    cache = {}
+    strategy = Backtest(data, _with_indicator_cache(DefaultArgSmas, data, cache, 0)).run()._strategy
+
+    fast, slow = strategy.smas
+    np.testing.assert_allclose(fast[-1], SMA(data.Close, 5).iloc[-1])
+    np.testing.assert_allclose(slow[-1], SMA(data.Close, 20).iloc[-1])
+    assert len(cache) == 2
+
+
+def test_windows_roll_and_anchor():
+    assert _walk_forward_windows(100, 40, 20, 20, False) == [(0, 40, 60), (20, 60, 80), (40, 80, 100)]
+    assert _walk_forward_windows(100, 40, 20, 30, False) == [(0, 40, 60), (30, 70, 90)]
+    assert _walk_forward_windows(100, 40, 20, 20, True) == [(0, 40, 60), (0, 60, 80), (0, 80, 100)]
+    assert _walk_forward_windows(50, 40, 20, 20, False) == []
+
+
+def test_indicators_computed_once_per_parameter_value_and_span():
+    SMA_CALLS.clear()
+    adapter = BacktestingAdapter(make_data(), SmaCross, commission=0.0)
+
+    result = adapter.walk_forward_optimize(
+        train_size=120, test_size=60, max_workers=1, n1=[5, 10], n2=[20, 30]
+    )
+
+    # 3 windows x 4 combinations, in- and out-of-sample, compute each
+    # indicator once per window end; none is computed over bars past its window
+    assert len(result['windows']) == 3
+    assert len(set(SMA_CALLS)) == len(SMA_CALLS)
+    assert {end for _, end in SMA_CALLS} == {120, 180, 240, 300}
+    assert {(n, end) for n in (5, 10, 20, 30) for end in (120, 180, 240)} <= set(SMA_CALLS)
+
+
+def centered_mean(values):
+    # Not causal: each bar averages the bars on both sides of it
+    return pd.Series(values).rolling(5, center=True, min_periods=1).mean().to_numpy()
+
+
+class CenteredMeanStrategy(Strategy):
+    def init(self):
+        self.mean = self.I(centered_mean, self.data.Close)
+
+    def next(self):
+        pass
+
+
+def test_cached_indicators_do_not_see_later_bars():
+    data = make_data()
+    cache = {}
+
+    in_sample = Backtest(data.iloc[100:120], _with_indicator_cache(CenteredMeanStrategy, data.iloc[:120], cache, 100))
+    mean = in_sample.run()._strategy.mean
+
+    np.testing.assert_allclose(mean[-1], data.Close.iloc[117:120].mean())
+    assert len(cache) == 1
+
+
+def test_out_of_sample_windows_are_stitched():
+    data = make_data()
+    adapter = BacktestingAdapter(data, SmaCross, cash=10000, commission=0.0)
+
+    result = adapter.walk_forward_optimize(
+        train_size=120, test_size=60, max_workers=1, n1=[5, 10], n2=[20, 30]
+    )
+    windows = result['windows']
+
+    assert list(windows['test_start']) == [data.index[120], data.index[180], data.index[240]]
+    assert list(windows['test_end']) == [data.index[179], data.index[239], data.index[299]]
+    assert set(windows['n1']) <= {5, 10} and set(windows['n2']) <= {20, 30}
+
+    # One equity point per out-of-sample bar, compounding each window's return
+    equity = result['equity']
+    assert len(equity) == 180
+    assert equity.index[0] == data.index[120] and equity.index[-1] == data.index[-1]
+    compounded = np.prod(1 + windows['out_of_sample_return_pct'] / 100)
+    assert result['return_pct'] == pytest.approx((compounded - 1) * 100)
+    assert equity.iloc[-1] == pytest.approx(10000 * compounded)
+
+
+def test_parallel_windows_match_sequential():
+    adapter = BacktestingAdapter(make_data(), SmaCross, commission=0.0)
+    kwargs = dict(train_size=120, test_size=60, n1=[5, 10], n2=[20, 30])
+
+    sequential = adapter.walk_forward_optimize(max_workers=1, **kwargs)
+    parallel = adapter.walk_forward_optimize(max_workers=2, **kwargs)
+
+    pd.testing.assert_frame_equal(sequential['windows'], parallel['windows'])
+    pd.testing.assert_series_equal(sequential['equity'], parallel['equity'])
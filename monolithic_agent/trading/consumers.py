@@ -5,9 +5,17 @@ Sends candle data and trade signals sequentially as the backtest runs
 
 import json
 import asyncio
+import contextvars
+import functools
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from django.conf import settings
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from asgiref.sync import sync_to_async
 import sys
 from pathlib import Path
 
@@ -15,6 +23,20 @@ from pathlib import Path
 BACKTEST_DIR = Path(__file__).parent.parent.parent / "Backtest"
 sys.path.insert(0, str(BACKTEST_DIR))
 
+from trading.streams import (
+    stream_group_name,
+    claim_stream,
+    stream_owner,
+    release_stream,
+    add_viewer,
+    remove_viewer,
+    viewer_count,
+    apublish_backtest_event,
+    asend_stream_control,
+    ACK_TYPE,
+    LEAVE_TYPE,
+    STOP_TYPE,
+)
 from Backtest.sim_broker import SimBroker
 from Backtest.config import BacktestConfig
 from Backtest.data_loader import load_market_data
@@ -32,6 +54,87 @@ except ImportError:
     Strategy = None
 
 
+# Seconds between heartbeat messages while a blocking phase runs
+HEARTBEAT_INTERVAL = 2.0
+
+# Default playback speed in bars per second (0 = instant)
+DEFAULT_PLAYBACK_SPEED = 50.0
+
+# Target frames per second when sizing frames from the playback speed
+TARGET_FRAME_RATE = 20.0
+
+# Largest frame sent in frames mode (bars)
+MAX_FRAME_BARS = 5000
+
+# Seconds a shared run waits on a viewer's acks before it stops waiting for it
+SHARED_ACK_TIMEOUT = 10.0
+
+# Shared, bounded pool for data loading and backtest runs. Keeping these off
+# the event loop lets one ASGI worker serve many streaming sessions at once.
+_backtest_executor = None
+_backtest_executor_lock = threading.Lock()
+
+
+def get_backtest_executor() -> ThreadPoolExecutor:
+    """Lazily create the shared backtest executor"""
+    global _backtest_executor
+    with _backtest_executor_lock:
+        if _backtest_executor is None:
+            _backtest_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKTEST_STREAM_WORKERS', 4),
+                thread_name_prefix='backtest-stream'
+            )
+    return _backtest_executor
+
+
+class BacktestCancelled(Exception):
+    """Raised inside a worker when the client has gone away"""
+
+
+class StreamRun:
+    """
+    State of one backtest stream, owned by the task running it.
+
+    Kept off the consumer because a socket can start a new stream while an
+    older one (a shared run it left, or a worker still winding down) is
+    running.
+    """
+
+    def __init__(self, publish_key: str = None):
+        self.publish_key = publish_key      # shared run key when publishing to a group
+        self.control_channel = None         # shared runs: where viewers send acks
+        self.cancel_event = threading.Event()
+        self.ack_event = asyncio.Event()
+        self.frames_acked = 0               # private streams: last frame acked
+        self.viewer_acks = {}               # shared runs: viewer -> last frame acked
+
+    def record_ack(self, frame: int, viewer: str = None):
+        """Record a client ack, from a viewer of a shared run or the socket"""
+        if viewer is None:
+            self.frames_acked = max(self.frames_acked, frame)
+        else:
+            self.viewer_acks[viewer] = max(self.viewer_acks.get(viewer, 0), frame)
+        self.ack_event.set()
+
+    def acked_frames(self, frames_sent: int) -> int:
+        """
+        Frames the clients have confirmed. A shared run follows its slowest
+        acking viewer; viewers that never ack don't hold it back.
+        """
+        if not self.publish_key:
+            return self.frames_acked
+        return min(self.viewer_acks.values()) if self.viewer_acks else frames_sent
+
+    def drop_slowest_viewer(self):
+        """Stop waiting for the viewer furthest behind"""
+        if self.viewer_acks:
+            del self.viewer_acks[min(self.viewer_acks, key=self.viewer_acks.get)]
+
+
+# Stream state of the task being run (set by BacktestStreamConsumer.start_run)
+_current_run: contextvars.ContextVar = contextvars.ContextVar('backtest_stream_run', default=None)
+
+
 class BacktestStreamConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer that streams backtest progress in real-time
@@ -40,14 +143,169 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         """Accept WebSocket connection"""
         self.is_connected = True
+        self.stream_task = None
+        self.run = None             # state of the stream this socket started
+        self.playback_speed = DEFAULT_PLAYBACK_SPEED
+        self.stream_key = None      # shared run this socket is watching
+        self.stream_control = None  # control channel of that run's worker
         await self.accept()
         print("📡 WebSocket connected for backtest streaming")
 
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
         self.is_connected = False
+        await self.stop_current_stream()
         print(f"📡 WebSocket disconnected: {close_code}")
 
+    async def stop_current_stream(self):
+        """
+        Leave the current stream. A shared run keeps computing while other
+        viewers are still watching it and is stopped (on whichever worker
+        computes it) when its last viewer leaves; anything else is cancelled.
+        """
+        run, self.run = self.run, None
+        if self.stream_key:
+            run_key, control = self.stream_key, self.stream_control
+            self.stream_key = self.stream_control = None
+            await self.channel_layer.group_discard(stream_group_name(run_key), self.channel_name)
+            remaining = await sync_to_async(remove_viewer)(run_key)
+
+            if remaining > 0:
+                # Don't hold the run back waiting for this viewer's acks
+                await asend_stream_control(control, {"type": LEAVE_TYPE, "viewer": self.channel_name})
+                if run is not None:
+                    print(f"📡 Leaving shared run running for {remaining} viewer(s)")
+                    self.stream_task = None
+                    return
+            else:
+                await asend_stream_control(control, {"type": STOP_TYPE})
+        await self.cancel_stream(run)
+
+    def start_run(self, run: StreamRun, stream, *args):
+        """Run a stream coroutine in its own task, with `run` as its state"""
+        async def run_stream():
+            _current_run.set(run)
+            await stream(*args)
+
+        self.run = run
+        self.stream_task = asyncio.ensure_future(run_stream())
+
+    async def join_shared_stream(self, run_key: str, config: dict):
+        """
+        Watch a shared run, computing it if no worker is doing so yet.
+
+        Viewers of the same run_key join one channel-layer group; the first
+        one to claim the run computes it and publishes every message to the
+        group, so all viewers (on any ASGI worker when the Redis layer is
+        configured) share a single computation.
+        """
+        self.stream_key = str(run_key)
+        await self.channel_layer.group_add(stream_group_name(self.stream_key), self.channel_name)
+        viewers = await sync_to_async(add_viewer)(self.stream_key)
+
+        run = StreamRun(publish_key=self.stream_key)
+        run.control_channel = await self.channel_layer.new_channel()
+        if await sync_to_async(claim_stream)(self.stream_key, run.control_channel):
+            self.stream_control = run.control_channel
+            if config.get("ack_window"):
+                # The owner negotiated acks, so frames wait for its client from the start
+                run.viewer_acks[self.channel_name] = 0
+            self.start_run(run, self.run_shared_stream, self.stream_key, config)
+        else:
+            self.stream_control = await sync_to_async(stream_owner)(self.stream_key)
+            await self.safe_send({
+                "type": "metadata",
+                "status": "joined_stream",
+                "run_key": self.stream_key,
+                "viewers": viewers,
+            })
+
+    async def run_shared_stream(self, run_key: str, config: dict):
+        """Compute a shared run, releasing the claim when it ends"""
+        run = _current_run.get()
+        listener = asyncio.ensure_future(self.listen_for_control(run, run_key, asyncio.current_task()))
+        try:
+            await self.run_backtest_stream(config)
+        finally:
+            listener.cancel()
+            await sync_to_async(release_stream)(run_key)
+
+    async def listen_for_control(self, run: StreamRun, run_key: str, stream_task):
+        """Apply viewer acks, leaves and stop requests to a shared run"""
+        while True:
+            message = await self.channel_layer.receive(run.control_channel)
+            kind = message.get("type")
+            if kind == ACK_TYPE:
+                run.record_ack(int(message.get("frame", 0)), message.get("viewer"))
+            elif kind == LEAVE_TYPE:
+                run.viewer_acks.pop(message.get("viewer"), None)
+                run.ack_event.set()
+            elif kind == STOP_TYPE and await sync_to_async(viewer_count)(run_key) <= 0:
+                print("📡 Last viewer left, stopping shared run")
+                run.cancel_event.set()
+                stream_task.cancel()
+                return
+
+    async def backtest_event(self, event):
+        """Forward a shared-run message from the channel layer to the socket"""
+        await self.safe_send(event["payload"])
+
+    async def emit(self, data: dict) -> bool:
+        """
+        Send a stream message: to the shared run's group when the current
+        stream computes one, otherwise straight to this socket.
+        Returns False once the stream should stop.
+        """
+        run = _current_run.get()
+        if run is not None and run.publish_key:
+            if run.cancel_event.is_set():
+                return False
+            await apublish_backtest_event(run.publish_key, data)
+            return True
+        return await self.safe_send(data)
+
+    async def cancel_stream(self, run: StreamRun = None):
+        """Cancel the running stream (if any) and signal its worker to stop"""
+        if run is not None:
+            run.cancel_event.set()
+        task = getattr(self, 'stream_task', None)
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.stream_task = None
+
+    async def run_blocking(self, phase: str, func, *args, **kwargs):
+        """
+        Run a blocking call on the backtest executor.
+
+        Heartbeat messages are sent every HEARTBEAT_INTERVAL seconds while
+        the call runs. If the stream is cancelled, a call that has not started
+        yet is dropped; one already running is told to stop via the stream's
+        cancel_event (bar-by-bar loops check it) and its result is discarded.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            get_backtest_executor(), functools.partial(func, *args, **kwargs)
+        )
+        started = loop.time()
+        try:
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=HEARTBEAT_INTERVAL)
+                if done:
+                    return future.result()
+                await self.emit({
+                    "type": "heartbeat",
+                    "status": phase,
+                    "elapsed": round(loop.time() - started, 1),
+                })
+        except asyncio.CancelledError:
+            _current_run.get().cancel_event.set()
+            future.cancel()
+            raise
+
     def normalize_timestamp(self, ts) -> str:
         """
         Normalize timestamp to a consistent format for comparison.
@@ -87,6 +345,69 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
                 result = result.replace(' 00:00:00', '')
             return result
 
+    def bar_timestamp(self, ts, tz=None) -> pd.Timestamp:
+        """
+        Parse a signal timestamp into the timezone of the bar index.
+
+        Offset-aware timestamps are converted to tz (or keep their wall-clock
+        time for a naive index); naive ones are taken to be in tz already.
+        """
+        key = pd.Timestamp(ts)
+        if pd.isna(key):
+            raise ValueError(f"Invalid timestamp: {ts!r}")
+        if key.tzinfo is None:
+            return key.tz_localize(tz) if tz is not None else key
+        return key.tz_convert(tz) if tz is not None else key.tz_localize(None)
+
+    def bar_positions(self, index, timestamps: list) -> list:
+        """
+        Map timestamps to bar positions in a DataFrame index.
+
+        Each timestamp is normalized once and located with searchsorted, so
+        matching trades to bars costs O(trades * log(bars)) instead of a
+        string comparison per bar and trade.
+
+        Returns:
+            List of bar positions (None where no bar matches exactly)
+        """
+        if isinstance(index, pd.DatetimeIndex) and index.is_monotonic_increasing:
+            positions = []
+            for ts in timestamps:
+                try:
+                    key = self.bar_timestamp(ts, index.tz)
+                    pos = int(index.searchsorted(key))
+                    positions.append(pos if pos < len(index) and index[pos] == key else None)
+                except (TypeError, ValueError):
+                    # Unparseable or incomparable timestamp: skip this signal
+                    positions.append(None)
+            return positions
+
+        # Fallback for non-datetime or unsorted indexes: one pass over the bars
+        normalized = [self.normalize_timestamp(ts) for ts in timestamps]
+        lookup = {}
+        for pos, ts in enumerate(index):
+            lookup.setdefault(self.normalize_timestamp(ts), pos)
+        return [lookup.get(ts) for ts in normalized]
+
+    def index_trades_by_bar(self, trades_list: list, index) -> dict:
+        """
+        Bucket trade entry/exit events by the bar they occur on.
+
+        Returns:
+            Dict of bar position -> list of ('ENTRY' | 'EXIT', trade), in the
+            order the signals should be sent
+        """
+        entry_bars = self.bar_positions(index, [t['entry_time'] for t in trades_list])
+        exit_bars = self.bar_positions(index, [t['exit_time'] for t in trades_list])
+
+        events = {}
+        for trade, entry_bar, exit_bar in zip(trades_list, entry_bars, exit_bars):
+            if entry_bar is not None:
+                events.setdefault(entry_bar, []).append(('ENTRY', trade))
+            if exit_bar is not None:
+                events.setdefault(exit_bar, []).append(('EXIT', trade))
+        return events
+
     def pair_fills_to_trades(self, fills: list) -> list:
         """
         Convert individual fills (BUY/SELL orders) into round-trip trades.
@@ -229,6 +550,9 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
         """
         Receive backtest configuration and start streaming
         
+        Other actions: "cancel_backtest", "set_speed" ({"speed": bars/s or
+        "instant"}) and "ack" ({"frame": n}, frames protocol only).
+        
         Expected message format:
         {
             "action": "start_backtest",
@@ -240,6 +564,12 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
                 "timeframe": "1d",
                 "initial_balance": 10000,
                 "lot_size": 1.0,
+                "protocol": "frames",      # optional, default per-candle messages
+                "speed": 500,              # bars/s or "instant" (default 50)
+                "frame_size": 100,         # optional, bars per frame
+                "ack_window": 4,           # optional, max unacked frames
+                "run_key": "...",          # optional, share one run between viewers
+
                 "commission": 0.001,
                 "slippage": 0.0005,
                 "indicators": {
@@ -255,7 +585,26 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
 
             if action == "start_backtest":
                 config = data.get("config", {})
-                await self.run_backtest_stream(config)
+                # Run in a task so disconnects are handled while streaming;
+                # a new request replaces any stream still in progress
+                await self.stop_current_stream()
+                if config.get("run_key"):
+                    await self.join_shared_stream(config["run_key"], config)
+                else:
+                    self.start_run(StreamRun(), self.run_backtest_stream, config)
+            elif action == "cancel_backtest":
+                await self.stop_current_stream()
+            elif action == "set_speed":
+                self.set_playback_speed(data.get("speed"))
+            elif action == "ack":
+                # Frames mode flow control: client confirms frames it has rendered
+                frame = int(data.get("frame", 0))
+                if self.stream_key:
+                    await asend_stream_control(self.stream_control, {
+                        "type": ACK_TYPE, "frame": frame, "viewer": self.channel_name
+                    })
+                elif self.run is not None:
+                    self.run.record_ack(frame)
             else:
                 await self.safe_send({
                     "type": "error",
@@ -288,6 +637,129 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
         }
         return period_map.get(period.lower(), period)
 
+    def set_playback_speed(self, speed):
+        """Set playback speed in bars per second ("instant" or 0 = no pacing)"""
+        if speed in (None, ''):
+            return
+        if isinstance(speed, str) and speed.lower() == 'instant':
+            self.playback_speed = 0.0
+        else:
+            self.playback_speed = max(float(speed), 0.0)
+
+    def frame_size_for_speed(self, requested=None) -> int:
+        """
+        Bars per frame: the client's request, or sized from the playback
+        speed so roughly TARGET_FRAME_RATE frames are sent per second
+        """
+        if requested:
+            return max(1, min(int(requested), MAX_FRAME_BARS))
+        if not self.playback_speed:
+            return MAX_FRAME_BARS
+        return max(1, min(int(self.playback_speed / TARGET_FRAME_RATE), MAX_FRAME_BARS))
+
+    async def pace(self, clock: dict, bars: int):
+        """
+        Wait until `bars` more bars are due at the current playback speed.
+
+        Pacing is scheduled against a clock rather than sleeping a fixed time
+        after each send, so time spent sending counts towards the delay. The
+        clock is re-anchored when the speed changes.
+        """
+        loop = asyncio.get_running_loop()
+        speed = self.playback_speed
+        if clock.get('speed') != speed:
+            clock.update(speed=speed, start=loop.time(), bars=0)
+        clock['bars'] += bars
+        delay = clock['start'] + clock['bars'] / speed - loop.time() if speed else 0
+        await asyncio.sleep(max(delay, 0))
+
+    async def wait_for_acks(self, frames_sent: int, window: int) -> bool:
+        """
+        Block while `window` or more frames are unacknowledged.
+
+        Shared runs wait for their slowest acking viewer, but no longer than
+        SHARED_ACK_TIMEOUT for one that went quiet without leaving.
+        """
+        run = _current_run.get()
+        while frames_sent - run.acked_frames(frames_sent) >= window:
+            if not run.publish_key and not getattr(self, 'is_connected', False):
+                return False
+            if run.cancel_event.is_set():
+                return False
+            run.ack_event.clear()
+            try:
+                await asyncio.wait_for(
+                    run.ack_event.wait(), SHARED_ACK_TIMEOUT if run.publish_key else None
+                )
+            except asyncio.TimeoutError:
+                run.drop_slowest_viewer()
+        return True
+
+    async def stream_frames(self, data_df, signals_by_bar: dict, frame_size=None, ack_window=None) -> bool:
+        """
+        Stream candles and signals as batched, columnar "frame" messages.
+
+        Each frame carries up to frame_size bars as parallel arrays plus the
+        signals falling on them. Frames are paced at the playback speed
+        (none in instant mode) and, if the client negotiated an ack window,
+        held back while that many frames are unacknowledged.
+
+        Returns:
+            False if the client disconnected mid-stream
+        """
+        total_bars = len(data_df)
+        columns = {c.lower(): c for c in data_df.columns}
+        arrays = {
+            name: data_df[columns[name]].to_numpy(dtype=float) if name in columns else np.zeros(total_bars)
+            for name in ('open', 'high', 'low', 'close', 'volume')
+        }
+        timestamps = [str(ts) for ts in data_df.index]
+
+        clock = {}
+        frame_number = 0
+        start = 0
+
+        while start < total_bars:
+            # Re-evaluated per frame so speed changes take effect mid-stream
+            size = self.frame_size_for_speed(frame_size)
+            end = min(start + size, total_bars)
+
+            signals = []
+            for bar in range(start, end):
+                for action, trade in signals_by_bar.get(bar, ()):
+                    signal = {
+                        "bar": bar,
+                        "action": action,
+                        "size": abs(trade['size']),
+                    }
+                    if action == 'ENTRY':
+                        signal.update(side="BUY" if trade['size'] > 0 else "SELL", price=trade['entry_price'])
+                    else:
+                        signal.update(side="CLOSE", price=trade['exit_price'], pnl=trade['pnl'])
+                    signals.append(signal)
+
+            frame_number += 1
+            if not await self.emit({
+                "type": "frame",
+                "frame": frame_number,
+                "start_bar": start,
+                "bar_count": end - start,
+                "progress": end / total_bars * 100,
+                "timestamps": timestamps[start:end],
+                **{name: values[start:end].tolist() for name, values in arrays.items()},
+                "signals": signals,
+            }):
+                print(f"⚠️  Client disconnected at bar {start}/{total_bars}")
+                return False
+
+            # Nothing left to hold back after the last frame
+            if ack_window and end < total_bars and not await self.wait_for_acks(frame_number, int(ack_window)):
+                return False
+            await self.pace(clock, end - start)
+            start = end
+
+        return True
+
     async def run_backtest_stream(self, config: dict):
         """
         Run backtest with backtesting.py and stream visualization
@@ -301,6 +773,8 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
         Args:
             config: Backtest configuration dictionary
         """
+        # Captured so a worker of this run never checks a later run's event
+        cancel_event = _current_run.get().cancel_event
         try:
             # Extract configuration with type conversion
             symbol = config.get("symbol", "AAPL")
@@ -309,6 +783,8 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             interval = config.get("interval", "1d")
             strategy_code = config.get("strategy_code")  # Strategy code or canonical JSON
             strategy_id = config.get("strategy_id")  # Strategy ID for database storage
+            protocol = config.get("protocol", "candles")  # "candles" (one message per bar) or "frames"
+            self.set_playback_speed(config.get("speed", DEFAULT_PLAYBACK_SPEED))
             
             # Add default indicators if none provided (most strategies need these)
             # Use uppercase names and correct format for multi-period indicators
@@ -333,7 +809,7 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             print(f"   Slippage: {slippage}")
             
             # Send initial metadata
-            if not await self.safe_send({
+            if not await self.emit({
                 "type": "metadata",
                 "symbol": symbol,
                 "period": period,
@@ -345,7 +821,9 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             
             # STEP 1: Load all data (not streaming, need full dataset for backtesting.py)
             print(f"📥 Loading data for {symbol}...")
-            result = load_market_data(
+            result = await self.run_blocking(
+                "loading_data",
+                load_market_data,
                 ticker=symbol,
                 indicators=indicators,
                 period=period,
@@ -370,7 +848,7 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             
             if strategy_code:
                 print(f"🚀 Running backtest with strategy...")
-                await self.safe_send({
+                await self.emit({
                     "type": "metadata",
                     "status": "running_backtest",
                     "total_bars": total_bars
@@ -387,53 +865,35 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
                         is_json = False
                     
                     if is_json:
-                        # Create strategy class from canonical JSON
-                        strategy_class = create_strategy_from_canonical(canonical_json)
-                        
-                        # Run backtest
-                        adapter = BacktestingAdapter(
-                            data=data_df,
-                            strategy_class=strategy_class,
-                            cash=initial_balance,
-                            commission=commission,
-                            trade_on_close=True
+                        trades_list, backtest_results = await self.run_blocking(
+                            "running_backtest",
+                            self.execute_canonical_strategy,
+                            canonical_json=canonical_json,
+                            data_df=data_df,
+                            initial_balance=initial_balance,
+                            commission=commission
                         )
-                        
-                        backtest_results = adapter.run()
-                        
-                        # Extract trades
-                        if hasattr(adapter.results, '_trades') and adapter.results._trades is not None:
-                            trades_df = adapter.results._trades
-                            print(f"📋 Extracting {len(trades_df)} trades from backtesting.py results")
-                            for _, trade in trades_df.iterrows():
-                                trade_pnl = float(trade.get('PnL', 0))
-                                trades_list.append({
-                                    'entry_time': str(trade.get('EntryTime', '')),
-                                    'exit_time': str(trade.get('ExitTime', '')),
-                                    'entry_price': float(trade.get('EntryPrice', 0)),
-                                    'exit_price': float(trade.get('ExitPrice', 0)),
-                                    'size': float(trade.get('Size', 0)),
-                                    'pnl': trade_pnl,
-                                    'return_pct': float(trade.get('ReturnPct', 0))
-                                })
-                            total_pnl_from_trades = sum(t['pnl'] for t in trades_list)
-                            print(f"💰 Total PnL from trades: ${total_pnl_from_trades:.2f}")
-                        
                         print(f"✅ Backtest complete (JSON strategy): {len(trades_list)} trades")
                     
                     else:
                         # Execute Python strategy code directly
                         print("🐍 Executing Python strategy code...")
-                        trades_list, backtest_results = await self.execute_python_strategy(
+                        trades_list, backtest_results = await self.run_blocking(
+                            "running_backtest",
+                            self.execute_python_strategy,
                             strategy_code=strategy_code,
                             data_df=data_df,
                             symbol=symbol,
                             initial_balance=initial_balance,
                             lot_size=lot_size,
-                            commission=commission
+                            commission=commission,
+                            cancel_event=cancel_event
                         )
                         print(f"✅ Backtest complete (Python strategy): {len(trades_list)} trades")
                     
+                except BacktestCancelled:
+                    print("⚠️  Backtest cancelled")
+                    return
                 except Exception as e:
                     print(f"⚠️  Error running backtest: {e}")
                     import traceback
@@ -453,7 +913,7 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             print(f"📊 Actual stats: {actual_total_trades} trades, {actual_winning} wins, {actual_losing} losses, PnL=${actual_pnl:.2f}, WinRate={actual_win_rate:.1f}%")
             
             # Send actual stats immediately so frontend shows real data
-            await self.safe_send({
+            await self.emit({
                 "type": "stats",
                 "total_trades": actual_total_trades,
                 "winning_trades": actual_winning,
@@ -462,11 +922,13 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
                 "win_rate": actual_win_rate,
             })
             
-            if not await self.safe_send({
+            if not await self.emit({
                 "type": "metadata",
                 "status": "streaming_visualization",
                 "total_bars": total_bars,
-                "total_trades": actual_total_trades
+                "total_trades": actual_total_trades,
+                "protocol": protocol,
+                "speed": self.playback_speed or "instant",
             }):
                 print("⚠️  Client disconnected before visualization started")
                 return
@@ -484,84 +946,86 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
                 for t in trades_list[:3]:
                     print(f"   Entry: '{t['entry_time']}', Exit: '{t['exit_time']}', PnL: ${t['pnl']:.2f}")
             
-            # Get first DataFrame timestamp for format comparison
-            first_df_ts = data_df.index[0] if len(data_df) > 0 else None
-            if first_df_ts is not None:
-                normalized_first = self.normalize_timestamp(first_df_ts)
-                print(f"📊 First DataFrame timestamp: raw='{first_df_ts}', normalized='{normalized_first}'")
+            # Bucket trade signals by bar once up front
+            signals_by_bar = self.index_trades_by_bar(trades_list, data_df.index)
+            print(f"📊 Matched trade signals to {len(signals_by_bar)} bars")
             
-            for idx, (timestamp, row) in enumerate(data_df.iterrows()):
-                bar_number += 1
-                progress_pct = (bar_number / total_bars) * 100
-                
-                # Normalize the DataFrame timestamp for comparison
-                normalized_ts = self.normalize_timestamp(timestamp)
-                
-                # Send candle data - exit loop if client disconnected
-                if not await self.safe_send({
-                    "type": "candle",
-                    "bar_number": bar_number,
-                    "progress": progress_pct,
-                    "timestamp": str(timestamp),
-                    "open": float(row.get("open", row.get("Open", 0))),
-                    "high": float(row.get("high", row.get("High", 0))),
-                    "low": float(row.get("low", row.get("Low", 0))),
-                    "close": float(row.get("close", row.get("Close", 0))),
-                    "volume": float(row.get("volume", row.get("Volume", 0))),
-                }):
-                    print(f"⚠️  Client disconnected at bar {bar_number}/{total_bars}")
+            if protocol == "frames":
+                if not await self.stream_frames(
+                    data_df,
+                    signals_by_bar,
+                    frame_size=config.get("frame_size"),
+                    ack_window=config.get("ack_window")
+                ):
                     return
+            else:
+                clock = {}
+                for idx, (timestamp, row) in enumerate(data_df.iterrows()):
+                    bar_number += 1
+                    progress_pct = (bar_number / total_bars) * 100
                 
-                # Check for trades at this timestamp using normalized comparison
-                for trade in trades_list:
-                    # Send entry signal
-                    if trade['entry_time'] == normalized_ts:
-                        side = "BUY" if trade['size'] > 0 else "SELL"
-                        print(f"[SIGNAL] Sending {side} ENTRY at {normalized_ts}: ${trade['entry_price']:.2f} x {abs(trade['size'])}")
-                        await self.safe_send({
-                            "type": "signal",
-                            "timestamp": str(timestamp),
-                            "action": "ENTRY",
-                            "side": side,
-                            "price": trade['entry_price'],
-                            "size": abs(trade['size']),
-                        })
-                    
-                    # Send exit signal (use normalized timestamp for comparison)
-                    if trade['exit_time'] == normalized_ts:
-                        trades_sent += 1
-                        if trade['pnl'] > 0:
-                            winning_trades += 1
+                    # Send candle data - exit loop if client disconnected
+                    if not await self.emit({
+                        "type": "candle",
+                        "bar_number": bar_number,
+                        "progress": progress_pct,
+                        "timestamp": str(timestamp),
+                        "open": float(row.get("open", row.get("Open", 0))),
+                        "high": float(row.get("high", row.get("High", 0))),
+                        "low": float(row.get("low", row.get("Low", 0))),
+                        "close": float(row.get("close", row.get("Close", 0))),
+                        "volume": float(row.get("volume", row.get("Volume", 0))),
+                    }):
+                        print(f"⚠️  Client disconnected at bar {bar_number}/{total_bars}")
+                        return
+                
+                    # Send the trade signals that fall on this bar
+                    for action, trade in signals_by_bar.get(idx, ()):
+                        if action == 'ENTRY':
+                            side = "BUY" if trade['size'] > 0 else "SELL"
+                            print(f"[SIGNAL] Sending {side} ENTRY at {timestamp}: ${trade['entry_price']:.2f} x {abs(trade['size'])}")
+                            await self.emit({
+                                "type": "signal",
+                                "timestamp": str(timestamp),
+                                "action": "ENTRY",
+                                "side": side,
+                                "price": trade['entry_price'],
+                                "size": abs(trade['size']),
+                            })
                         else:
-                            losing_trades += 1
-                        total_pnl += trade['pnl']
+                            trades_sent += 1
+                            if trade['pnl'] > 0:
+                                winning_trades += 1
+                            else:
+                                losing_trades += 1
+                            total_pnl += trade['pnl']
                         
-                        pnl_pct = (trade['pnl'] / trade['entry_price']) * 100 if trade['entry_price'] != 0 else 0
-                        print(f"[SIGNAL] Sending EXIT at {normalized_ts}: ${trade['exit_price']:.2f} | PnL: ${trade['pnl']:.2f} ({pnl_pct:+.2f}%)")
-                        await self.safe_send({
-                            "type": "signal",
-                            "timestamp": str(timestamp),
-                            "action": "EXIT",
-                            "side": "CLOSE",
-                            "price": trade['exit_price'],
-                            "size": abs(trade['size']),
-                            "pnl": trade['pnl'],
-                        })
+                            pnl_pct = (trade['pnl'] / trade['entry_price']) * 100 if trade['entry_price'] != 0 else 0
+                            print(f"[SIGNAL] Sending EXIT at {timestamp}: ${trade['exit_price']:.2f} | PnL: ${trade['pnl']:.2f} ({pnl_pct:+.2f}%)")
+                            await self.emit({
+                                "type": "signal",
+                                "timestamp": str(timestamp),
+                                "action": "EXIT",
+                                "side": "CLOSE",
+                                "price": trade['exit_price'],
+                                "size": abs(trade['size']),
+                                "pnl": trade['pnl'],
+                            })
                 
-                # Send updated statistics periodically (use actual stats, not visualization-matched)
-                # Every 50 bars, resend the actual stats so frontend stays updated
-                if bar_number % 50 == 0:
-                    await self.safe_send({
-                        "type": "stats",
-                        "total_trades": actual_total_trades,
-                        "winning_trades": actual_winning,
-                        "losing_trades": actual_losing,
-                        "pnl": actual_pnl,
-                        "win_rate": actual_win_rate,
-                    })
+                    # Send updated statistics periodically (use actual stats, not visualization-matched)
+                    # Every 50 bars, resend the actual stats so frontend stays updated
+                    if bar_number % 50 == 0:
+                        await self.emit({
+                            "type": "stats",
+                            "total_trades": actual_total_trades,
+                            "winning_trades": actual_winning,
+                            "losing_trades": actual_losing,
+                            "pnl": actual_pnl,
+                            "win_rate": actual_win_rate,
+                        })
                 
-                # Delay for visualization (adjust speed here)
-                await asyncio.sleep(0.02)  # 20ms = faster, 50ms = slower
+                    # Pace to the playback speed
+                    await self.pace(clock, 1)
             
             # Calculate final equity
             final_equity = initial_balance + actual_pnl
@@ -575,7 +1039,7 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             print(f"   Return: {total_return_pct:.2f}%")
             
             # Send final completion message with ACTUAL stats (not visualization-matched)
-            await self.safe_send({
+            await self.emit({
                 "type": "complete",
                 "total_bars": total_bars,
                 "metrics": {
@@ -593,7 +1057,7 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             })
             
             # Also send final stats message so frontend updates
-            await self.safe_send({
+            await self.emit({
                 "type": "stats",
                 "total_trades": actual_total_trades,
                 "winning_trades": actual_winning,
@@ -635,12 +1099,15 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             else:
                 print("ℹ️  No strategy_id provided, skipping DB save")
 
+        except asyncio.CancelledError:
+            print("⚠️  Backtest stream cancelled")
+            raise
         except Exception as e:
             print(f"❌ Backtest streaming error: {e}")
             import traceback
             traceback.print_exc()
             # Try to send error, but don't fail if client disconnected
-            await self.safe_send({
+            await self.emit({
                 "type": "error",
                 "message": str(e)
             })
@@ -656,17 +1123,69 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
         # TODO: Implement signal tracking in SimBroker
         return []
 
-    async def execute_python_strategy(
+    def execute_canonical_strategy(
+        self,
+        canonical_json: dict,
+        data_df,
+        initial_balance: float,
+        commission: float
+    ) -> tuple:
+        """
+        Run a canonical JSON strategy with backtesting.py (blocking, runs on
+        the backtest executor)
+        
+        Returns:
+            Tuple of (trades_list, backtest_results)
+        """
+        trades_list = []
+        
+        # Create strategy class from canonical JSON
+        strategy_class = create_strategy_from_canonical(canonical_json)
+        
+        # Run backtest
+        adapter = BacktestingAdapter(
+            data=data_df,
+            strategy_class=strategy_class,
+            cash=initial_balance,
+            commission=commission,
+            trade_on_close=True
+        )
+        
+        backtest_results = adapter.run()
+        
+        # Extract trades
+        if hasattr(adapter.results, '_trades') and adapter.results._trades is not None:
+            trades_df = adapter.results._trades
+            print(f"📋 Extracting {len(trades_df)} trades from backtesting.py results")
+            for _, trade in trades_df.iterrows():
+                trade_pnl = float(trade.get('PnL', 0))
+                trades_list.append({
+                    'entry_time': str(trade.get('EntryTime', '')),
+                    'exit_time': str(trade.get('ExitTime', '')),
+                    'entry_price': float(trade.get('EntryPrice', 0)),
+                    'exit_price': float(trade.get('ExitPrice', 0)),
+                    'size': float(trade.get('Size', 0)),
+                    'pnl': trade_pnl,
+                    'return_pct': float(trade.get('ReturnPct', 0))
+                })
+            total_pnl_from_trades = sum(t['pnl'] for t in trades_list)
+            print(f"💰 Total PnL from trades: ${total_pnl_from_trades:.2f}")
+        
+        return trades_list, backtest_results
+
+    def execute_python_strategy(
         self,
         strategy_code: str,
         data_df,
         symbol: str,
         initial_balance: float,
         lot_size: float,
-        commission: float
+        commission: float,
+        cancel_event: threading.Event = None
     ) -> tuple:
         """
-        Execute Python strategy code directly
+        Execute Python strategy code directly (blocking, runs on the backtest
+        executor; SimBroker loops stop early once cancel_event is set)
         
         Args:
             strategy_code: Python strategy code string
@@ -675,6 +1194,7 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             initial_balance: Starting cash
             lot_size: Position size for trades
             commission: Commission rate
+            cancel_event: Event of the stream this run belongs to
             
         Returns:
             Tuple of (trades_list, backtest_results)
@@ -688,6 +1208,8 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
         
         trades_list = []
         backtest_results = None
+        # Unique per run so concurrent sessions don't share a module
+        module_name = f"ws_strategy_{uuid.uuid4().hex}"
         
         # Create temporary file with Python code
         with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
@@ -696,12 +1218,12 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
         
         try:
             # Load strategy module
-            spec = importlib.util.spec_from_file_location("ws_strategy_module", strategy_file)
+            spec = importlib.util.spec_from_file_location(module_name, strategy_file)
             if not spec or not spec.loader:
                 raise ValueError("Failed to load strategy module")
             
             module = importlib.util.module_from_spec(spec)
-            sys.modules['ws_strategy_module'] = module
+            sys.modules[module_name] = module
             spec.loader.exec_module(module)
             
             # Try to find Strategy class (for backtesting.py framework)
@@ -801,6 +1323,9 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
                 
                 # Run backtest bar by bar
                 for idx, row in data_df.iterrows():
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise BacktestCancelled()
+                    
                     # Build market data dict with OHLCV and indicators
                     symbol_data = {
                         'open': float(row.get('Open', row.get('open', 0))),
@@ -868,8 +1393,7 @@ class BacktestStreamConsumer(AsyncWebsocketConsumer):
             # Clean up temporary file
             try:
                 os.unlink(strategy_file)
-                if 'ws_strategy_module' in sys.modules:
-                    del sys.modules['ws_strategy_module']
+                sys.modules.pop(module_name, None)
             except Exception as cleanup_error:
                 print(f"⚠️  Cleanup warning: {cleanup_error}")
         
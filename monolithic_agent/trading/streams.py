@@ -0,0 +1,107 @@
+"""
+Shared Backtest Streams
+Channel-layer groups that let several websocket viewers (on any ASGI worker)
+watch one backtest run, and let background workers publish into them.
+
+The worker computing a run listens on a control channel (stored as the run's
+owner) for viewer acks, viewers leaving, and a stop once nobody is watching.
+"""
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+
+# Seconds a stream owner claim stays valid without being released
+STREAM_OWNER_TTL = 60 * 60
+
+# Message type handled by BacktestStreamConsumer.backtest_event
+EVENT_TYPE = "backtest.event"
+
+# Control channel messages: a viewer acked a frame, a viewer left, stop the run
+ACK_TYPE = "backtest.ack"
+LEAVE_TYPE = "backtest.leave"
+STOP_TYPE = "backtest.stop"
+
+
+def stream_group_name(run_key: str) -> str:
+    """Channel-layer group for a shared run (group names allow [a-zA-Z0-9_.-])"""
+    safe_key = ''.join(ch if ch.isalnum() or ch in '_.-' else '_' for ch in str(run_key))
+    return f"backtest_stream.{safe_key}"[:99]
+
+
+def _owner_key(run_key: str) -> str:
+    return f"backtest_stream:owner:{stream_group_name(run_key)}"
+
+
+def _viewers_key(run_key: str) -> str:
+    return f"backtest_stream:viewers:{stream_group_name(run_key)}"
+
+
+def claim_stream(run_key: str, owner: str) -> bool:
+    """
+    Try to become the worker that computes a shared run.
+
+    Uses an atomic cache add, so with a shared cache (Redis) only one ASGI
+    worker in the deployment wins.
+
+    Args:
+        run_key: Shared run key
+        owner: Control channel the computing worker listens on
+    """
+    return cache.add(_owner_key(run_key), owner, STREAM_OWNER_TTL)
+
+
+def stream_owner(run_key: str):
+    """Control channel of the worker computing a shared run, or None"""
+    return cache.get(_owner_key(run_key))
+
+
+def release_stream(run_key: str):
+    """Release the compute claim once a shared run is finished"""
+    cache.delete(_owner_key(run_key))
+
+
+def add_viewer(run_key: str) -> int:
+    """Register a viewer of a shared run, returning the viewer count"""
+    cache.add(_viewers_key(run_key), 0, STREAM_OWNER_TTL)
+    return cache.incr(_viewers_key(run_key))
+
+
+def remove_viewer(run_key: str) -> int:
+    """Unregister a viewer of a shared run, returning the remaining count"""
+    try:
+        remaining = cache.decr(_viewers_key(run_key))
+    except ValueError:
+        return 0
+    if remaining <= 0:
+        cache.delete(_viewers_key(run_key))
+    return max(remaining, 0)
+
+
+def viewer_count(run_key: str) -> int:
+    """Number of viewers currently watching a shared run"""
+    return cache.get(_viewers_key(run_key), 0)
+
+
+async def asend_stream_control(control_channel: str, message: dict):
+    """Send a control message to the worker computing a shared run"""
+    if control_channel:
+        await get_channel_layer().send(control_channel, message)
+
+
+async def apublish_backtest_event(run_key: str, payload: dict):
+    """Send a stream message to every viewer of a shared run"""
+    channel_layer = get_channel_layer()
+    await channel_layer.group_send(
+        stream_group_name(run_key),
+        {"type": EVENT_TYPE, "payload": payload}
+    )
+
+
+def publish_backtest_event(run_key: str, payload: dict):
+    """
+    Synchronous variant of apublish_backtest_event for background workers
+    (management commands, task queues) that compute runs outside the ASGI
+    process
+    """
+    async_to_sync(apublish_backtest_event)(run_key, payload)
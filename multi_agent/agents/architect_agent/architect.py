@@ -18,6 +18,7 @@ from datetime import datetime
 from pathlib import Path
 
 from llm.router import get_request_router
+from llm.handles import gemini_model
 from contracts.event_types import EventType, Event
 from contracts.message_bus import MessageBus, Channels
 from fixture_manager import FixtureManager
@@ -76,8 +77,9 @@ class ArchitectAgent:
             # Fallback mode
             import google.generativeai as genai
             if api_key:
-                genai.configure(api_key=api_key)
-            self.fallback_model = genai.GenerativeModel("gemini-2.0-flash-exp")
+                self.fallback_model = gemini_model(api_key, "gemini-2.0-flash-exp")
+            else:
+                self.fallback_model = genai.GenerativeModel("gemini-2.0-flash-exp")
         
     async def start(self):
         """Start listening for design tasks"""
@@ -251,12 +253,9 @@ Output valid JSON only with structure:
                         print(f"[Architect] ✓ Pro model succeeded")
                     else:
                         # Direct Gemini fallback - try Pro model
-                        import google.generativeai as genai
-                        
                         pro_key = os.getenv('API_KEY_gemini_pro_01') or os.getenv('GEMINI_API_KEY')
                         if pro_key:
-                            genai.configure(api_key=pro_key)
-                            pro_model = genai.GenerativeModel("gemini-2.5-pro")
+                            pro_model = gemini_model(pro_key, "gemini-2.5-pro")
                             response = pro_model.generate_content(safe_prompt)
                             response_text = response.text
                             print(f"[Architect] ✓ Pro model succeeded")
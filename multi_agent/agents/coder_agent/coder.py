@@ -28,6 +28,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from llm.router import get_request_router
+from llm.handles import gemini_model
 from contracts import Event, EventType
 from contracts.message_bus import MessageBus, Channels
 
@@ -112,16 +113,13 @@ class CoderAgent:
             print(f"[CoderAgent {self.agent_id}] RequestRouter disabled - using fallback")
             # Fallback mode
             try:
-                import google.generativeai as genai
-                
                 # Get API key from parameter or environment
                 api_key = gemini_api_key or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
                 if not api_key:
                     print(f"[CoderAgent {self.agent_id}] WARNING: No API key found for fallback mode")
                     self.fallback_model = None
                 else:
-                    genai.configure(api_key=api_key)
-                    self.fallback_model = genai.GenerativeModel("gemini-2.0-flash-thinking-exp")
+                    self.fallback_model = gemini_model(api_key, "gemini-2.0-flash-thinking-exp")
             except ImportError:
                 print(f"[CoderAgent {self.agent_id}] WARNING: No Gemini available")
                 self.fallback_model = None
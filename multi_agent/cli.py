@@ -1341,6 +1341,40 @@ from adapters.base_adapter import BaseAdapter
         
         return report_data
     
+    def ask(self, question: str) -> Dict[str, Any]:
+        """
+        Ask the LLM a question, printing the answer as it streams in.
+        
+        Questions in one CLI session share a conversation.
+        
+        Args:
+            question: User question
+            
+        Returns:
+            Final stream event (send_chat() fields plus ttft_ms, tokens_per_sec)
+        """
+        from llm.router import get_request_router
+        
+        if not getattr(self, 'chat_conv_id', None):
+            self.chat_conv_id = f"cli_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        final = {}
+        for event in get_request_router().stream_chat(self.chat_conv_id, question, workload="light"):
+            if event['type'] == 'chunk':
+                print(event['content'], end='', flush=True)
+            else:
+                final = event
+        print()
+        
+        if final.get('success'):
+            print(f"   [{final['model']}] first token {final['ttft_ms']}ms, "
+                  f"{final.get('tokens_per_sec') or '-'} tokens/sec"
+                  f"{' (cached)' if final.get('cache_hit') else ''}")
+        else:
+            print(f"❌ Failed: {final.get('error', 'Unknown error')}")
+        
+        return final
+    
     def interactive_mode(self):
         """Run interactive CLI session."""
         print("="*70)
@@ -1354,6 +1388,7 @@ from adapters.base_adapter import BaseAdapter
         print("  iterate <id>      - Run iterative loop until tests pass")
         print("  status <id>       - Check workflow status")
         print("  list              - List all workflows")
+        print("  ask <question>    - Ask the LLM directly (streamed)")
         print("  help              - Show this help")
         print("  exit              - Exit CLI")
         print()
@@ -1383,6 +1418,7 @@ from adapters.base_adapter import BaseAdapter
                     print("  iterate <id>      - Run iterative loop until tests pass")
                     print("  status <id>       - Check workflow status")
                     print("  list              - List all workflows")
+                    print("  ask <question>    - Ask the LLM directly (streamed)")
                     print("  help              - Show this help")
                     print("  exit              - Exit CLI")
                     print()
@@ -1500,6 +1536,15 @@ from adapters.base_adapter import BaseAdapter
                         print("No workflows found.")
                         print()
                 
+                elif command == "ask":
+                    if not args:
+                        print("❌ Usage: ask <question>")
+                        print()
+                        continue
+                    
+                    self.ask(args)
+                    print()
+                
                 else:
                     print(f"❌ Unknown command: {command}")
                     print("   Type 'help' for available commands")
@@ -0,0 +1,23 @@
+-- Redis Lua script to refresh a conversation in its owner's index
+-- Looks up the owner from conversation metadata, so writers don't need to
+-- know the user_id. Entries older than the conversation TTL are pruned.
+-- KEYS[1] = "conv:meta:<conv_id>"
+-- ARGV[1] = user index key prefix ("conv:user:")
+-- ARGV[2] = conv_id
+-- ARGV[3] = score (updated_at as epoch seconds)
+-- ARGV[4] = ttl_seconds
+-- Returns 1 if indexed, 0 if the conversation has no user_id
+
+local user_id = redis.call('HGET', KEYS[1], 'user_id')
+if not user_id then
+    return 0
+end
+
+local index_key = ARGV[1] .. user_id
+local score = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+
+redis.call('ZADD', index_key, score, ARGV[2])
+redis.call('ZREMRANGEBYSCORE', index_key, '-inf', '(' .. (score - ttl))
+redis.call('EXPIRE', index_key, ttl)
+return 1
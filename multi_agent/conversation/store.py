@@ -6,15 +6,19 @@ key rotation without losing context.
 """
 import os
 import json
+import time
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
 import redis
 from redis import Redis
 from redis.exceptions import RedisError
 
 logger = logging.getLogger(__name__)
 
+USER_INDEX_PREFIX = "conv:user:"
+
 
 class ConversationStore:
     """
@@ -23,6 +27,12 @@ class ConversationStore:
     Uses Redis data structures:
     - conv:messages:<conv_id> - List of JSON-encoded messages
     - conv:meta:<conv_id> - Hash for metadata
+    - conv:user:<user_id> - Sorted set of the user's conversation IDs,
+      scored by updated_at (epoch seconds)
+    - conv:summary:<conv_id> - Hash with the rolling summary of older turns
+    
+    Multi-command operations are sent as single MULTI pipelines so a chat
+    turn costs one round trip to read context and one to persist it.
     """
     
     def __init__(self, redis_client: Optional[Redis] = None):
@@ -43,6 +53,13 @@ class ConversationStore:
         
         self.redis = redis_client
         self.default_ttl = int(os.environ.get('CONVERSATION_TTL_SECONDS', 86400))  # 24 hours
+        self.max_history = int(os.environ.get('MAX_CONVERSATION_HISTORY', 100))  # 0 = unlimited
+        
+        # Sent with EVAL inside pipelines: EVALSHA in a pipeline costs an
+        # extra SCRIPT EXISTS round trip on every execute
+        script_path = Path(__file__).parent / 'index_touch.lua'
+        with open(script_path, 'r') as f:
+            self.index_lua = f.read()
         
         logger.info("Conversation store initialized")
     
@@ -76,8 +93,11 @@ class ConversationStore:
             meta['message_count'] = 0
             meta['total_tokens'] = 0
             
-            self.redis.hset(meta_key, mapping=self._flatten_meta(meta))
-            self.redis.expire(meta_key, self.default_ttl)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(meta_key, mapping=self._flatten_meta(meta))
+            pipe.expire(meta_key, self.default_ttl)
+            self._touch_index(pipe, conv_id)
+            pipe.execute()
             
             logger.info(f"Created conversation {conv_id}")
             return True
@@ -104,40 +124,63 @@ class ConversationStore:
             tokens: Token count (optional)
             metadata: Additional metadata (model, key_id, etc.)
         """
+        self.append_messages(conv_id, [{
+            'role': role,
+            'content': content,
+            'tokens': tokens,
+            'metadata': metadata
+        }])
+    
+    def append_messages(self, conv_id: str, messages: List[Dict[str, Any]]):
+        """
+        Append several messages in one MULTI pipeline.
+        
+        Args:
+            conv_id: Conversation identifier
+            messages: Dicts with 'role' and 'content', and optionally
+                      'tokens' and 'metadata' (as for append_message)
+        """
+        if not messages:
+            return
+        
         msg_key = f"conv:messages:{conv_id}"
         meta_key = f"conv:meta:{conv_id}"
+        now = datetime.utcnow().isoformat()
         
-        try:
-            # Create message
-            message = {
-                'role': role,
-                'content': content,
-                'timestamp': datetime.utcnow().isoformat()
+        entries = []
+        total_tokens = 0
+        meta_updates = {'updated_at': now}
+        for msg in messages:
+            entry = {
+                'role': msg['role'],
+                'content': msg['content'],
+                'timestamp': now
             }
+            if msg.get('tokens') is not None:
+                entry['tokens'] = msg['tokens']
+                total_tokens += msg['tokens']
+            if msg.get('metadata'):
+                entry['metadata'] = msg['metadata']
+                if msg['metadata'].get('model'):
+                    meta_updates['last_model'] = msg['metadata']['model']
+            entries.append(json.dumps(entry))
+        
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.rpush(msg_key, *entries)
+            pipe.expire(msg_key, self.default_ttl)
+            pipe.hincrby(meta_key, 'message_count', len(entries))
+            if total_tokens:
+                pipe.hincrby(meta_key, 'total_tokens', total_tokens)
+            pipe.hset(meta_key, mapping=meta_updates)
+            pipe.expire(meta_key, self.default_ttl)
+            self._touch_index(pipe, conv_id)
+            pipe.execute()
             
-            if tokens is not None:
-                message['tokens'] = tokens
-            
-            if metadata:
-                message['metadata'] = metadata
-            
-            # Append to list
-            self.redis.rpush(msg_key, json.dumps(message))
-            self.redis.expire(msg_key, self.default_ttl)
-            
-            # Update metadata
-            self.redis.hincrby(meta_key, 'message_count', 1)
-            if tokens:
-                self.redis.hincrby(meta_key, 'total_tokens', tokens)
-            self.redis.hset(meta_key, 'updated_at', datetime.utcnow().isoformat())
-            
-            if metadata and metadata.get('model'):
-                self.redis.hset(meta_key, 'last_model', metadata['model'])
-            
-            logger.debug(f"Appended {role} message to {conv_id}")
+            logger.debug(f"Appended {len(entries)} message(s) to {conv_id}")
             
         except RedisError as e:
-            logger.error(f"Redis error appending message to {conv_id}: {e}")
+            logger.error(f"Redis error appending messages to {conv_id}: {e}")
     
     def get_history(
         self,
@@ -186,6 +229,50 @@ class ConversationStore:
             logger.error(f"Redis error getting history for {conv_id}: {e}")
             return []
     
+    def get_context(
+        self,
+        conv_id: str,
+        limit: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+        """
+        Get metadata and recent history in one round trip.
+        
+        History is capped to the most recent messages; a leading system
+        prompt that falls outside the cap is kept in front of them.
+        
+        Args:
+            conv_id: Conversation identifier
+            limit: Max recent messages (default: MAX_CONVERSATION_HISTORY,
+                   0 = all)
+            
+        Returns:
+            (metadata, messages) - ({}, []) if not found. Messages contain
+            only role and content, as with get_history().
+        """
+        msg_key = f"conv:messages:{conv_id}"
+        meta_key = f"conv:meta:{conv_id}"
+        limit = self.max_history if limit is None else limit
+        
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hgetall(meta_key)
+            pipe.lindex(msg_key, 0)
+            pipe.lrange(msg_key, -limit if limit else 0, -1)
+            data, first_raw, raw_messages = pipe.execute()
+        except RedisError as e:
+            logger.error(f"Redis error getting context for {conv_id}: {e}")
+            return {}, []
+        
+        metadata = self._unflatten_meta(data) if data else {}
+        messages = [json.loads(raw) for raw in raw_messages]
+        
+        if first_raw and limit and len(messages) == limit:
+            first = json.loads(first_raw)
+            if first['role'] == 'system' and first != messages[0]:
+                messages = [first] + messages[1:]
+        
+        return metadata, [{'role': m['role'], 'content': m['content']} for m in messages]
+    
     def get_metadata(self, conv_id: str) -> Dict[str, Any]:
         """
         Get conversation metadata.
@@ -206,6 +293,42 @@ class ConversationStore:
             logger.error(f"Redis error getting metadata for {conv_id}: {e}")
             return {}
     
+    def get_summary(self, conv_id: str) -> Dict[str, Any]:
+        """
+        Get the rolling summary of older turns.
+        
+        Returns:
+            {'content': str, 'covered': int} - covered is the number of
+            leading messages folded into the summary - or {} if none
+        """
+        try:
+            data = self.redis.hgetall(f"conv:summary:{conv_id}")
+        except RedisError as e:
+            logger.error(f"Redis error getting summary for {conv_id}: {e}")
+            return {}
+        if not data:
+            return {}
+        return {'content': data['content'], 'covered': int(data['covered'])}
+    
+    def set_summary(self, conv_id: str, content: str, covered: int):
+        """
+        Store the rolling summary of older turns.
+        
+        Args:
+            conv_id: Conversation identifier
+            content: Summary text
+            covered: Number of leading messages the summary replaces
+        """
+        summary_key = f"conv:summary:{conv_id}"
+        
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(summary_key, mapping={'content': content, 'covered': covered})
+            pipe.expire(summary_key, self.default_ttl)
+            pipe.execute()
+        except RedisError as e:
+            logger.error(f"Redis error setting summary for {conv_id}: {e}")
+    
     def truncate_history(
         self,
         conv_id: str,
@@ -233,11 +356,18 @@ class ConversationStore:
             
             # Keep only last N messages
             # Use LTRIM to keep range [-keep_last_n, -1]
-            self.redis.ltrim(msg_key, -keep_last_n, -1)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.ltrim(msg_key, -keep_last_n, -1)
+            # Summary positions refer to the untrimmed list
+            pipe.delete(f"conv:summary:{conv_id}")
             
             # Update metadata
-            self.redis.hset(meta_key, 'message_count', keep_last_n)
-            self.redis.hset(meta_key, 'updated_at', datetime.utcnow().isoformat())
+            pipe.hset(meta_key, mapping={
+                'message_count': keep_last_n,
+                'updated_at': datetime.utcnow().isoformat()
+            })
+            self._touch_index(pipe, conv_id)
+            pipe.execute()
             
             logger.info(f"Truncated {conv_id}: {total} -> {keep_last_n} messages")
             
@@ -250,7 +380,12 @@ class ConversationStore:
         meta_key = f"conv:meta:{conv_id}"
         
         try:
-            self.redis.delete(msg_key, meta_key)
+            user_id = self.redis.hget(meta_key, 'user_id')
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(msg_key, meta_key, f"conv:summary:{conv_id}")
+            if user_id:
+                pipe.zrem(f"{USER_INDEX_PREFIX}{user_id}", conv_id)
+            pipe.execute()
             logger.info(f"Deleted conversation {conv_id}")
         except RedisError as e:
             logger.error(f"Redis error deleting {conv_id}: {e}")
@@ -258,33 +393,40 @@ class ConversationStore:
     def list_conversations(
         self,
         user_id: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        offset: int = 0
     ) -> List[str]:
         """
         List conversation IDs.
         
+        With a user_id this is one ZREVRANGE on the user's index, most
+        recently updated first. Without one, the keyspace is scanned.
+        
         Args:
-            user_id: Filter by user_id (if stored in metadata)
+            user_id: Only list this user's conversations
             limit: Max number of conversations to return
+            offset: Number of conversations to skip (for pagination)
             
         Returns:
             List of conversation IDs
         """
         try:
+            if user_id:
+                index_key = f"{USER_INDEX_PREFIX}{user_id}"
+                pipe = self.redis.pipeline(transaction=True)
+                # Drop conversations that have expired since they were indexed
+                pipe.zremrangebyscore(index_key, '-inf', f"({time.time() - self.default_ttl}")
+                pipe.zrevrange(index_key, offset, offset + limit - 1)
+                return pipe.execute()[1]
+            
             # Scan for conv:meta:* keys
-            pattern = "conv:meta:*"
             conv_ids = []
-            
-            for key in self.redis.scan_iter(match=pattern, count=100):
-                conv_id = key.replace("conv:meta:", "")
+            for key in self.redis.scan_iter(match="conv:meta:*", count=100):
+                if offset:
+                    offset -= 1
+                    continue
                 
-                # Filter by user_id if specified
-                if user_id:
-                    meta = self.get_metadata(conv_id)
-                    if meta.get('user_id') != user_id:
-                        continue
-                
-                conv_ids.append(conv_id)
+                conv_ids.append(key.replace("conv:meta:", ""))
                 
                 if len(conv_ids) >= limit:
                     break
@@ -295,6 +437,71 @@ class ConversationStore:
             logger.error(f"Redis error listing conversations: {e}")
             return []
     
+    def rebuild_user_index(self, batch_size: int = 500) -> int:
+        """
+        Rebuild every per-user conversation index from conversation metadata.
+        
+        Needed once for conversations created before the index existed, or
+        to repair it. Scans the whole keyspace. Indexes are updated in place
+        (ZADD per conversation, never moving an entry back in time, then
+        pruning expired and orphaned entries), so listings keep working
+        while it runs.
+        
+        Args:
+            batch_size: Metadata hashes fetched per pipeline
+            
+        Returns:
+            Number of conversations indexed
+        """
+        cutoff = f"({time.time() - self.default_ttl}"
+        indexed = 0
+        batch = []
+        
+        def flush():
+            pipe = self.redis.pipeline(transaction=False)
+            for meta_key in batch:
+                pipe.hmget(meta_key, 'user_id', 'updated_at')
+            rows = pipe.execute()
+            
+            pipe = self.redis.pipeline(transaction=False)
+            count = 0
+            for meta_key, (user_id, updated_at) in zip(batch, rows):
+                if not user_id or not updated_at:
+                    continue
+                index_key = f"{USER_INDEX_PREFIX}{user_id}"
+                score = datetime.fromisoformat(updated_at).replace(tzinfo=timezone.utc).timestamp()
+                pipe.zadd(index_key, {meta_key.replace("conv:meta:", ""): score}, gt=True)
+                pipe.zremrangebyscore(index_key, '-inf', cutoff)
+                pipe.expire(index_key, self.default_ttl)
+                count += 1
+            pipe.execute()
+            batch.clear()
+            return count
+        
+        for meta_key in self.redis.scan_iter(match="conv:meta:*", count=batch_size):
+            batch.append(meta_key)
+            if len(batch) >= batch_size:
+                indexed += flush()
+        if batch:
+            indexed += flush()
+        
+        # Drop entries for conversations that are gone or owned by someone else
+        pruned = 0
+        for index_key in self.redis.scan_iter(match=f"{USER_INDEX_PREFIX}*", count=batch_size):
+            user_id = index_key[len(USER_INDEX_PREFIX):]
+            conv_ids = [conv_id for conv_id, _ in self.redis.zscan_iter(index_key, count=batch_size)]
+            for start in range(0, len(conv_ids), batch_size):
+                chunk = conv_ids[start:start + batch_size]
+                pipe = self.redis.pipeline(transaction=False)
+                for conv_id in chunk:
+                    pipe.hget(f"conv:meta:{conv_id}", 'user_id')
+                stale = [conv_id for conv_id, owner in zip(chunk, pipe.execute()) if owner != user_id]
+                if stale:
+                    pruned += self.redis.zrem(index_key, *stale)
+        
+        logger.info(f"Rebuilt user conversation index ({indexed} conversations, {pruned} stale entries removed)")
+        return indexed
+    
     def health_check(self) -> bool:
         """Check if Redis connection is healthy."""
         try:
@@ -303,6 +510,13 @@ class ConversationStore:
         except RedisError:
             return False
     
+    def _touch_index(self, pipe, conv_id: str):
+        """Queue an update of the conversation's user index entry on a pipeline."""
+        pipe.eval(
+            self.index_lua, 1, f"conv:meta:{conv_id}",
+            USER_INDEX_PREFIX, conv_id, time.time(), self.default_ttl
+        )
+    
     def _flatten_meta(self, meta: Dict[str, Any]) -> Dict[str, str]:
         """Convert metadata to Redis hash format (string values only)."""
         flat = {}
@@ -8,6 +8,7 @@ Responsibilities:
 - Track key health and cooldown status
 - Handle failover and load distribution
 """
+import time
 import random
 import logging
 from typing import Optional, Dict, List, Any
@@ -116,13 +117,14 @@ class KeyManager:
         Select an API key with available capacity.
         
         Selection algorithm:
-        1. Filter by workload type (light/medium/heavy) if specified
-        2. Filter by model preference (if specified)
-        3. Shuffle to distribute load
-        4. Check cooldown status
-        5. Atomically reserve RPM and TPM capacity
-        6. Fetch secret from vault
-        7. Return key metadata + secret
+        1. Order keys matching the workload type (light/medium/heavy) first,
+           then the remaining keys as fallback
+        2. Within each group, prefer the requested model, then priority
+        3. Shuffle ties to distribute load
+        4. In one Redis round trip, skip keys in cooldown and atomically
+           reserve RPM and TPM capacity on the first key that fits
+        5. Fetch secret from vault
+        6. Return key metadata + secret
         
         Args:
             model_preference: Preferred model name (e.g., "gemini-2.5-pro")
@@ -135,7 +137,9 @@ class KeyManager:
                 'key_id': str,
                 'secret': str,
                 'model': str,
-                'provider': str
+                'provider': str,
+                'reserved_tokens': int,  # For reconcile_usage()
+                'reserved_window': int
             }
             or None if no suitable key found
         """
@@ -155,56 +159,152 @@ class KeyManager:
             logger.warning("No candidate keys after filtering")
             return None
         
-        # Filter by workload if specified
-        if workload:
-            workload_candidates = [
-                k for k in candidates
-                if k.tags.get('workload') == workload
-            ]
-            if workload_candidates:
-                candidates = workload_candidates
-                logger.debug(f"Filtered to {len(candidates)} keys with workload={workload}")
+        ordered = self._order_candidates(candidates, model_preference, workload)
         
-        # Sort by preference: exact model match first, then others
-        # Add randomness to distribute load
-        candidates.sort(
-            key=lambda k: (
+        # Taken before reserving, so a minute rollover never credits a newer window
+        window = int(time.time()) // 60
+        result = self._reserve_first(ordered, tokens_needed)
+        if result:
+            result['reserved_tokens'] = tokens_needed
+            result['reserved_window'] = window
+            return result
+        
+        logger.warning("No keys with available capacity")
+        return None
+    
+    def _order_candidates(
+        self,
+        candidates: List[APIKey],
+        model_preference: Optional[str],
+        workload: Optional[str]
+    ) -> List[APIKey]:
+        """
+        Order candidates for reservation.
+        
+        Keys tagged with the workload come first; with fallback enabled the
+        other keys follow. Each group is sorted by model preference and
+        priority, with random tie-breaks to distribute load.
+        """
+        def rank(k: APIKey):
+            return (
                 k.model_name != model_preference if model_preference else 0,
                 k.tags.get('priority', 999),
                 random.random()
             )
-        )
         
-        # Try each candidate
-        for key in candidates:
-            result = self._try_reserve_key(key, tokens_needed)
+        preferred = candidates
+        if workload:
+            workload_candidates = [k for k in candidates if k.tags.get('workload') == workload]
+            if workload_candidates:
+                preferred = workload_candidates
+                logger.debug(f"Filtered to {len(preferred)} keys with workload={workload}")
+        
+        ordered = sorted(preferred, key=rank)
+        if self.enable_fallback and len(preferred) < len(candidates):
+            preferred_ids = {k.key_id for k in preferred}
+            ordered += sorted((k for k in candidates if k.key_id not in preferred_ids), key=rank)
+        
+        return ordered
+    
+    def _reserve_first(
+        self,
+        ordered: List[APIKey],
+        tokens_needed: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reserve capacity on the first candidate that fits.
+        
+        Uses the limiter's single round-trip batch reservation when available,
+        otherwise tries candidates one by one.
+        
+        Returns:
+            Key metadata dict if successful, None otherwise
+        """
+        reserve_batch = getattr(self.redis_limiter, 'reserve_first_available', None)
+        if reserve_batch is None:
+            for key in ordered:
+                result = self._try_reserve_key(key, tokens_needed)
+                if result:
+                    return result
+            return None
+        
+        while ordered:
+            key_id = reserve_batch(
+                [(k.key_id, k.rpm, k.tpm) for k in ordered],
+                tokens_needed
+            )
+            if key_id is None:
+                return None
+            
+            result = self._key_metadata(self.keys[key_id], tokens_needed)
             if result:
                 return result
+            
+            # Secret unavailable (key now in cooldown) - try the rest
+            ordered = [k for k in ordered if k.key_id != key_id]
         
-        # No key available - try fallback strategies
-        if self.enable_fallback:
-            # Try without workload filter
-            if workload:
-                logger.info(f"Fallback: retrying without workload filter ({workload})")
-                return self.select_key(
-                    model_preference=model_preference,
-                    tokens_needed=tokens_needed,
-                    exclude_keys=exclude_keys,
-                    workload=None
-                )
-            # Try without model preference
-            elif model_preference:
-                logger.info(f"Fallback: retrying without model preference {model_preference}")
-                return self.select_key(
-                    model_preference=None,
-                    tokens_needed=tokens_needed,
-                    exclude_keys=exclude_keys,
-                    workload=None
-                )
-        
-        logger.warning("No keys with available capacity")
         return None
     
+    def reconcile_usage(self, key_meta: Dict[str, Any], actual_tokens: Optional[int]) -> int:
+        """
+        Correct a key's TPM reservation with the tokens a call actually used.
+        
+        Over-estimates are credited back to the reservation's minute window
+        (under-estimates are charged), so conservative estimates stop
+        making keys look exhausted early.
+        
+        Args:
+            key_meta: Metadata returned by select_key()
+            actual_tokens: Total tokens reported by the provider
+            
+        Returns:
+            Tokens adjusted (actual - reserved), 0 if nothing was adjusted
+        """
+        reserved = key_meta.get('reserved_tokens')
+        adjust = getattr(self.redis_limiter, 'adjust_token_budget', None)
+        if reserved is None or not actual_tokens or adjust is None:
+            return 0
+        
+        delta = actual_tokens - reserved
+        if delta == 0:
+            return 0
+        
+        if adjust(key_meta['key_id'], delta, key_meta['reserved_window']) is None:
+            return 0
+        
+        logger.debug(f"Reconciled {key_meta['key_id']}: reserved {reserved}, used {actual_tokens}")
+        return delta
+    
+    def resolve_target(
+        self,
+        model_preference: Optional[str] = None,
+        workload: Optional[str] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Provider and model select_key would prefer, without reserving capacity.
+
+        Deterministic (no load-spreading randomness), so it can be used to
+        key caches before a key is selected.
+
+        Returns:
+            {'provider': str, 'model': str} or None if no keys are active
+        """
+        candidates = [k for k in self.keys.values() if k.active]
+        if workload:
+            candidates = [k for k in candidates if k.tags.get('workload') == workload] or candidates
+        if not candidates:
+            return None
+
+        best = min(
+            candidates,
+            key=lambda k: (
+                k.model_name != model_preference if model_preference else 0,
+                k.tags.get('priority', 999),
+                k.key_id
+            )
+        )
+        return {'provider': best.provider, 'model': best.model_name}
+
     def _try_reserve_key(
         self,
         key: APIKey,
@@ -234,6 +334,17 @@ class KeyManager:
             logger.debug(f"Key {key_id} TPM limit exceeded (needed {tokens_needed})")
             return None
         
+        return self._key_metadata(key, tokens_needed)
+    
+    def _key_metadata(self, key: APIKey, tokens_needed: int) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the secret for a reserved key and build its metadata.
+        
+        Returns:
+            Key metadata dict, or None if the secret is unavailable
+        """
+        key_id = key.key_id
+        
         # Fetch secret
         try:
             secret = fetch_api_secret(key_id)
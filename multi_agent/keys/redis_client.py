@@ -8,7 +8,7 @@ import os
 import time
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Tuple
 import redis
 from redis import Redis
 from redis.exceptions import RedisError
@@ -44,9 +44,15 @@ class RedisRateLimiter:
             rpm_lua = f.read()
         with open(script_dir / 'tpm_reserve.lua', 'r') as f:
             tpm_lua = f.read()
+        with open(script_dir / 'select_reserve.lua', 'r') as f:
+            select_lua = f.read()
+        with open(script_dir / 'tpm_adjust.lua', 'r') as f:
+            adjust_lua = f.read()
         
         self.rpm_script = self.redis.register_script(rpm_lua)
         self.tpm_script = self.redis.register_script(tpm_lua)
+        self.select_script = self.redis.register_script(select_lua)
+        self.adjust_script = self.redis.register_script(adjust_lua)
         
         logger.info("Redis rate limiter initialized with Lua scripts")
     
@@ -122,6 +128,75 @@ class RedisRateLimiter:
             # Fail open - allow request if Redis is down
             return True
     
+    def reserve_first_available(
+        self,
+        candidates: List[Tuple[str, int, int]],
+        tokens_required: int
+    ) -> Optional[str]:
+        """
+        Atomically reserve RPM and TPM on the first candidate with capacity.
+        
+        Candidates are evaluated server-side in the given order, skipping
+        keys in cooldown, so selection is one round trip at any pool size.
+        
+        Args:
+            candidates: (key_id, rpm_limit, tpm_limit) in priority order
+            tokens_required: Number of tokens needed for this request
+            
+        Returns:
+            Reserved key_id, or None if no candidate has capacity
+        """
+        if not candidates:
+            return None
+        
+        window = str(int(time.time()) // 60)  # Current minute
+        keys = []
+        args = [window, str(tokens_required)]
+        for key_id, rpm_limit, tpm_limit in candidates:
+            keys.extend([f"key:cooldown:{key_id}", f"rpm:{key_id}", f"tpm:{key_id}"])
+            args.extend([key_id, str(rpm_limit), str(tpm_limit)])
+        
+        try:
+            result = self.select_script(keys=keys, args=args)
+            
+            if result:
+                logger.debug(f"Reserved {tokens_required} tokens on {result}")
+                return result.decode() if isinstance(result, bytes) else result
+            
+            logger.warning(f"No capacity on {len(candidates)} candidate keys (needed {tokens_required} tokens)")
+            return None
+            
+        except RedisError as e:
+            logger.error(f"Redis error reserving across candidates: {e}")
+            # Fail open - allow request on the top candidate if Redis is down
+            return candidates[0][0]
+    
+    def adjust_token_budget(self, key_id: str, delta: int, window: int) -> Optional[int]:
+        """
+        Reconcile a TPM reservation with the tokens actually used.
+        
+        Args:
+            key_id: API key identifier
+            delta: Actual minus reserved tokens (negative credits budget back)
+            window: Minute window the reservation was made in
+            
+        Returns:
+            New usage for the window, or None if the window has rolled over
+        """
+        redis_key = f"tpm:{key_id}"
+        
+        try:
+            result = int(self.adjust_script(keys=[redis_key], args=[str(window), str(delta)]))
+            if result < 0:
+                return None
+            
+            logger.debug(f"Adjusted TPM usage for {key_id} by {delta} (now {result})")
+            return result
+            
+        except RedisError as e:
+            logger.error(f"Redis error adjusting token budget for {key_id}: {e}")
+            return None
+    
     def get_rpm_usage(self, key_id: str) -> dict:
         """
         Get current RPM usage for a key.
@@ -0,0 +1,44 @@
+-- Redis Lua script for atomic key selection across candidates
+-- Evaluates candidates in priority order and reserves RPM + TPM on the first
+-- key that is not in cooldown and has capacity for both.
+-- KEYS[3i-2] = "key:cooldown:<key_id>"
+-- KEYS[3i-1] = "rpm:<key_id>"
+-- KEYS[3i]   = "tpm:<key_id>"
+-- ARGV[1] = window (current minute timestamp)
+-- ARGV[2] = tokens_required
+-- ARGV[3i], ARGV[3i+1], ARGV[3i+2] = key_id, rpm_limit, tpm_limit
+-- Returns the reserved key_id, or false if no candidate fits
+
+local window = ARGV[1]
+local required = tonumber(ARGV[2])
+
+for i = 1, #KEYS / 3 do
+    local cooldown_key = KEYS[3 * i - 2]
+    local rpm_key = KEYS[3 * i - 1]
+    local tpm_key = KEYS[3 * i]
+    local key_id = ARGV[3 * i]
+    local rpm_limit = tonumber(ARGV[3 * i + 1])
+    local tpm_limit = tonumber(ARGV[3 * i + 2])
+
+    if redis.call('EXISTS', cooldown_key) == 0 then
+        -- Usage in the current window (0 if the stored window is stale)
+        local count = 0
+        if redis.call('HGET', rpm_key, 'window') == window then
+            count = tonumber(redis.call('HGET', rpm_key, 'count') or '0')
+        end
+        local used = 0
+        if redis.call('HGET', tpm_key, 'window') == window then
+            used = tonumber(redis.call('HGET', tpm_key, 'used') or '0')
+        end
+
+        if count + 1 <= rpm_limit and used + required <= tpm_limit then
+            redis.call('HSET', rpm_key, 'window', window, 'count', count + 1)
+            redis.call('EXPIRE', rpm_key, 120)
+            redis.call('HSET', tpm_key, 'window', window, 'used', used + required)
+            redis.call('EXPIRE', tpm_key, 120)
+            return key_id
+        end
+    end
+end
+
+return false
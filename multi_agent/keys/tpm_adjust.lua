@@ -0,0 +1,21 @@
+-- Redis Lua script for reconciling a TPM reservation with actual usage
+-- KEYS[1] = "tpm:<key_id>"
+-- ARGV[1] = window the tokens were reserved in
+-- ARGV[2] = delta (actual - reserved; negative credits tokens back)
+-- Returns the new usage, or -1 if the window has already rolled over
+
+local key = KEYS[1]
+local window = ARGV[1]
+local delta = tonumber(ARGV[2])
+
+if redis.call('HGET', key, 'window') ~= window then
+    -- Reservation window is over; nothing left to reconcile
+    return -1
+end
+
+local used = tonumber(redis.call('HGET', key, 'used') or '0') + delta
+if used < 0 then
+    used = 0
+end
+redis.call('HSET', key, 'used', used)
+return used
@@ -0,0 +1,84 @@
+"""
+Concurrency primitives for the request router.
+
+Provides:
+- Per-key and per-provider concurrency limits for provider calls
+- Rolling latency tracking per model (used to time hedged requests)
+"""
+import math
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class ConcurrencyLimiter:
+    """
+    Caps in-flight provider calls per API key and per provider.
+
+    Slots are always acquired provider first, then key, so concurrent
+    callers cannot deadlock each other.
+    """
+
+    def __init__(self, max_per_key: int = 4, max_per_provider: int = 16):
+        """
+        Initialize limiter.
+
+        Args:
+            max_per_key: Concurrent calls allowed on one API key
+            max_per_provider: Concurrent calls allowed on one provider
+        """
+        self.max_per_key = max_per_key
+        self.max_per_provider = max_per_provider
+        self._lock = threading.Lock()
+        self._key_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._provider_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _semaphore(self, table: Dict[str, threading.BoundedSemaphore], name: str, limit: int):
+        with self._lock:
+            if name not in table:
+                table[name] = threading.BoundedSemaphore(limit)
+            return table[name]
+
+    @contextmanager
+    def slot(self, provider: str, key_id: str):
+        """Hold one provider slot and one key slot for the duration of a call."""
+        provider_slot = self._semaphore(self._provider_slots, provider, self.max_per_provider)
+        key_slot = self._semaphore(self._key_slots, key_id, self.max_per_key)
+        with provider_slot:
+            with key_slot:
+                yield
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Initialize tracker.
+
+        Args:
+            window: Latencies kept per model
+            min_samples: Samples required before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str, duration_ms: int):
+        with self._lock:
+            self._samples[model].append(duration_ms)
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        """
+        Nearest-rank latency percentile for a model.
+
+        Returns:
+            Latency in milliseconds, or None with too few samples
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = max(1, math.ceil(pct / 100 * len(samples)))
+        return float(samples[rank - 1])
@@ -0,0 +1,124 @@
+"""
+Token-budgeted context compaction for long conversations.
+
+Once a conversation's context exceeds the token budget, older turns are
+folded into a rolling summary stored with the conversation. The system
+prompt and the most recent turns are always sent verbatim, so per-turn
+input stays bounded however long the conversation gets.
+"""
+import logging
+from typing import Callable, Dict, List, Optional
+
+from conversation.store import ConversationStore
+from llm.token_utils import estimate_prompt_tokens
+
+logger = logging.getLogger(__name__)
+
+# (previous summary or None, messages to fold in) -> new summary or None
+Summarizer = Callable[[Optional[str], List[Dict[str, str]]], Optional[str]]
+
+SUMMARY_PREFIX = "Summary of our earlier conversation:\n"
+SUMMARY_ACK = "Understood. I'll continue from that context."
+
+
+class ContextCompactor:
+    """
+    Keeps conversation context within a token budget.
+
+    Summaries are only recomputed when the context outgrows the budget
+    again, so most turns reuse the stored summary without a model call.
+    """
+
+    def __init__(
+        self,
+        conv_store: ConversationStore,
+        summarizer: Summarizer,
+        token_budget: int = 16000,
+        keep_recent: int = 6
+    ):
+        """
+        Initialize compactor.
+
+        Args:
+            conv_store: Store holding histories and summaries
+            summarizer: Folds messages into a summary (returns None on failure)
+            token_budget: Estimated context tokens before compaction (0 = off)
+            keep_recent: Recent messages always kept verbatim
+        """
+        self.conv_store = conv_store
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.keep_recent = max(1, keep_recent)
+
+    def compact(
+        self,
+        conv_id: str,
+        history: List[Dict[str, str]],
+        message_count: int
+    ) -> List[Dict[str, str]]:
+        """
+        Fit a conversation's history into the token budget.
+
+        Args:
+            conv_id: Conversation identifier
+            history: Stored history (possibly capped to its most recent
+                     messages, with the system prompt kept in front)
+            message_count: Total messages stored for the conversation
+
+        Returns:
+            History to send: unchanged if within budget, otherwise the system
+            prompt, a summary exchange and the most recent messages
+        """
+        if not self.token_budget or estimate_prompt_tokens(history) <= self.token_budget:
+            return history
+
+        system = history[:1] if history and history[0]['role'] == 'system' else []
+        body = history[len(system):]
+        offset = message_count - len(body)  # Stored position of body[0]
+
+        summary = self.conv_store.get_summary(conv_id)
+        previous = summary.get('content')
+        pending = body
+        if summary and summary['covered'] > offset:
+            pending = body[summary['covered'] - offset:]
+            context = system + self._summary_messages(previous) + pending
+            if estimate_prompt_tokens(context) <= self.token_budget:
+                return context
+
+        cut = self._recent_start(pending)
+        if cut == 0:
+            # Nothing old enough to fold
+            return system + self._summary_messages(previous) + pending
+
+        folded, recent = pending[:cut], pending[cut:]
+        new_summary = self.summarizer(previous, folded)
+        if not new_summary:
+            logger.warning(f"Summarizing {conv_id} failed, sending recent turns only")
+            return system + self._summary_messages(previous) + recent
+
+        covered = message_count - len(recent)
+        self.conv_store.set_summary(conv_id, new_summary, covered)
+        logger.info(
+            f"Compacted {conv_id}: folded {len(folded)} messages, "
+            f"summary covers {covered}/{message_count}"
+        )
+        return system + self._summary_messages(new_summary) + recent
+
+    def _recent_start(self, messages: List[Dict[str, str]]) -> int:
+        """Index where the verbatim tail starts (on a user turn, so roles keep alternating)."""
+        cut = max(0, len(messages) - self.keep_recent)
+        while cut > 0 and messages[cut]['role'] != 'user':
+            cut -= 1
+        return cut
+
+    def _summary_messages(self, summary: Optional[str]) -> List[Dict[str, str]]:
+        """
+        Summary as a user/assistant exchange (not a system message: Gemini
+        drops system messages and Anthropic keeps only one).
+        """
+        if not summary:
+            return []
+        return [
+            {'role': 'user', 'content': SUMMARY_PREFIX + summary},
+            {'role': 'assistant', 'content': SUMMARY_ACK}
+        ]
@@ -0,0 +1,126 @@
+"""
+Shared pool of provider SDK handles.
+
+Building SDK clients is not free (auth setup, connection pools, gRPC
+channels), and google-generativeai keeps its API key in process-global
+state set by genai.configure(), so concurrent requests on different keys
+can race each other. Handles are built once per (key, model, config) and
+reused, each bound to its own API key.
+"""
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HandlePool:
+    """Thread-safe LRU cache of provider handles."""
+
+    def __init__(self, max_size: int = 256):
+        """
+        Initialize pool.
+
+        Args:
+            max_size: Handles kept before the least recently used is dropped
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._handles: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Get the handle for key, building it with factory on first use.
+
+        The factory runs outside the lock so a slow build does not block
+        other keys; if two threads race, the first handle stored wins.
+        """
+        with self._lock:
+            if key in self._handles:
+                self._handles.move_to_end(key)
+                return self._handles[key]
+
+        handle = factory()
+
+        with self._lock:
+            if key in self._handles:
+                self._handles.move_to_end(key)
+                return self._handles[key]
+            self._handles[key] = handle
+            if len(self._handles) > self.max_size:
+                self._handles.popitem(last=False)
+        return handle
+
+    def clear(self):
+        with self._lock:
+            self._handles.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._handles)
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable identifier for an API key that does not expose the secret."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def _freeze(value: Optional[Any]) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def gemini_model(
+    api_key: str,
+    model: str,
+    generation_config: Optional[Dict[str, Any]] = None,
+    safety_settings: Optional[Any] = None
+):
+    """
+    Shared GenerativeModel bound to api_key.
+
+    The model gets its own GenerativeServiceClient (one per key, reused
+    across models) instead of the client genai.configure() installs
+    globally.
+
+    Raises:
+        ImportError: If google-generativeai is not installed
+    """
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
+
+    fingerprint = key_fingerprint(api_key)
+    service_client = _pool.get(
+        ('gemini-client', fingerprint),
+        lambda: glm.GenerativeServiceClient(client_options={'api_key': api_key})
+    )
+
+    def build():
+        handle = genai.GenerativeModel(
+            model_name=model,
+            generation_config=generation_config,
+            safety_settings=safety_settings
+        )
+        handle._client = service_client
+        return handle
+
+    return _pool.get(
+        ('gemini-model', fingerprint, model, _freeze(generation_config), _freeze(safety_settings)),
+        build
+    )
+
+
+def sdk_client(provider: str, api_key: str, factory: Callable[[], Any]) -> Any:
+    """Shared SDK client (e.g. OpenAI, Anthropic) for one API key."""
+    return _pool.get((provider, key_fingerprint(api_key)), factory)
+
+
+# Singleton pool
+_pool = HandlePool()
+
+
+def get_handle_pool() -> HandlePool:
+    """Get the process-wide handle pool."""
+    return _pool
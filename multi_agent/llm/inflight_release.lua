@@ -0,0 +1,11 @@
+-- Redis Lua script to release an in-flight request lock
+-- Only the holder's token may delete it, so a caller whose lock expired
+-- cannot release a lock another process has since acquired.
+-- KEYS[1] = "llm:inflight:<cache_key>"
+-- ARGV[1] = holder token
+-- Returns 1 if released, 0 otherwise
+
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
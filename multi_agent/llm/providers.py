@@ -9,9 +9,11 @@ Supports:
 """
 import os
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator
 from abc import ABC, abstractmethod
 
+from llm.handles import gemini_model, sdk_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,6 +67,60 @@ class ProviderClient(ABC):
             }
         """
         pass
+    
+    def stream_completion(
+        self,
+        api_key: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 2048,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a chat completion as it is generated.
+        
+        Providers without native streaming fall back to a single chunk.
+        
+        Yields:
+            {'type': 'chunk', 'content': str} for each text delta, then
+            {'type': 'done', 'model': str, 'tokens': Dict, 'finish_reason': str}
+        """
+        response = self.chat_completion(
+            api_key=api_key,
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs
+        )
+        yield {'type': 'chunk', 'content': response['content']}
+        yield {
+            'type': 'done',
+            'model': response['model'],
+            'tokens': response.get('tokens', {}),
+            'finish_reason': response.get('finish_reason')
+        }
+
+
+GEMINI_SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_NONE"
+    }
+]
 
 
 class GeminiClient(ProviderClient):
@@ -81,7 +137,7 @@ class GeminiClient(ProviderClient):
     ) -> Dict[str, Any]:
         """Send Gemini chat completion request."""
         try:
-            import google.generativeai as genai
+            import google.generativeai  # noqa: F401 - handles are built in llm.handles
             from google.api_core import exceptions as google_exceptions
         except ImportError:
             raise ProviderError(
@@ -89,49 +145,8 @@ class GeminiClient(ProviderClient):
             )
         
         try:
-            # Configure API key
-            genai.configure(api_key=api_key)
-            
-            # Create model with safety settings bypassed
-            generation_config = {
-                'max_output_tokens': max_tokens,
-                'temperature': temperature
-            }
-            
-            # Bypass safety filters for code generation (TRIPLE REDUNDANCY)
-            # Applied at: 1) Model init, 2) Chat session, 3) Message send
-            safety_settings = [
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": "BLOCK_NONE"
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH",
-                    "threshold": "BLOCK_NONE"
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": "BLOCK_NONE"
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_NONE"
-                }
-            ]
-            
-            # 1) Apply at model initialization
-            model_instance = genai.GenerativeModel(
-                model_name=model,
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
-            
-            # Convert messages to Gemini format
-            history, last_message = self._convert_messages(messages)
-            
-            # 2) Start chat session (safety settings inherited from model)
-            chat = model_instance.start_chat(
-                history=history
+            chat, last_message, safety_settings = self._start_chat(
+                api_key, model, messages, max_tokens, temperature
             )
             
             # 3) Apply at message send (explicit override - CRITICAL for safety bypass)
@@ -141,50 +156,15 @@ class GeminiClient(ProviderClient):
             )
             
             # Validate response for safety blocks BEFORE accessing .text
-            if not response.candidates:
-                raise SafetyBlockError(
-                    f"No candidates returned - likely safety block. Prompt feedback: {response.prompt_feedback}",
-                    safety_ratings=None
-                )
-            
-            candidate = response.candidates[0]
-            
-            # Check finish_reason (2 = SAFETY, 3 = RECITATION, 4 = OTHER)
-            if candidate.finish_reason in [2, 3]:
-                finish_reason_name = {
-                    2: "SAFETY",
-                    3: "RECITATION",
-                    4: "OTHER"
-                }.get(candidate.finish_reason, "UNKNOWN")
-                
-                safety_ratings = []
-                if hasattr(candidate, 'safety_ratings'):
-                    safety_ratings = [
-                        {
-                            'category': rating.category.name if hasattr(rating.category, 'name') else str(rating.category),
-                            'probability': rating.probability.name if hasattr(rating.probability, 'name') else str(rating.probability)
-                        }
-                        for rating in candidate.safety_ratings
-                    ]
-                
-                raise SafetyBlockError(
-                    f"Content blocked by safety filter. Finish reason: {finish_reason_name}. "
-                    f"Safety ratings: {safety_ratings}. Prompt feedback: {response.prompt_feedback}",
-                    safety_ratings=safety_ratings
-                )
+            blocked = self._safety_block_error(response)
+            if blocked:
+                raise blocked
             
             # Extract response (safe to access .text now)
             content = response.text
             
             # Get token counts if available
-            tokens = {}
-            if hasattr(response, 'usage_metadata'):
-                usage = response.usage_metadata
-                tokens = {
-                    'input': getattr(usage, 'prompt_token_count', 0),
-                    'output': getattr(usage, 'candidates_token_count', 0),
-                    'total': getattr(usage, 'total_token_count', 0)
-                }
+            tokens = self._usage_tokens(response)
             
             return {
                 'content': content,
@@ -202,6 +182,141 @@ class GeminiClient(ProviderClient):
             logger.error(f"Gemini API error: {e}")
             raise ProviderError(f"Gemini error: {str(e)}")
     
+    def _start_chat(self, api_key, model, messages, max_tokens, temperature):
+        """
+        Start a chat session on a pooled model with safety settings bypassed.
+        
+        Returns:
+            Tuple of (chat session, last message text, safety settings)
+        """
+        generation_config = {
+            'max_output_tokens': max_tokens,
+            'temperature': temperature
+        }
+        
+        # Bypass safety filters for code generation (TRIPLE REDUNDANCY)
+        # Applied at: 1) Model init, 2) Chat session, 3) Message send
+        safety_settings = GEMINI_SAFETY_SETTINGS
+        
+        # 1) Apply at model initialization (shared handle bound to this key)
+        model_instance = gemini_model(api_key, model, generation_config, safety_settings)
+        
+        # Convert messages to Gemini format
+        history, last_message = self._convert_messages(messages)
+        
+        # 2) Start chat session (safety settings inherited from model)
+        chat = model_instance.start_chat(
+            history=history
+        )
+        
+        return chat, last_message, safety_settings
+    
+    def _safety_block_error(self, response) -> Optional[SafetyBlockError]:
+        """Build a SafetyBlockError if a (partial) response was blocked."""
+        if not response.candidates:
+            return SafetyBlockError(
+                f"No candidates returned - likely safety block. Prompt feedback: {response.prompt_feedback}",
+                safety_ratings=None
+            )
+        
+        candidate = response.candidates[0]
+        
+        # Check finish_reason (2 = SAFETY, 3 = RECITATION, 4 = OTHER)
+        if candidate.finish_reason in [2, 3]:
+            finish_reason_name = {
+                2: "SAFETY",
+                3: "RECITATION",
+                4: "OTHER"
+            }.get(candidate.finish_reason, "UNKNOWN")
+            
+            safety_ratings = []
+            if hasattr(candidate, 'safety_ratings'):
+                safety_ratings = [
+                    {
+                        'category': rating.category.name if hasattr(rating.category, 'name') else str(rating.category),
+                        'probability': rating.probability.name if hasattr(rating.probability, 'name') else str(rating.probability)
+                    }
+                    for rating in candidate.safety_ratings
+                ]
+            
+            return SafetyBlockError(
+                f"Content blocked by safety filter. Finish reason: {finish_reason_name}. "
+                f"Safety ratings: {safety_ratings}. Prompt feedback: {response.prompt_feedback}",
+                safety_ratings=safety_ratings
+            )
+        return None
+    
+    @staticmethod
+    def _usage_tokens(response) -> Dict[str, int]:
+        """Token counts from usage metadata, if available."""
+        if not hasattr(response, 'usage_metadata'):
+            return {}
+        usage = response.usage_metadata
+        return {
+            'input': getattr(usage, 'prompt_token_count', 0),
+            'output': getattr(usage, 'candidates_token_count', 0),
+            'total': getattr(usage, 'total_token_count', 0)
+        }
+    
+    def stream_completion(
+        self,
+        api_key: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 2048,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream Gemini chat completion."""
+        try:
+            import google.generativeai  # noqa: F401 - handles are built in llm.handles
+            from google.api_core import exceptions as google_exceptions
+        except ImportError:
+            raise ProviderError(
+                "google-generativeai not installed (pip install google-generativeai)"
+            )
+        
+        try:
+            chat, last_message, safety_settings = self._start_chat(
+                api_key, model, messages, max_tokens, temperature
+            )
+            
+            response = chat.send_message(
+                last_message,
+                safety_settings=safety_settings,
+                stream=True
+            )
+            
+            for chunk in response:
+                blocked = self._safety_block_error(chunk)
+                if blocked:
+                    raise blocked
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks carrying only a finish reason have no text parts
+                    text = ''
+                if text:
+                    yield {'type': 'chunk', 'content': text}
+            
+            yield {
+                'type': 'done',
+                'model': model,
+                'tokens': self._usage_tokens(response),
+                'finish_reason': 'stop'
+            }
+        
+        except SafetyBlockError:
+            raise
+        
+        except google_exceptions.ResourceExhausted as e:
+            retry_after = self._extract_retry_after(str(e))
+            raise RateLimitError(str(e), retry_after=retry_after)
+        
+        except Exception as e:
+            logger.error(f"Gemini API error: {e}")
+            raise ProviderError(f"Gemini error: {str(e)}")
+    
     def _convert_messages(self, messages: List[Dict[str, str]]):
         """Convert standard messages to Gemini format."""
         history = []
@@ -260,7 +375,7 @@ class OpenAIClient(ProviderClient):
             raise ProviderError("openai not installed (pip install openai)")
         
         try:
-            client = OpenAI(api_key=api_key)
+            client = sdk_client('openai', api_key, lambda: OpenAI(api_key=api_key))
             
             response = client.chat.completions.create(
                 model=model,
@@ -300,6 +415,71 @@ class OpenAIClient(ProviderClient):
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             raise ProviderError(f"OpenAI error: {str(e)}")
+    
+    def stream_completion(
+        self,
+        api_key: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 2048,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream OpenAI chat completion."""
+        try:
+            from openai import OpenAI
+            from openai import RateLimitError as OpenAIRateLimitError
+        except ImportError:
+            raise ProviderError("openai not installed (pip install openai)")
+        
+        try:
+            client = sdk_client('openai', api_key, lambda: OpenAI(api_key=api_key))
+            
+            stream = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                stream_options={'include_usage': True}
+            )
+            
+            finish_reason = None
+            tokens = {}
+            for chunk in stream:
+                if chunk.choices:
+                    choice = chunk.choices[0]
+                    if choice.delta.content:
+                        yield {'type': 'chunk', 'content': choice.delta.content}
+                    finish_reason = choice.finish_reason or finish_reason
+                
+                # Usage arrives on the final chunk (with no choices)
+                if getattr(chunk, 'usage', None):
+                    tokens = {
+                        'input': chunk.usage.prompt_tokens,
+                        'output': chunk.usage.completion_tokens,
+                        'total': chunk.usage.total_tokens
+                    }
+            
+            yield {
+                'type': 'done',
+                'model': model,
+                'tokens': tokens,
+                'finish_reason': finish_reason
+            }
+            
+        except OpenAIRateLimitError as e:
+            retry_after = None
+            if hasattr(e, 'response') and e.response:
+                retry_after = e.response.headers.get('Retry-After')
+                if retry_after:
+                    retry_after = int(retry_after)
+            
+            raise RateLimitError(str(e), retry_after=retry_after)
+            
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise ProviderError(f"OpenAI error: {str(e)}")
 
 
 class AnthropicClient(ProviderClient):
@@ -322,7 +502,7 @@ class AnthropicClient(ProviderClient):
             raise ProviderError("anthropic not installed (pip install anthropic)")
         
         try:
-            client = Anthropic(api_key=api_key)
+            client = sdk_client('anthropic', api_key, lambda: Anthropic(api_key=api_key))
             
             # Extract system message if present
             system_message = None
@@ -371,6 +551,68 @@ class AnthropicClient(ProviderClient):
         except Exception as e:
             logger.error(f"Anthropic API error: {e}")
             raise ProviderError(f"Anthropic error: {str(e)}")
+    
+    def stream_completion(
+        self,
+        api_key: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 2048,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream Anthropic chat completion."""
+        try:
+            from anthropic import Anthropic
+            from anthropic import RateLimitError as AnthropicRateLimitError
+        except ImportError:
+            raise ProviderError("anthropic not installed (pip install anthropic)")
+        
+        try:
+            client = sdk_client('anthropic', api_key, lambda: Anthropic(api_key=api_key))
+            
+            system_message = None
+            filtered_messages = []
+            for msg in messages:
+                if msg['role'] == 'system':
+                    system_message = msg['content']
+                else:
+                    filtered_messages.append(msg)
+            
+            with client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system_message,
+                messages=filtered_messages
+            ) as stream:
+                for text in stream.text_stream:
+                    yield {'type': 'chunk', 'content': text}
+                final = stream.get_final_message()
+            
+            yield {
+                'type': 'done',
+                'model': model,
+                'tokens': {
+                    'input': final.usage.input_tokens,
+                    'output': final.usage.output_tokens,
+                    'total': final.usage.input_tokens + final.usage.output_tokens
+                },
+                'finish_reason': final.stop_reason
+            }
+            
+        except AnthropicRateLimitError as e:
+            retry_after = None
+            if hasattr(e, 'response') and e.response:
+                retry_after = e.response.headers.get('retry-after')
+                if retry_after:
+                    retry_after = int(retry_after)
+            
+            raise RateLimitError(str(e), retry_after=retry_after)
+            
+        except Exception as e:
+            logger.error(f"Anthropic API error: {e}")
+            raise ProviderError(f"Anthropic error: {str(e)}")
 
 
 # Provider registry
@@ -408,10 +650,6 @@ def register_provider(name: str, client: ProviderClient):
 
 class GeminiProvider:
     def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash"):
-        import google.generativeai as genai
-        
-        genai.configure(api_key=api_key)
-        
         # Configure safety settings to be more permissive for code generation
         safety_settings = {
             "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
@@ -420,10 +658,7 @@ class GeminiProvider:
             "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_MEDIUM_AND_ABOVE"
         }
         
-        self.model = genai.GenerativeModel(
-            model_name,
-            safety_settings=safety_settings
-        )
+        self.model = gemini_model(api_key, model_name, safety_settings=safety_settings)
         self.model_name = model_name
 
     def chat_completion(self, messages: List[Dict], **kwargs) -> str:
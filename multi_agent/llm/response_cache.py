@@ -0,0 +1,226 @@
+"""
+Exact-match response cache for LLM calls.
+
+Responses are keyed on (provider, model, normalized messages, temperature,
+max tokens), so byte-identical requests - iterative-loop retries, replayed
+workflows, test suites - are served without a provider call.
+
+Tiers:
+- In-process LRU (always on)
+- Shared tier: Redis (LLM_CACHE_BACKEND=redis) or JSON files on disk
+  (LLM_CACHE_BACKEND=disk, directory from LLM_CACHE_DIR)
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Keep only role and content (drops timestamps, token counts, metadata)."""
+    return [
+        {'role': msg.get('role', ''), 'content': msg.get('content', '')}
+        for msg in messages
+    ]
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float,
+    max_tokens: int
+) -> str:
+    """Stable hash of everything that determines a response."""
+    payload = json.dumps(
+        {
+            'provider': provider.lower(),
+            'model': model,
+            'messages': normalize_messages(messages),
+            'temperature': round(float(temperature), 4),
+            'max_tokens': int(max_tokens)
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier exact-match cache of provider responses.
+
+    The LRU tier is checked first; hits on the shared tier are promoted
+    into it. Shared-tier failures are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: int = 86400,
+        redis_client=None,
+        disk_dir: Optional[Path] = None
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            max_entries: Size of the in-process LRU tier
+            ttl_seconds: Entry lifetime in every tier
+            redis_client: Redis client for the shared tier (optional)
+            disk_dir: Directory for the disk tier (used if no redis_client)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self.disk_dir = Path(disk_dir) if disk_dir and redis_client is None else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lru: OrderedDict = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        tier = 'redis' if self.redis is not None else ('disk' if self.disk_dir else 'memory only')
+        logger.info(f"Response cache initialized (max_entries={max_entries}, shared tier: {tier})")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Returns:
+            Copy of the cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._lru[key]
+
+        response = self._shared_get(key)
+        if response is None:
+            self.misses += 1
+            return None
+
+        self._lru_set(key, response, now)
+        self.hits += 1
+        return dict(response)
+
+    def set(self, key: str, response: Dict[str, Any]):
+        """Store a response in every tier."""
+        self._lru_set(key, response, time.time())
+        self._shared_set(key, response)
+
+    def clear(self):
+        """Drop the in-process tier (shared entries expire by TTL)."""
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._lru)
+        }
+
+    def _lru_set(self, key: str, response: Dict[str, Any], now: float):
+        with self._lock:
+            self._lru[key] = (now + self.ttl_seconds, dict(response))
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _shared_get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            if self.redis is not None:
+                raw = self.redis.get(f"llm:cache:{key}")
+                return json.loads(raw) if raw else None
+
+            if self.disk_dir:
+                path = self.disk_dir / f"{key}.json"
+                if not path.exists():
+                    return None
+                entry = json.loads(path.read_text(encoding='utf-8'))
+                if entry['expires_at'] <= time.time():
+                    path.unlink(missing_ok=True)
+                    return None
+                return entry['response']
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+        return None
+
+    def _shared_set(self, key: str, response: Dict[str, Any]):
+        try:
+            if self.redis is not None:
+                self.redis.setex(f"llm:cache:{key}", self.ttl_seconds, json.dumps(response))
+            elif self.disk_dir:
+                path = self.disk_dir / f"{key}.json"
+                tmp_path = path.with_suffix('.tmp')
+                tmp_path.write_text(
+                    json.dumps({'expires_at': time.time() + self.ttl_seconds, 'response': response}),
+                    encoding='utf-8'
+                )
+                tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+
+# Singleton instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get or create the singleton response cache from environment.
+
+    Returns None when LLM_CACHE_ENABLED=false.
+    """
+    global _response_cache
+    if os.getenv('LLM_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+
+    if _response_cache is None:
+        backend = os.getenv('LLM_CACHE_BACKEND', 'memory').lower()
+        redis_client = None
+        disk_dir = None
+
+        if backend == 'redis':
+            import redis
+            redis_client = redis.from_url(
+                os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+                decode_responses=True,
+                socket_timeout=5,
+                socket_connect_timeout=5
+            )
+        elif backend == 'disk':
+            disk_dir = Path(os.getenv('LLM_CACHE_DIR', '.llm_cache'))
+
+        _response_cache = ResponseCache(
+            max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024')),
+            ttl_seconds=int(os.getenv('LLM_CACHE_TTL_SECONDS', '86400')),
+            redis_client=redis_client,
+            disk_dir=disk_dir
+        )
+    return _response_cache
+
+
+def reset_response_cache():
+    """Reset singleton (for testing)."""
+    global _response_cache
+    _response_cache = None
@@ -6,22 +6,53 @@ Provides:
 - Conversation state management
 - Automatic retry with backoff on 429 errors
 - Key cooldown management
+- Exact-match response caching
+- Async API with per-key/per-provider concurrency limits and batch fan-out
+- Optional request hedging on slow keys
+- Streaming responses with time-to-first-token and throughput metrics
+- Token-budgeted context compaction for long conversations
+- Single-flight coalescing of identical in-flight requests
 - Metrics and logging
 """
 import time
+import uuid
 import random
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, List, Union, Iterator, Tuple
 from datetime import datetime
 
 from keys.manager import KeyManager, get_key_manager, KeySelectionError
 from conversation.store import ConversationStore, get_conversation_store
-from llm.token_utils import estimate_tokens, estimate_completion_tokens
+from llm.token_utils import (
+    estimate_prompt_tokens, estimate_tokens_from_text,
+    estimate_completion_tokens, TokenCalibrator
+)
 from llm.providers import get_provider_client, ProviderError, RateLimitError, SafetyBlockError
+from llm.response_cache import ResponseCache, get_response_cache, make_cache_key
+from llm.concurrency import ConcurrencyLimiter, LatencyTracker
+from llm.context import ContextCompactor
+from llm.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
+# Provider error messages that mark a transient failure, worth retrying on another key
+RETRYABLE_ERROR_KEYWORDS = (
+    '504', 'deadline exceeded', 'timeout',
+    '503', 'service unavailable', 'temporarily unavailable',
+    '502', 'bad gateway', 'connection'
+)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Whether a provider error is transient (timeouts, 5xx, connection drops)."""
+    error_str = str(error).lower()
+    return any(keyword in error_str for keyword in RETRYABLE_ERROR_KEYWORDS)
+
+
 class RouterError(Exception):
     """Base error for router operations."""
     pass
@@ -39,9 +70,13 @@ class RequestRouter:
     Handles:
     - Key selection and rotation
     - Conversation history management
-    - Token estimation and TPM enforcement
+    - Token estimation, TPM enforcement and reconciliation with actual usage
     - Retry logic with exponential backoff
     - Error handling and cooldown management
+    - Response caching for byte-identical requests
+    - Concurrency limits, async fan-out and hedged requests
+    - Summarizing older turns once a conversation outgrows its token budget
+    - Sharing one provider call between concurrent identical requests
     """
     
     def __init__(
@@ -49,7 +84,9 @@ class RequestRouter:
         key_manager: Optional[KeyManager] = None,
         conv_store: Optional[ConversationStore] = None,
         max_retries: Optional[int] = None,
-        base_backoff_ms: Optional[int] = None
+        base_backoff_ms: Optional[int] = None,
+        response_cache: Optional[ResponseCache] = None,
+        hedge_percentile: Optional[float] = None
     ):
         """
         Initialize request router.
@@ -59,16 +96,56 @@ class RequestRouter:
             conv_store: ConversationStore instance
             max_retries: Maximum retry attempts (default: 3, or from env LLM_MAX_RETRIES)
             base_backoff_ms: Base backoff duration in milliseconds (default: 500)
+            response_cache: ResponseCache instance (default: from env, None if disabled)
+            hedge_percentile: Latency percentile after which a second key is
+                              tried in parallel (default: LLM_HEDGE_PERCENTILE,
+                              hedging off if unset)
         """
         self.key_manager = key_manager or get_key_manager()
         self.conv_store = conv_store or get_conversation_store()
+        self.response_cache = response_cache or get_response_cache()
         
         # Get max retries from env or use provided/default
         import os
         self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', '3'))
         self.base_backoff_ms = base_backoff_ms if base_backoff_ms is not None else int(os.getenv('LLM_BASE_BACKOFF_MS', '500'))
         
-        logger.info(f"Request router initialized (max_retries={self.max_retries}, base_backoff_ms={self.base_backoff_ms})")
+        # Provider calls block, so async callers and hedges run on thread pools
+        max_per_provider = int(os.getenv('LLM_MAX_CONCURRENT_PER_PROVIDER', '16'))
+        self.limiter = ConcurrencyLimiter(
+            max_per_key=int(os.getenv('LLM_MAX_CONCURRENT_PER_KEY', '4')),
+            max_per_provider=max_per_provider
+        )
+        self.latencies = LatencyTracker()
+        self.token_calibrator = TokenCalibrator()
+        if hedge_percentile is None and os.getenv('LLM_HEDGE_PERCENTILE'):
+            hedge_percentile = float(os.getenv('LLM_HEDGE_PERCENTILE'))
+        self.hedge_percentile = hedge_percentile
+        self._async_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('LLM_ASYNC_WORKERS', '32')),
+            thread_name_prefix='llm-router'
+        )
+        # A hedged call holds two threads (primary and hedge)
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('LLM_HEDGE_WORKERS', str(2 * max_per_provider))),
+            thread_name_prefix='llm-hedge'
+        )
+        self.compactor = ContextCompactor(
+            self.conv_store,
+            summarizer=self._summarize_turns,
+            token_budget=int(os.getenv('LLM_CONTEXT_TOKEN_BUDGET', '16000')),
+            keep_recent=int(os.getenv('LLM_CONTEXT_KEEP_RECENT', '6'))
+        )
+        # Cross-process coalescing needs the shared (Redis) cache tier to hand over results
+        self.single_flight = SingleFlight(
+            redis_client=self.response_cache.redis if self.response_cache else None,
+            lock_ttl_ms=int(os.getenv('LLM_SINGLE_FLIGHT_LOCK_MS', '60000'))
+        )
+        
+        logger.info(
+            f"Request router initialized (max_retries={self.max_retries}, "
+            f"base_backoff_ms={self.base_backoff_ms}, hedge_percentile={self.hedge_percentile})"
+        )
     
     def send_chat(
         self,
@@ -81,7 +158,8 @@ class RequestRouter:
         temperature: float = 0.7,
         system_prompt: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-        workload: Optional[str] = None
+        workload: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Send a chat message and get response.
@@ -97,13 +175,18 @@ class RequestRouter:
             system_prompt: System prompt (if starting new conversation)
             metadata: Additional metadata to store
             workload: Workload type - "light" (flash), "medium" (pro), "heavy" (pro-preview)
+            use_cache: Serve/store identical requests from the response cache and
+                       share calls with identical in-flight requests
+                       (False forces a provider call)
             
         Returns:
             {
                 'success': bool,
                 'content': str,  # Assistant response
                 'model': str,
-                'key_id': str,
+                'key_id': str,  # None on a cache hit
+                'cache_hit': bool,
+                'coalesced': bool,  # Shared an identical in-flight request's call
                 'tokens': {
                     'input': int,
                     'output': int,
@@ -114,201 +197,484 @@ class RequestRouter:
             }
         """
         try:
-            # Ensure conversation exists
-            if not self.conv_store.get_metadata(conv_id):
-                meta = {'user_id': user_id} if user_id else {}
-                if metadata:
-                    meta.update(metadata)
-                self.conv_store.create_conversation(conv_id, meta)
-                
-                # Add system prompt if provided
-                if system_prompt:
-                    self.conv_store.append_message(
-                        conv_id, 'system', system_prompt
+            # One round trip for metadata + capped history; the turn is
+            # persisted in one more once the response is in
+            history, pending, conv_meta = self._load_context(conv_id, prompt, user_id, metadata, system_prompt)
+            messages = history + [{'role': 'user', 'content': prompt}]
+            
+            # Serve byte-identical requests from cache before reserving capacity
+            # or compacting (which may cost a summarization call)
+            use_cache = use_cache and self.response_cache is not None
+            cache_key = None
+            if use_cache:
+                cache_key = self._request_cache_key(
+                    messages, model_preference, workload, max_output_tokens, temperature
+                )
+                cached = self._get_cached_response(cache_key)
+                if cached:
+                    self._save_turn(
+                        conv_id, pending, cached['content'],
+                        tokens=cached.get('tokens', {}).get('output'),
+                        metadata={'model': cached['model'], 'key_id': None}
                     )
+                    cached['conversation_id'] = conv_id
+                    cached['success'] = True
+                    logger.info(f"Chat served from cache: conv_id={conv_id}, model={cached['model']}")
+                    return cached
+            
+            def send() -> Dict[str, Any]:
+                # Fit long conversations into the context budget; the response
+                # is still cached under the key of the full request
+                context = self._compact_context(conv_id, history, conv_meta)
+                request = context + [{'role': 'user', 'content': prompt}]
+                tokens_needed = self._estimate_tokens(
+                    request, expected_completion_tokens, model_preference, workload
+                )
+                
+                logger.info(
+                    f"Sending chat for conv_id={conv_id}, "
+                    f"estimated_tokens={tokens_needed}, "
+                    f"model_preference={model_preference}, "
+                    f"workload={workload}"
+                )
+                return self._send_with_retries(
+                    request, model_preference, workload, tokens_needed,
+                    max_output_tokens, temperature, cache_key
+                )
             
-            # Build message history
-            history = self.conv_store.get_history(conv_id)
+            # Concurrent identical requests share one provider call
+            if cache_key:
+                response, shared = self.single_flight.do(
+                    cache_key,
+                    send,
+                    lookup=lambda: self.response_cache.get(cache_key)
+                )
+                # Every caller gets its own copy of the shared response
+                response = dict(response, coalesced=shared)
+                response.setdefault('key_id', None)
+            else:
+                response = send()
+                response['coalesced'] = False
             
-            # Add user message
-            self.conv_store.append_message(conv_id, 'user', prompt)
-            messages = history + [{'role': 'user', 'content': prompt}]
+            # Success - save the turn
+            self._save_turn(
+                conv_id,
+                pending,
+                response['content'],
+                tokens=response.get('tokens', {}).get('output'),
+                metadata={
+                    'model': response['model'],
+                    'key_id': response['key_id']
+                }
+            )
             
-            # Estimate tokens needed
-            tokens_needed = estimate_tokens(messages, expected_completion_tokens)
+            response['conversation_id'] = conv_id
+            response['success'] = True
+            response['cache_hit'] = False
             
             logger.info(
-                f"Sending chat for conv_id={conv_id}, "
-                f"estimated_tokens={tokens_needed}, "
-                f"model_preference={model_preference}, "
-                f"workload={workload}"
+                f"Chat successful: conv_id={conv_id}, "
+                f"model={response['model']}, "
+                f"coalesced={response['coalesced']}, "
+                f"tokens={response.get('tokens', {})}"
             )
             
-            # Try to send with retries
-            excluded_keys = []
-            for attempt in range(self.max_retries + 1):
-                try:
-                    # Select key
-                    key_meta = self.key_manager.select_key(
-                        model_preference=model_preference,
+            return response
+            
+        except AllKeysExhaustedError as e:
+            logger.error(f"All keys exhausted: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_type': 'rate_limited',
+                'conversation_id': conv_id
+            }
+            
+        except Exception as e:
+            logger.exception(f"Unexpected error in send_chat: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_type': 'internal_error',
+                'conversation_id': conv_id
+            }
+    
+    def _send_with_retries(
+        self,
+        messages: List[Dict[str, str]],
+        model_preference: Optional[str],
+        workload: Optional[str],
+        tokens_needed: int,
+        max_output_tokens: int,
+        temperature: float,
+        cache_key: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Select a key and call the provider, retrying on other keys.
+        
+        Args:
+            cache_key: Response cache key of the request, to store the
+                       response under (None to skip caching)
+        
+        Returns:
+            Same as _call_provider()
+            
+        Raises:
+            AllKeysExhaustedError: No key could serve the request
+            RouterError: Safety block or non-retryable provider error
+        """
+        excluded_keys = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Select key
+                key_meta = self.key_manager.select_key(
+                    model_preference=model_preference,
+                    tokens_needed=tokens_needed,
+                    exclude_keys=excluded_keys,
+                    workload=workload
+                )
+                
+                if not key_meta:
+                    raise AllKeysExhaustedError(
+                        "No keys with available capacity"
+                    )
+                
+                # Make API call
+                if self.hedge_percentile:
+                    response = self._call_provider_hedged(
+                        messages=messages,
+                        key_meta=key_meta,
+                        max_output_tokens=max_output_tokens,
+                        temperature=temperature,
                         tokens_needed=tokens_needed,
-                        exclude_keys=excluded_keys,
-                        workload=workload
+                        excluded_keys=excluded_keys
                     )
-                    
-                    if not key_meta:
-                        raise AllKeysExhaustedError(
-                            "No keys with available capacity"
-                        )
-                    
-                    # Make API call
+                else:
                     response = self._call_provider(
                         messages=messages,
                         key_meta=key_meta,
                         max_output_tokens=max_output_tokens,
                         temperature=temperature
                     )
-                    
-                    # Success - save assistant response
-                    self.conv_store.append_message(
-                        conv_id,
-                        'assistant',
-                        response['content'],
-                        tokens=response.get('tokens', {}).get('output'),
-                        metadata={
-                            'model': response['model'],
-                            'key_id': key_meta['key_id']
-                        }
+                
+                # Store before returning so coalesced waiters in other
+                # processes find it as soon as the in-flight lock is released.
+                # The request's key, not one built from the model the provider
+                # reports (which may be a versioned alias), so lookups match.
+                if cache_key:
+                    self.response_cache.set(
+                        cache_key,
+                        {k: response[k] for k in ('content', 'model', 'tokens', 'finish_reason') if k in response}
                     )
-                    
-                    response['conversation_id'] = conv_id
-                    response['success'] = True
-                    
-                    logger.info(
-                        f"Chat successful: conv_id={conv_id}, "
-                        f"model={response['model']}, "
-                        f"tokens={response.get('tokens', {})}"
+                
+                return response
+                
+            except SafetyBlockError as e:
+                # Handle safety blocks - DON'T mark key unhealthy (content issue, not API issue)
+                logger.warning(
+                    f"Safety block for key {key_meta['key_id']}: {e}"
+                )
+                
+                # Strategy 1: Escalate model tier (Pro models less sensitive)
+                if workload == "light" and attempt < self.max_retries:
+                    logger.info("Escalating from light to medium workload due to safety block")
+                    workload = "medium"
+                    continue
+                elif workload == "medium" and attempt < self.max_retries:
+                    logger.info("Escalating from medium to heavy workload due to safety block")
+                    workload = "heavy"
+                    continue
+                
+                # Strategy 2: Last attempt - sanitize prompt
+                elif attempt == self.max_retries:
+                    logger.warning("Last attempt: sanitizing prompt to bypass safety filter")
+                    messages = self._sanitize_prompt(messages)
+                    # Don't exclude key - retry with sanitized prompt
+                    continue
+                else:
+                    # Can't escalate further
+                    raise RouterError(
+                        f"Content blocked by safety filter after all escalation attempts. "
+                        f"Safety ratings: {e.safety_ratings}"
                     )
-                    
-                    return response
-                    
-                except SafetyBlockError as e:
-                    # Handle safety blocks - DON'T mark key unhealthy (content issue, not API issue)
-                    logger.warning(
-                        f"Safety block for key {key_meta['key_id']}: {e}"
+                
+            except RateLimitError as e:
+                # Handle rate limit
+                logger.warning(
+                    f"Rate limit for key {key_meta['key_id']}: {e}"
+                )
+                
+                # Set cooldown
+                cooldown_seconds = e.retry_after or 60
+                self.key_manager.mark_key_unhealthy(
+                    key_meta['key_id'],
+                    cooldown_seconds=cooldown_seconds,
+                    reason=f"Rate limit (429): {str(e)}"
+                )
+                
+                # Exclude this key from next attempt
+                excluded_keys.append(key_meta['key_id'])
+                
+                # Backoff before retry
+                if attempt < self.max_retries:
+                    backoff_ms = self._calculate_backoff(attempt)
+                    logger.info(f"Retrying after {backoff_ms}ms backoff")
+                    time.sleep(backoff_ms / 1000)
+                else:
+                    raise AllKeysExhaustedError(
+                        f"All retry attempts exhausted: {str(e)}"
                     )
-                    
-                    # Strategy 1: Escalate model tier (Pro models less sensitive)
-                    if workload == "light" and attempt < self.max_retries:
-                        logger.info("Escalating from light to medium workload due to safety block")
-                        workload = "medium"
-                        continue
-                    elif workload == "medium" and attempt < self.max_retries:
-                        logger.info("Escalating from medium to heavy workload due to safety block")
-                        workload = "heavy"
-                        continue
-                    
-                    # Strategy 2: Last attempt - sanitize prompt
-                    elif attempt == self.max_retries:
-                        logger.warning("Last attempt: sanitizing prompt to bypass safety filter")
-                        messages = self._sanitize_prompt(messages)
-                        # Don't exclude key - retry with sanitized prompt
-                        continue
-                    else:
-                        # Can't escalate further
-                        raise RouterError(
-                            f"Content blocked by safety filter after all escalation attempts. "
-                            f"Safety ratings: {e.safety_ratings}"
-                        )
-                    
-                except RateLimitError as e:
-                    # Handle rate limit
+            
+            except ProviderError as e:
+                # Check if this is a retryable error
+                is_retryable = is_retryable_error(e)
+                
+                if is_retryable and attempt < self.max_retries:
                     logger.warning(
-                        f"Rate limit for key {key_meta['key_id']}: {e}"
+                        f"Retryable provider error on attempt {attempt + 1}/{self.max_retries + 1}: {e}"
                     )
                     
-                    # Set cooldown
-                    cooldown_seconds = e.retry_after or 60
-                    self.key_manager.mark_key_unhealthy(
-                        key_meta['key_id'],
-                        cooldown_seconds=cooldown_seconds,
-                        reason=f"Rate limit (429): {str(e)}"
-                    )
+                    # Set short cooldown for this key
+                    if key_meta:
+                        self.key_manager.mark_key_unhealthy(
+                            key_meta['key_id'],
+                            cooldown_seconds=30,
+                            reason=f"Retryable error: {str(e)}"
+                        )
+                        excluded_keys.append(key_meta['key_id'])
                     
-                    # Exclude this key from next attempt
-                    excluded_keys.append(key_meta['key_id'])
+                    # Exponential backoff before retry
+                    backoff_ms = self._calculate_backoff(attempt)
+                    logger.info(f"Retrying after {backoff_ms}ms backoff (different key)")
+                    time.sleep(backoff_ms / 1000)
+                    continue  # Retry with different key
+                else:
+                    # Non-retryable error or max retries exceeded
+                    logger.error(f"Non-retryable provider error: {e}")
                     
-                    # Backoff before retry
-                    if attempt < self.max_retries:
-                        backoff_ms = self._calculate_backoff(attempt)
-                        logger.info(f"Retrying after {backoff_ms}ms backoff")
-                        time.sleep(backoff_ms / 1000)
-                    else:
-                        raise AllKeysExhaustedError(
-                            f"All retry attempts exhausted: {str(e)}"
+                    if key_meta:
+                        self.key_manager.mark_key_unhealthy(
+                            key_meta['key_id'],
+                            cooldown_seconds=30,
+                            reason=f"Provider error: {str(e)}"
                         )
+                    
+                    raise RouterError(f"Provider error: {str(e)}")
+        
+        # Should not reach here
+        raise AllKeysExhaustedError("Max retries exceeded")
+    
+    def stream_chat(
+        self,
+        conv_id: str,
+        prompt: str,
+        user_id: Optional[str] = None,
+        model_preference: Optional[str] = None,
+        expected_completion_tokens: int = 512,
+        max_output_tokens: int = 2048,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        workload: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Send a chat message and stream the response as it is generated.
+        
+        Rate limits and retryable errors are retried on another key as long
+        as nothing has been streamed yet. Safety blocks escalate the workload
+        tier, then sanitize the prompt, without cooling the key down. The
+        assistant message is persisted once, after the last chunk.
+        
+        Args:
+            Same as send_chat()
+            
+        Yields:
+            {'type': 'chunk', 'content': str} for each text delta, then one
+            {'type': 'done', ...} with the send_chat() response fields plus
+            'ttft_ms' (time to first token) and 'tokens_per_sec'
+        """
+        history, pending, conv_meta = self._load_context(conv_id, prompt, user_id, metadata, system_prompt)
+        messages = history + [{'role': 'user', 'content': prompt}]
+        
+        use_cache = use_cache and self.response_cache is not None
+        cache_key = None
+        if use_cache:
+            cache_key = self._request_cache_key(
+                messages, model_preference, workload, max_output_tokens, temperature
+            )
+            cached = self._get_cached_response(cache_key)
+            if cached:
+                self._save_turn(
+                    conv_id,
+                    pending,
+                    cached['content'],
+                    tokens=cached.get('tokens', {}).get('output'),
+                    metadata={'model': cached['model'], 'key_id': None}
+                )
+                yield {'type': 'chunk', 'content': cached['content']}
+                yield dict(cached, type='done', success=True, conversation_id=conv_id,
+                           ttft_ms=cached['duration_ms'], tokens_per_sec=None)
+                return
+        
+        messages = self._compact_context(conv_id, history, conv_meta) + [{'role': 'user', 'content': prompt}]
+        tokens_needed = self._estimate_tokens(messages, expected_completion_tokens, model_preference, workload)
+        excluded_keys = []
+        last_error = "No keys with available capacity"
+        sanitized = False
+        
+        for attempt in range(self.max_retries + 1):
+            key_meta = self.key_manager.select_key(
+                model_preference=model_preference,
+                tokens_needed=tokens_needed,
+                exclude_keys=excluded_keys,
+                workload=workload
+            )
+            if not key_meta:
+                break
+            
+            parts = []
+            final = {'model': key_meta['model']}
+            start_time = time.time()
+            first_token_time = None
+            try:
+                client = get_provider_client(key_meta['provider'])
+                with self.limiter.slot(key_meta['provider'], key_meta['key_id']):
+                    for event in client.stream_completion(
+                        api_key=key_meta['secret'],
+                        model=key_meta['model'],
+                        messages=messages,
+                        max_tokens=max_output_tokens,
+                        temperature=temperature
+                    ):
+                        if event['type'] == 'chunk':
+                            if first_token_time is None:
+                                first_token_time = time.time()
+                            parts.append(event['content'])
+                            yield event
+                        else:
+                            final = event
+            
+            except SafetyBlockError as e:
+                # Content issue, not an API issue - don't mark the key unhealthy
+                last_error = str(e)
+                logger.warning(f"Safety block for key {key_meta['key_id']}: {e}")
                 
-                except ProviderError as e:
-                    # Check if this is a retryable error
-                    error_str = str(e).lower()
-                    is_retryable = any(keyword in error_str for keyword in [
-                        '504', 'deadline exceeded', 'timeout', 
-                        '503', 'service unavailable', 'temporarily unavailable',
-                        '502', 'bad gateway', 'connection'
-                    ])
+                if not parts and attempt < self.max_retries:
+                    # Strategy 1: Escalate model tier (Pro models less sensitive)
+                    if workload in ('light', 'medium'):
+                        workload = 'medium' if workload == 'light' else 'heavy'
+                        logger.info(f"Escalating to {workload} workload due to safety block")
+                        continue
                     
-                    if is_retryable and attempt < self.max_retries:
-                        logger.warning(
-                            f"Retryable provider error on attempt {attempt + 1}/{self.max_retries + 1}: {e}"
-                        )
-                        
-                        # Set short cooldown for this key
-                        if key_meta:
-                            self.key_manager.mark_key_unhealthy(
-                                key_meta['key_id'],
-                                cooldown_seconds=30,
-                                reason=f"Retryable error: {str(e)}"
-                            )
-                            excluded_keys.append(key_meta['key_id'])
-                        
-                        # Exponential backoff before retry
-                        backoff_ms = self._calculate_backoff(attempt)
-                        logger.info(f"Retrying after {backoff_ms}ms backoff (different key)")
-                        time.sleep(backoff_ms / 1000)
-                        continue  # Retry with different key
-                    else:
-                        # Non-retryable error or max retries exceeded
-                        logger.error(f"Non-retryable provider error: {e}")
-                        
-                        if key_meta:
-                            self.key_manager.mark_key_unhealthy(
-                                key_meta['key_id'],
-                                cooldown_seconds=30,
-                                reason=f"Provider error: {str(e)}"
-                            )
-                        
-                        raise RouterError(f"Provider error: {str(e)}")
-            
-            # Should not reach here
-            raise AllKeysExhaustedError("Max retries exceeded")
+                    # Strategy 2: Sanitize the prompt once
+                    if not sanitized:
+                        logger.warning("Sanitizing prompt to bypass safety filter")
+                        messages = self._sanitize_prompt(messages)
+                        sanitized = True
+                        continue
+                
+                yield {
+                    'type': 'done',
+                    'success': False,
+                    'error': last_error,
+                    'error_type': 'safety_block',
+                    'safety_ratings': e.safety_ratings,
+                    'partial_content': ''.join(parts),
+                    'conversation_id': conv_id
+                }
+                return
             
-        except AllKeysExhaustedError as e:
-            logger.error(f"All keys exhausted: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'error_type': 'rate_limited',
-                'conversation_id': conv_id
-            }
+            except (RateLimitError, ProviderError) as e:
+                last_error = str(e)
+                rate_limited = isinstance(e, RateLimitError)
+                cooldown_seconds = (e.retry_after or 60) if rate_limited else 30
+                self.key_manager.mark_key_unhealthy(
+                    key_meta['key_id'],
+                    cooldown_seconds=cooldown_seconds,
+                    reason=f"Streaming error: {last_error}"
+                )
+                excluded_keys.append(key_meta['key_id'])
+                
+                # Output already reached the caller (cannot retry transparently),
+                # out of attempts, or an error another key won't fix
+                if parts or attempt == self.max_retries or not (rate_limited or is_retryable_error(e)):
+                    logger.error(f"Streaming failed for conv_id={conv_id}: {e}")
+                    yield {
+                        'type': 'done',
+                        'success': False,
+                        'error': last_error,
+                        'error_type': 'rate_limited' if rate_limited else 'provider_error',
+                        'partial_content': ''.join(parts),
+                        'conversation_id': conv_id
+                    }
+                    return
+                
+                backoff_ms = self._calculate_backoff(attempt)
+                logger.warning(f"Streaming error before first token, retrying after {backoff_ms}ms: {e}")
+                time.sleep(backoff_ms / 1000)
+                continue
             
-        except Exception as e:
-            logger.exception(f"Unexpected error in send_chat: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'error_type': 'internal_error',
-                'conversation_id': conv_id
+            end_time = time.time()
+            content = ''.join(parts)
+            tokens = final.get('tokens') or {}
+            output_tokens = tokens.get('output') or estimate_tokens_from_text(content)
+            ttft_ms = int(((first_token_time or end_time) - start_time) * 1000)
+            generation_seconds = end_time - (first_token_time or start_time)
+            tokens_per_sec = round(output_tokens / generation_seconds, 1) if generation_seconds > 0 else None
+            
+            self.latencies.record(key_meta['model'], int((end_time - start_time) * 1000))
+            self._record_usage(key_meta, messages, tokens)
+            
+            # Persist the full turn once
+            self._save_turn(
+                conv_id,
+                pending,
+                content,
+                tokens=tokens.get('output'),
+                metadata={
+                    'model': final['model'],
+                    'key_id': key_meta['key_id'],
+                    'ttft_ms': ttft_ms,
+                    'tokens_per_sec': tokens_per_sec
+                }
+            )
+            
+            if cache_key:
+                self.response_cache.set(
+                    cache_key,
+                    {'content': content, 'model': final['model'], 'tokens': tokens,
+                     'finish_reason': final.get('finish_reason')}
+                )
+            
+            logger.info(
+                f"Stream complete: conv_id={conv_id}, model={final['model']}, "
+                f"ttft={ttft_ms}ms, tokens/sec={tokens_per_sec}"
+            )
+            
+            yield {
+                'type': 'done',
+                'success': True,
+                'content': content,
+                'model': final['model'],
+                'key_id': key_meta['key_id'],
+                'tokens': tokens,
+                'finish_reason': final.get('finish_reason'),
+                'cache_hit': False,
+                'conversation_id': conv_id,
+                'duration_ms': int((end_time - start_time) * 1000),
+                'ttft_ms': ttft_ms,
+                'tokens_per_sec': tokens_per_sec
             }
+            return
+        
+        yield {
+            'type': 'done',
+            'success': False,
+            'error': last_error,
+            'error_type': 'rate_limited',
+            'conversation_id': conv_id
+        }
     
     def _call_provider(
         self,
@@ -340,17 +706,23 @@ class RequestRouter:
         client = get_provider_client(provider)
         
         # Make request
-        start_time = time.time()
+        with self.limiter.slot(provider, key_meta['key_id']):
+            start_time = time.time()
+            
+            response = client.chat_completion(
+                api_key=api_key,
+                model=model,
+                messages=messages,
+                max_tokens=max_output_tokens,
+                temperature=temperature
+            )
+            
+            duration_ms = int((time.time() - start_time) * 1000)
         
-        response = client.chat_completion(
-            api_key=api_key,
-            model=model,
-            messages=messages,
-            max_tokens=max_output_tokens,
-            temperature=temperature
-        )
+        self.latencies.record(model, duration_ms)
+        self._record_usage(key_meta, messages, response.get('tokens') or {})
         
-        duration_ms = int((time.time() - start_time) * 1000)
+        output_tokens = response.get('tokens', {}).get('output') or 0
         
         logger.debug(
             f"Provider call completed: model={model}, "
@@ -360,9 +732,314 @@ class RequestRouter:
         
         response['key_id'] = key_meta['key_id']
         response['duration_ms'] = duration_ms
+        response['tokens_per_sec'] = round(output_tokens / (duration_ms / 1000), 1) if duration_ms else None
         
         return response
     
+    def _call_provider_hedged(
+        self,
+        messages: List[Dict[str, str]],
+        key_meta: Dict[str, Any],
+        max_output_tokens: int,
+        temperature: float,
+        tokens_needed: int,
+        excluded_keys: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Call provider, firing a second key if the first is slower than the
+        hedge_percentile latency for its model. The first successful
+        response wins; the other call is left to finish and discarded.
+        
+        Returns:
+            Same as _call_provider(), plus 'hedged': bool
+        """
+        threshold_ms = self.latencies.percentile(key_meta['model'], self.hedge_percentile)
+        call = functools.partial(
+            self._call_provider,
+            messages=messages,
+            max_output_tokens=max_output_tokens,
+            temperature=temperature
+        )
+        primary = self._hedge_executor.submit(call, key_meta=key_meta)
+        
+        if threshold_ms is None:
+            # Not enough latency history yet
+            response = primary.result()
+            response['hedged'] = False
+            return response
+        
+        done, _ = wait([primary], timeout=threshold_ms / 1000)
+        if done:
+            response = primary.result()
+            response['hedged'] = False
+            return response
+        
+        hedge_meta = self.key_manager.select_key(
+            model_preference=key_meta['model'],
+            tokens_needed=tokens_needed,
+            exclude_keys=excluded_keys + [key_meta['key_id']]
+        )
+        if not hedge_meta:
+            response = primary.result()
+            response['hedged'] = False
+            return response
+        
+        logger.info(
+            f"Hedging request: {key_meta['key_id']} exceeded p{self.hedge_percentile:g} "
+            f"({threshold_ms:.0f}ms), also trying {hedge_meta['key_id']}"
+        )
+        hedge = self._hedge_executor.submit(call, key_meta=hedge_meta)
+        # The retry logic only sees the primary's error, so the hedge key's
+        # health is updated here whichever call wins
+        hedge.add_done_callback(functools.partial(self._report_hedge_error, hedge_meta))
+        
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        # The primary's outcome is discarded too
+                        primary.add_done_callback(functools.partial(self._report_hedge_error, key_meta))
+                    response = future.result()
+                    response['hedged'] = True
+                    return response
+        
+        # Both failed - surface the primary key's error to the retry logic
+        raise primary.exception()
+    
+    def _report_hedge_error(self, key_meta: Dict[str, Any], future):
+        """Mark a key unhealthy for the error of a hedged call whose outcome is discarded"""
+        error = None if future.cancelled() else future.exception()
+        if isinstance(error, RateLimitError):
+            cooldown_seconds = error.retry_after or 60
+            reason = f"Rate limit (429): {str(error)}"
+        elif isinstance(error, ProviderError) and not isinstance(error, SafetyBlockError):
+            cooldown_seconds = 30
+            reason = f"Provider error: {str(error)}"
+        else:
+            # Success, or a content issue rather than a key issue
+            return
+        
+        logger.warning(f"Hedged call on key {key_meta['key_id']} failed: {error}")
+        self.key_manager.mark_key_unhealthy(
+            key_meta['key_id'],
+            cooldown_seconds=cooldown_seconds,
+            reason=reason
+        )
+    
+    async def asend_chat(self, conv_id: str, prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        Async variant of send_chat().
+        
+        Provider SDK calls block, so the request runs on the router's
+        thread pool; per-key and per-provider limits still apply.
+        
+        Returns:
+            Same as send_chat()
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._async_executor,
+            functools.partial(self.send_chat, conv_id, prompt, **kwargs)
+        )
+    
+    async def asend_one_shot(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Async variant of send_one_shot()."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._async_executor,
+            functools.partial(self.send_one_shot, prompt, **kwargs)
+        )
+    
+    async def gather_one_shot(
+        self,
+        requests: List[Union[str, Dict[str, Any]]],
+        **common_kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Send independent one-shot requests concurrently.
+        
+        Args:
+            requests: Prompts, or dicts of send_one_shot() arguments
+            **common_kwargs: Arguments applied to every request
+            
+        Returns:
+            Responses in request order (failures are error dicts, as with
+            send_one_shot())
+        """
+        calls = []
+        for request in requests:
+            kwargs = dict(common_kwargs)
+            kwargs.update({'prompt': request} if isinstance(request, str) else request)
+            calls.append(self.asend_one_shot(**kwargs))
+        return await asyncio.gather(*calls)
+    
+    def _load_context(
+        self,
+        conv_id: str,
+        prompt: str,
+        user_id: Optional[str],
+        metadata: Optional[Dict[str, Any]],
+        system_prompt: Optional[str]
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any], Dict[str, Any]]:
+        """
+        Read conversation metadata and capped history in one round trip.
+        
+        Returns:
+            (history, pending, conv_meta) - stored history preceding the
+            prompt, the state to persist with the turn ('messages', plus
+            'create' with the conversation metadata for a new conversation),
+            and the stored metadata ({} for a new conversation)
+        """
+        conv_meta, history = self.conv_store.get_context(conv_id)
+        pending = {'messages': []}
+        
+        if not conv_meta:
+            meta = {'user_id': user_id} if user_id else {}
+            if metadata:
+                meta.update(metadata)
+            pending['create'] = meta
+            if system_prompt:
+                history = [{'role': 'system', 'content': system_prompt}]
+                pending['messages'].append({'role': 'system', 'content': system_prompt})
+        
+        pending['messages'].append({'role': 'user', 'content': prompt})
+        return history, pending, conv_meta
+    
+    def _compact_context(
+        self,
+        conv_id: str,
+        history: List[Dict[str, str]],
+        conv_meta: Dict[str, Any]
+    ) -> List[Dict[str, str]]:
+        """History to send, compacted if it exceeds the context token budget."""
+        if not conv_meta:
+            return history
+        return self.compactor.compact(conv_id, history, conv_meta.get('message_count', len(history)))
+    
+    def _save_turn(
+        self,
+        conv_id: str,
+        pending: Dict[str, Any],
+        content: str,
+        tokens: Optional[int],
+        metadata: Dict[str, Any]
+    ):
+        """Persist the prompt and assistant response (plus any new conversation) together."""
+        if 'create' in pending:
+            self.conv_store.create_conversation(conv_id, pending['create'])
+        self.conv_store.append_messages(
+            conv_id,
+            pending['messages'] + [{
+                'role': 'assistant',
+                'content': content,
+                'tokens': tokens,
+                'metadata': metadata
+            }]
+        )
+    
+    def _summarize_turns(
+        self,
+        previous: Optional[str],
+        messages: List[Dict[str, str]]
+    ) -> Optional[str]:
+        """Fold conversation turns into a rolling summary with a light model."""
+        transcript = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+        prompt = (
+            "Summarize this conversation so it can replace the original messages as context. "
+            "Keep every fact, decision, requirement, parameter value and open question; "
+            "drop pleasantries. Reply with the summary only.\n\n"
+        )
+        if previous:
+            prompt += f"Summary so far:\n{previous}\n\nNew messages:\n"
+        prompt += transcript
+        
+        # Straight to the provider: a summary is not a conversation to store
+        messages = [{'role': 'user', 'content': prompt}]
+        key_meta = self.key_manager.select_key(
+            tokens_needed=self._estimate_tokens(messages, 1024, None, 'light'),
+            workload='light'
+        )
+        if not key_meta:
+            logger.warning("No key available for conversation summary")
+            return None
+        
+        try:
+            response = self._call_provider(
+                messages=messages,
+                key_meta=key_meta,
+                max_output_tokens=1024,
+                temperature=0.2
+            )
+        except ProviderError as e:
+            logger.warning(f"Conversation summary failed on key {key_meta['key_id']}: {e}")
+            if isinstance(e, RateLimitError):
+                self.key_manager.mark_key_unhealthy(
+                    key_meta['key_id'],
+                    cooldown_seconds=e.retry_after or 60,
+                    reason=f"Rate limit (429): {str(e)}"
+                )
+            return None
+        return response.get('content') or None
+    
+    def _request_cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        model_preference: Optional[str],
+        workload: Optional[str],
+        max_output_tokens: int,
+        temperature: float
+    ) -> Optional[str]:
+        """Cache key for the provider/model the request would use (None if no key fits)."""
+        target = self.key_manager.resolve_target(model_preference=model_preference, workload=workload)
+        if not target:
+            return None
+        return make_cache_key(target['provider'], target['model'], messages, temperature, max_output_tokens)
+    
+    def _get_cached_response(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+        
+        Returns:
+            Response dict marked as a cache hit, or None
+        """
+        if not cache_key:
+            return None
+        
+        start_time = time.time()
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        cached['key_id'] = None
+        cached['cache_hit'] = True
+        cached['duration_ms'] = int((time.time() - start_time) * 1000)
+        return cached
+    
+    def _estimate_tokens(
+        self,
+        messages: List[Dict[str, str]],
+        expected_completion_tokens: int,
+        model_preference: Optional[str],
+        workload: Optional[str]
+    ) -> int:
+        """Token estimate calibrated for the model the request will most likely use."""
+        target = self.key_manager.resolve_target(model_preference=model_preference, workload=workload)
+        return self.token_calibrator.estimate(
+            messages,
+            expected_completion_tokens,
+            model=target['model'] if target else None
+        )
+    
+    def _record_usage(self, key_meta: Dict[str, Any], messages: List[Dict[str, str]], tokens: Dict[str, int]):
+        """
+        Reconcile the key's TPM reservation with actual usage and calibrate
+        the estimator for its model.
+        """
+        self.key_manager.reconcile_usage(key_meta, tokens.get('total'))
+        self.token_calibrator.observe(key_meta['model'], estimate_prompt_tokens(messages), tokens.get('input'))
+    
     def _calculate_backoff(self, attempt: int) -> int:
         """
         Calculate exponential backoff with jitter.
@@ -391,7 +1068,8 @@ class RequestRouter:
         expected_completion_tokens: int = 512,
         max_output_tokens: int = 2048,
         temperature: float = 0.7,
-        workload: Optional[str] = None
+        workload: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Send a one-shot request (no conversation history).
@@ -406,12 +1084,13 @@ class RequestRouter:
             max_output_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             workload: Workload type - "light" (flash), "medium" (pro), "heavy" (pro-preview)
+            use_cache: Serve/store identical requests from the response cache
             
         Returns:
             Same as send_chat()
         """
-        # Create temporary conversation ID
-        conv_id = f"oneshot_{int(time.time() * 1000)}"
+        # Create temporary conversation ID (unique across concurrent calls)
+        conv_id = f"oneshot_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
         
         return self.send_chat(
             conv_id=conv_id,
@@ -421,7 +1100,8 @@ class RequestRouter:
             expected_completion_tokens=expected_completion_tokens,
             max_output_tokens=max_output_tokens,
             temperature=temperature,
-            workload=workload
+            workload=workload,
+            use_cache=use_cache
         )
     
     def get_conversation(self, conv_id: str) -> Dict[str, Any]:
@@ -0,0 +1,149 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests.
+
+Concurrent callers with the same key share one call:
+- In-process, followers wait on the first caller's future
+- Across processes, a short-lived Redis lock elects one caller; the others
+  poll for its result (e.g. in the shared response cache) until the lock
+  is released or expires
+"""
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Runs one call per key at a time and shares its result."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        lock_ttl_ms: int = 60000,
+        poll_interval_ms: int = 100
+    ):
+        """
+        Initialize single-flight group.
+
+        Args:
+            redis_client: Redis client for cross-process coalescing (optional)
+            lock_ttl_ms: Lifetime of the cross-process lock - waiters, in this
+                         process or another, give up and call themselves
+                         after this long
+            poll_interval_ms: How often cross-process waiters check for a result
+        """
+        self.redis = redis_client
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval_ms = poll_interval_ms
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+        self.release_script = None
+        if self.redis is not None:
+            with open(Path(__file__).parent / 'inflight_release.lua', 'r') as f:
+                self.release_script = self.redis.register_script(f.read())
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        lookup: Optional[Callable[[], Any]] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Call fn, or share the result of an identical call already in flight.
+
+        Args:
+            key: Identity of the call (e.g. response cache key)
+            fn: The call; must publish its result where lookup finds it
+                for cross-process sharing
+            lookup: Returns a result published by another process, or None
+                    (cross-process coalescing is off without it)
+
+        Returns:
+            (result, shared) - shared is True if another caller made the call.
+            The result object is shared between callers; don't mutate it.
+
+        Raises:
+            Whatever fn raised, in the caller and in every waiter
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            logger.debug(f"Joining in-flight request {key[:12]}")
+            try:
+                return future.result(timeout=self.lock_ttl_ms / 1000), True
+            except FutureTimeoutError:
+                logger.warning(f"In-flight request {key[:12]} timed out, calling directly")
+                return fn(), False
+
+        try:
+            result, shared = self._call_once_across_processes(key, fn, lookup)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, shared
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _call_once_across_processes(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        lookup: Optional[Callable[[], Any]]
+    ) -> Tuple[Any, bool]:
+        if self.redis is None or lookup is None:
+            return fn(), False
+
+        lock_key = f"llm:inflight:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.time() + self.lock_ttl_ms / 1000
+
+        while True:
+            try:
+                acquired = self.redis.set(lock_key, token, nx=True, px=self.lock_ttl_ms)
+            except RedisError as e:
+                # Fail open - coalescing is an optimization
+                logger.warning(f"In-flight lock unavailable, calling directly: {e}")
+                return fn(), False
+
+            if acquired:
+                try:
+                    # Another process may have finished just before we got the lock
+                    result = lookup()
+                    if result is not None:
+                        return result, True
+                    return fn(), False
+                finally:
+                    self._release(lock_key, token)
+
+            result = lookup()
+            if result is not None:
+                logger.debug(f"Shared result of in-flight request {key[:12]} from another process")
+                return result, True
+
+            if time.time() >= deadline:
+                logger.warning(f"In-flight request {key[:12]} timed out in another process, calling directly")
+                return fn(), False
+
+            time.sleep(self.poll_interval_ms / 1000)
+
+    def _release(self, lock_key: str, token: str):
+        try:
+            self.release_script(keys=[lock_key], args=[token])
+        except RedisError as e:
+            logger.warning(f"Failed to release in-flight lock {lock_key}: {e}")
@@ -5,7 +5,8 @@ Provides conservative estimates for both prompt and completion tokens.
 """
 import logging
 import re
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +30,29 @@ def estimate_tokens(
     Returns:
         Estimated total tokens (input + output)
     """
-    # Calculate input tokens
+    input_tokens = estimate_prompt_tokens(messages)
+    
+    # Total estimate
+    total_tokens = input_tokens + expected_completion_tokens
+    
+    logger.debug(
+        f"Token estimate: {input_tokens} input + {expected_completion_tokens} "
+        f"completion = {total_tokens} total"
+    )
+    
+    return total_tokens
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Estimate input tokens for a message list.
+    
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        
+    Returns:
+        Estimated input tokens
+    """
     total_chars = 0
     for msg in messages:
         content = msg.get('content', '')
@@ -39,17 +62,62 @@ def estimate_tokens(
     
     # Conservative estimate: 4 chars per token
     # (actual is ~4 for English, less for other languages)
-    input_tokens = (total_chars // 4) + 1
+    return (total_chars // 4) + 1
+
+
+class TokenCalibrator:
+    """
+    Per-model correction of prompt token estimates.
     
-    # Total estimate
-    total_tokens = input_tokens + expected_completion_tokens
+    Keeps an exponential moving average of actual / estimated input tokens
+    as reported by providers, and scales the chars/4 heuristic by it.
+    """
     
-    logger.debug(
-        f"Token estimate: {input_tokens} input + {expected_completion_tokens} "
-        f"completion = {total_tokens} total"
-    )
+    def __init__(self, smoothing: float = 0.2, min_ratio: float = 0.25, max_ratio: float = 2.0):
+        """
+        Initialize calibrator.
+        
+        Args:
+            smoothing: Weight of each new observation
+            min_ratio: Lower bound on the correction factor
+            max_ratio: Upper bound on the correction factor
+        """
+        self.smoothing = smoothing
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self._ratios: Dict[str, float] = {}
+        self._lock = threading.Lock()
     
-    return total_tokens
+    def ratio(self, model: Optional[str]) -> float:
+        """Current correction factor for a model (1.0 until observed)."""
+        return self._ratios.get(model, 1.0)
+    
+    def observe(self, model: str, estimated_input: int, actual_input: Optional[int]):
+        """Record an estimated vs actual input token count."""
+        if not estimated_input or not actual_input:
+            return
+        
+        observed = min(max(actual_input / estimated_input, self.min_ratio), self.max_ratio)
+        with self._lock:
+            previous = self._ratios.get(model)
+            self._ratios[model] = observed if previous is None else (
+                previous + self.smoothing * (observed - previous)
+            )
+    
+    def estimate(
+        self,
+        messages: List[Dict[str, str]],
+        expected_completion_tokens: int = 512,
+        model: Optional[str] = None
+    ) -> int:
+        """
+        Calibrated estimate_tokens() for a model.
+        
+        Returns:
+            Estimated total tokens (input + output)
+        """
+        input_tokens = int(estimate_prompt_tokens(messages) * self.ratio(model)) + 1
+        return input_tokens + expected_completion_tokens
 
 
 def estimate_tokens_from_text(text: str) -> int:
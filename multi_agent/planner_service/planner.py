@@ -13,6 +13,7 @@ from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from llm.router import get_request_router
+from llm.handles import gemini_model
 from contracts.validate_contract import SchemaValidator
 from planner_service.planner_prompt_single_file import PLANNER_SYSTEM_PROMPT_SINGLE_FILE
 
@@ -320,16 +321,13 @@ class PlannerService:
         else:
             logger.warning("RequestRouter disabled - falling back to direct API calls")
             # Fallback: initialize direct API
-            import google.generativeai as genai
-            
             # Get API key from parameter or environment
             api_key = api_key or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
             if not api_key:
                 logger.error("No API key found for fallback mode")
                 self.fallback_model = None
             else:
-                genai.configure(api_key=api_key)
-                self.fallback_model = genai.GenerativeModel(model_name)
+                self.fallback_model = gemini_model(api_key, model_name)
     
     def create_plan(
         self,
@@ -0,0 +1,156 @@
+"""
+Unit tests for token-budgeted context compaction.
+
+Runs against fakeredis.
+
+Tests:
+- Histories within budget pass through untouched
+- Older turns folded into a stored summary, system prompt kept
+- Stored summary reused until the budget is exceeded again
+- Router: cache hits skip compaction, summaries are not stored as conversations
+"""
+import pytest
+from unittest.mock import Mock, patch
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from conversation.store import ConversationStore
+from llm.context import ContextCompactor, SUMMARY_PREFIX
+from llm.response_cache import ResponseCache
+from llm.router import RequestRouter
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, previous, messages):
+        self.calls.append((previous, messages))
+        return f"summary#{len(self.calls)}"
+
+
+@pytest.fixture
+def store():
+    store = ConversationStore(fakeredis.FakeRedis(decode_responses=True))
+    store.create_conversation('c1')
+    store.append_message('c1', 'system', 'You are a trading assistant')
+    return store
+
+
+def add_turns(store, start, count):
+    for i in range(start, start + count):
+        store.append_messages('c1', [
+            {'role': 'user', 'content': f'question {i} ' + 'x' * 200},
+            {'role': 'assistant', 'content': f'answer {i} ' + 'y' * 200},
+        ])
+
+
+def context(store, compactor):
+    meta, history = store.get_context('c1')
+    return compactor.compact('c1', history, meta['message_count'])
+
+
+def test_within_budget_is_unchanged(store):
+    summarizer = FakeSummarizer()
+    compactor = ContextCompactor(store, summarizer, token_budget=10000, keep_recent=4)
+    add_turns(store, 0, 3)
+
+    _, history = store.get_context('c1')
+    assert context(store, compactor) == history
+    assert summarizer.calls == []
+
+
+def test_folds_older_turns_and_keeps_system_prompt(store):
+    summarizer = FakeSummarizer()
+    compactor = ContextCompactor(store, summarizer, token_budget=600, keep_recent=4)
+    add_turns(store, 0, 10)
+
+    messages = context(store, compactor)
+
+    assert messages[0] == {'role': 'system', 'content': 'You are a trading assistant'}
+    assert messages[1] == {'role': 'user', 'content': SUMMARY_PREFIX + 'summary#1'}
+    assert messages[2]['role'] == 'assistant'
+    assert [m['content'][:10] for m in messages[3:]] == ['question 8', 'answer 8 y', 'question 9', 'answer 9 y']
+
+    previous, folded = summarizer.calls[0]
+    assert previous is None
+    assert len(folded) == 16
+    assert store.get_summary('c1') == {'content': 'summary#1', 'covered': 17}
+
+
+def test_summary_reused_until_budget_exceeded_again(store):
+    summarizer = FakeSummarizer()
+    compactor = ContextCompactor(store, summarizer, token_budget=600, keep_recent=4)
+    add_turns(store, 0, 10)
+    context(store, compactor)
+
+    add_turns(store, 10, 1)
+    messages = context(store, compactor)
+    assert len(summarizer.calls) == 1
+    assert [m['content'][:11] for m in messages[3:]][-2:] == ['question 10', 'answer 10 y']
+
+    add_turns(store, 11, 2)
+    messages = context(store, compactor)
+    assert len(summarizer.calls) == 2
+    previous, folded = summarizer.calls[1]
+    assert previous == 'summary#1'
+    assert folded[0]['content'].startswith('question 8')
+    assert messages[1]['content'] == SUMMARY_PREFIX + 'summary#2'
+    assert len(messages) == 7
+
+
+def make_router(store, response_cache=None):
+    key_manager = Mock()
+    key_manager.resolve_target.return_value = {'provider': 'gemini', 'model': 'gemini-2.5-flash'}
+    key_manager.select_key.return_value = {
+        'key_id': 'flash-01', 'secret': 's1', 'model': 'gemini-2.5-flash', 'provider': 'gemini'
+    }
+    router = RequestRouter(key_manager=key_manager, conv_store=store, response_cache=response_cache)
+    router.response_cache = response_cache
+    router.compactor.token_budget = 600
+    router.compactor.keep_recent = 4
+    return router
+
+
+def provider_client():
+    client = Mock()
+
+    def chat_completion(api_key, model, messages, **kwargs):
+        content = 'summary' if messages[0]['content'].startswith('Summarize') else 'answer'
+        return {'content': content, 'model': model, 'tokens': {'output': 1}, 'finish_reason': 'stop'}
+
+    client.chat_completion.side_effect = chat_completion
+    return client
+
+
+def test_router_cache_hit_skips_compaction(store):
+    add_turns(store, 0, 10)
+    router = make_router(store, response_cache=ResponseCache())
+    _, history = store.get_context('c1')
+    key = router._request_cache_key(
+        history + [{'role': 'user', 'content': 'next'}], None, None, 2048, 0.7
+    )
+    router.response_cache.set(key, {'content': 'cached', 'model': 'gemini-2.5-flash', 'tokens': {}})
+    client = provider_client()
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        response = router.send_chat('c1', 'next')
+
+    assert response['cache_hit'] is True and response['content'] == 'cached'
+    assert client.chat_completion.call_count == 0
+    assert store.get_summary('c1') == {}
+
+
+def test_router_summary_is_not_stored_as_a_conversation(store):
+    add_turns(store, 0, 10)
+    router = make_router(store)
+    client = provider_client()
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        response = router.send_chat('c1', 'next')
+
+    assert response['success'] and response['content'] == 'answer'
+    assert client.chat_completion.call_count == 2
+    assert store.get_summary('c1')['content'] == 'summary'
+    assert store.redis.keys('conv:meta:*') == ['conv:meta:c1']
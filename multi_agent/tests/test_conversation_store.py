@@ -0,0 +1,129 @@
+"""
+Unit tests for pipelined conversation storage.
+
+Runs against fakeredis.
+
+Tests:
+- Batched appends and metadata counters
+- Capped context reads that keep the system prompt
+- One pipeline per context read and per turn write
+- Per-user index: ordering, pagination, delete, expiry and rebuild
+"""
+import time
+import pytest
+from unittest.mock import patch
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from conversation.store import ConversationStore
+
+
+@pytest.fixture
+def store():
+    return ConversationStore(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_append_messages_updates_metadata(store):
+    store.create_conversation('c1', {'user_id': 'u1'})
+    store.append_messages('c1', [
+        {'role': 'user', 'content': 'hi'},
+        {'role': 'assistant', 'content': 'hello', 'tokens': 7, 'metadata': {'model': 'gemini-2.5-flash'}},
+    ])
+    store.append_message('c1', 'user', 'again', tokens=3)
+
+    meta = store.get_metadata('c1')
+    assert meta['message_count'] == 3
+    assert meta['total_tokens'] == 10
+    assert meta['last_model'] == 'gemini-2.5-flash'
+    assert [m['content'] for m in store.get_history('c1')] == ['hi', 'hello', 'again']
+    assert store.redis.ttl('conv:messages:c1') > 0
+
+
+def test_get_context_caps_history_and_keeps_system_prompt(store):
+    store.create_conversation('c1', {'user_id': 'u1'})
+    store.append_message('c1', 'system', 'You are a trading assistant')
+    store.append_messages('c1', [{'role': 'user', 'content': f'm{i}'} for i in range(10)])
+
+    meta, history = store.get_context('c1', limit=4)
+
+    assert meta['user_id'] == 'u1'
+    assert meta['message_count'] == 11
+    assert history == [
+        {'role': 'system', 'content': 'You are a trading assistant'},
+        {'role': 'user', 'content': 'm7'},
+        {'role': 'user', 'content': 'm8'},
+        {'role': 'user', 'content': 'm9'},
+    ]
+    assert len(store.get_context('c1', limit=0)[1]) == 11
+
+
+def test_get_context_missing_conversation(store):
+    assert store.get_context('nope') == ({}, [])
+
+
+def test_turn_uses_one_round_trip_each_way(store):
+    store.create_conversation('c1')
+
+    with patch.object(store.redis, 'pipeline', wraps=store.redis.pipeline) as pipeline, \
+            patch.object(store.redis, 'execute_command', wraps=store.redis.execute_command) as direct:
+        store.get_context('c1')
+        store.append_messages('c1', [
+            {'role': 'user', 'content': 'q'},
+            {'role': 'assistant', 'content': 'a'},
+        ])
+
+    assert pipeline.call_count == 2
+    assert direct.call_count == 0
+
+
+def test_user_index_orders_by_update_and_paginates(store):
+    for conv_id in ('a', 'b', 'c'):
+        store.create_conversation(conv_id, {'user_id': 'u1'})
+        time.sleep(0.01)
+    store.create_conversation('other', {'user_id': 'u2'})
+    store.append_message('a', 'user', 'bump')
+
+    assert store.list_conversations(user_id='u1') == ['a', 'c', 'b']
+    assert store.list_conversations(user_id='u1', limit=2, offset=1) == ['c', 'b']
+    assert store.list_conversations(user_id='u2') == ['other']
+
+    store.delete_conversation('c')
+    assert store.list_conversations(user_id='u1') == ['a', 'b']
+
+
+def test_user_index_skips_expired_conversations(store):
+    store.create_conversation('old', {'user_id': 'u1'})
+    store.create_conversation('new', {'user_id': 'u1'})
+    store.redis.zadd('conv:user:u1', {'old': time.time() - store.default_ttl - 10})
+
+    assert store.list_conversations(user_id='u1') == ['new']
+
+
+def test_rebuild_user_index(store):
+    store.create_conversation('a', {'user_id': 'u1'})
+    store.create_conversation('b', {'user_id': 'u1'})
+    store.create_conversation('anon')
+    store.redis.delete('conv:user:u1')
+    store.redis.zadd('conv:user:ghost', {'gone': time.time()})
+
+    assert store.rebuild_user_index(batch_size=1) == 2
+    assert sorted(store.list_conversations(user_id='u1')) == ['a', 'b']
+    assert store.list_conversations(user_id='ghost') == []
+
+
+def test_rebuild_updates_live_index_in_place(store):
+    store.create_conversation('a', {'user_id': 'u1'})
+    store.create_conversation('b', {'user_id': 'u1'})
+    store.create_conversation('c', {'user_id': 'u2'})
+    # A write that landed after the metadata was read, a conversation moved
+    # to another user and one that expired
+    store.redis.zadd('conv:user:u1', {'a': time.time() + 60, 'c': time.time(), 'old': 1.0})
+
+    with patch.object(store.redis, 'delete', wraps=store.redis.delete) as delete:
+        assert store.rebuild_user_index() == 3
+
+    assert not any(key.startswith('conv:user:') for call in delete.call_args_list for key in call.args)
+    assert store.list_conversations(user_id='u1') == ['a', 'b']
+    assert store.redis.zscore('conv:user:u1', 'a') > time.time()
+    assert store.list_conversations(user_id='u2') == ['c']
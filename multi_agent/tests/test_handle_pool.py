@@ -0,0 +1,69 @@
+"""
+Unit tests for shared provider handles.
+
+Tests:
+- Handle reuse and LRU eviction
+- One handle per key under concurrent first use
+- Gemini models bound to their own key without genai.configure()
+"""
+import threading
+import time
+import pytest
+
+from llm.handles import HandlePool, gemini_model, get_handle_pool
+
+
+def test_pool_reuses_and_evicts():
+    pool = HandlePool(max_size=2)
+    a = pool.get('a', object)
+    pool.get('b', object)
+
+    assert pool.get('a', object) is a
+    pool.get('c', object)  # evicts 'b', the least recently used
+
+    assert len(pool) == 2
+    assert pool.get('a', object) is a
+    built = []
+    pool.get('b', lambda: built.append(1) or object())
+    assert built == [1]
+
+
+def test_concurrent_first_use_shares_one_handle():
+    pool = HandlePool()
+    results = []
+
+    def slow_factory():
+        time.sleep(0.01)
+        return object()
+
+    threads = [threading.Thread(target=lambda: results.append(pool.get('k', slow_factory))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(r) for r in results}) == 1
+
+
+def test_gemini_models_bound_per_key(monkeypatch):
+    genai = pytest.importorskip("google.generativeai")
+    get_handle_pool().clear()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("global genai.configure() must not be used")
+
+    monkeypatch.setattr(genai, 'configure', fail)
+    config = {'max_output_tokens': 256, 'temperature': 0.2}
+
+    first = gemini_model('key-one', 'gemini-2.5-flash', config)
+    assert gemini_model('key-one', 'gemini-2.5-flash', dict(config)) is first
+
+    other_key = gemini_model('key-two', 'gemini-2.5-flash', config)
+    other_config = gemini_model('key-one', 'gemini-2.5-flash', {'temperature': 0.9})
+    other_model = gemini_model('key-one', 'gemini-2.5-pro', config)
+
+    assert other_key is not first and other_config is not first
+    assert other_key._client is not first._client
+    assert other_config._client is first._client
+    assert other_model._client is first._client
+    get_handle_pool().clear()
@@ -28,6 +28,8 @@ def mock_redis_limiter():
     limiter.is_in_cooldown.return_value = False
     limiter.get_cooldown_ttl.return_value = None
     limiter.health_check.return_value = True
+    # Exercise the per-key reservation path (batch path is covered with fakeredis)
+    del limiter.reserve_first_available
     return limiter
 
 
@@ -0,0 +1,70 @@
+"""
+Unit tests for single round-trip key reservation.
+
+Runs the Lua scripts against fakeredis.
+
+Tests:
+- Priority order and cooldown skipping
+- RPM/TPM limits without leaking partial reservations
+- KeyManager selection through the batch script
+"""
+import json
+import pytest
+from unittest.mock import patch
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from keys.models import APIKey
+from keys.manager import KeyManager
+from keys.redis_client import RedisRateLimiter
+
+
+@pytest.fixture
+def limiter():
+    return RedisRateLimiter(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_reserves_first_candidate_in_order(limiter):
+    candidates = [('a', 10, 1000), ('b', 10, 1000)]
+
+    assert limiter.reserve_first_available(candidates, 100) == 'a'
+    assert limiter.get_rpm_usage('a')['count'] == 1
+    assert limiter.get_tpm_usage('a')['used'] == 100
+    assert limiter.get_rpm_usage('b')['count'] == 0
+
+
+def test_skips_cooldown_and_exhausted_keys(limiter):
+    limiter.set_cooldown('a', 60)
+    candidates = [('a', 10, 1000), ('b', 1, 1000), ('c', 10, 150)]
+
+    assert limiter.reserve_first_available(candidates, 100) == 'b'
+    # 'b' is out of RPM; 'c' has TPM for one more request only
+    assert limiter.reserve_first_available(candidates, 100) == 'c'
+    assert limiter.reserve_first_available(candidates, 100) is None
+
+    # A failed TPM check does not consume an RPM slot
+    assert limiter.get_rpm_usage('c')['count'] == 1
+
+
+def test_key_manager_selects_in_one_script_call(limiter, tmp_path):
+    keys = [
+        APIKey(key_id="flash-01", model_name="gemini-2.5-flash", provider="gemini",
+               rpm=1, tpm=250000, active=True, tags={'workload': 'light'}),
+        APIKey(key_id="pro-01", model_name="gemini-2.5-pro", provider="gemini",
+               rpm=5, tpm=100000, active=True, tags={'workload': 'medium'}),
+    ]
+    keys_file = tmp_path / "keys.json"
+    keys_file.write_text(json.dumps({"keys": [k.to_dict() for k in keys]}))
+    manager = KeyManager(redis_limiter=limiter, key_store_path=keys_file)
+
+    with patch('keys.manager.fetch_api_secret', return_value='test-secret'), \
+         patch.object(limiter, 'reserve_rpm_slot') as rpm_slot:
+        first = manager.select_key(workload='light', tokens_needed=500)
+        # flash-01 is out of RPM, so the workload fallback picks pro-01
+        second = manager.select_key(workload='light', tokens_needed=500)
+
+    assert first['key_id'] == 'flash-01'
+    assert second['key_id'] == 'pro-01'
+    assert second['secret'] == 'test-secret'
+    rpm_slot.assert_not_called()
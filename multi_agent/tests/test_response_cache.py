@@ -0,0 +1,109 @@
+"""
+Unit tests for the LLM response cache.
+
+Tests:
+- Cache key normalization
+- LRU eviction and TTL expiry
+- Disk tier persistence
+- RequestRouter cache hits and bypass
+"""
+import pytest
+from unittest.mock import Mock, patch
+
+from llm.response_cache import ResponseCache, make_cache_key
+from llm.router import RequestRouter
+
+
+MESSAGES = [
+    {'role': 'system', 'content': 'You are a planner.'},
+    {'role': 'user', 'content': 'Plan an EMA crossover strategy.'}
+]
+
+
+def test_cache_key_ignores_message_metadata():
+    """Timestamps and token counts do not change the key."""
+    with_meta = [dict(msg, timestamp='2026-01-01T00:00:00', tokens=12) for msg in MESSAGES]
+
+    assert make_cache_key('gemini', 'gemini-2.5-flash', MESSAGES, 0.7, 2048) == \
+        make_cache_key('gemini', 'gemini-2.5-flash', with_meta, 0.7, 2048)
+    assert make_cache_key('gemini', 'gemini-2.5-flash', MESSAGES, 0.7, 2048) != \
+        make_cache_key('gemini', 'gemini-2.5-flash', MESSAGES, 0.2, 2048)
+    assert make_cache_key('gemini', 'gemini-2.5-flash', MESSAGES, 0.7, 2048) != \
+        make_cache_key('gemini', 'gemini-2.5-pro', MESSAGES, 0.7, 2048)
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set('a', {'content': 'A'})
+    cache.set('b', {'content': 'B'})
+    cache.get('a')
+    cache.set('c', {'content': 'C'})
+
+    # 'b' was least recently used
+    assert cache.get('b') is None
+    assert cache.get('a')['content'] == 'A'
+
+    with patch('llm.response_cache.time.time', return_value=10 ** 12):
+        assert cache.get('a') is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    ResponseCache(disk_dir=tmp_path).set('k', {'content': 'persisted'})
+
+    fresh = ResponseCache(disk_dir=tmp_path)
+    assert fresh.get('k') == {'content': 'persisted'}
+    assert fresh.stats()['hits'] == 1
+
+
+@pytest.fixture
+def router():
+    key_manager = Mock()
+    key_manager.resolve_target.return_value = {'provider': 'gemini', 'model': 'gemini-2.5-flash'}
+    key_manager.select_key.return_value = {
+        'key_id': 'flash-01', 'secret': 'test-secret',
+        'model': 'gemini-2.5-flash', 'provider': 'gemini'
+    }
+    conv_store = Mock()
+    conv_store.get_context.return_value = ({}, [])
+
+    return RequestRouter(
+        key_manager=key_manager,
+        conv_store=conv_store,
+        response_cache=ResponseCache()
+    )
+
+
+@pytest.fixture
+def provider_client():
+    client = Mock()
+    client.chat_completion.return_value = {
+        'content': 'plan',
+        'model': 'gemini-2.5-flash',
+        'tokens': {'input': 10, 'output': 5, 'total': 15},
+        'finish_reason': 'stop'
+    }
+    with patch('llm.router.get_provider_client', return_value=client):
+        yield client
+
+
+def test_router_serves_identical_request_from_cache(router, provider_client):
+    first = router.send_one_shot('Plan it', system_prompt='You are a planner.', temperature=0.2)
+    second = router.send_one_shot('Plan it', system_prompt='You are a planner.', temperature=0.2)
+
+    assert first['success'] and first['cache_hit'] is False
+    assert second['success'] and second['cache_hit'] is True
+    assert second['content'] == 'plan'
+    assert provider_client.chat_completion.call_count == 1
+
+    # Capacity is only reserved for the real provider call
+    assert router.key_manager.select_key.call_count == 1
+
+
+def test_router_cache_bypass_and_key_fields(router, provider_client):
+    router.send_one_shot('Plan it', temperature=0.2)
+    bypassed = router.send_one_shot('Plan it', temperature=0.2, use_cache=False)
+    other_temperature = router.send_one_shot('Plan it', temperature=0.9)
+
+    assert bypassed['cache_hit'] is False
+    assert other_temperature['cache_hit'] is False
+    assert provider_client.chat_completion.call_count == 3
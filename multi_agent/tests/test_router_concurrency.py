@@ -0,0 +1,175 @@
+"""
+Unit tests for router concurrency.
+
+Tests:
+- Per-key concurrency limits
+- Latency percentiles
+- Async batch fan-out
+- Hedged requests on a slow key, hedge pool size
+- Errors of the discarded hedge call reach the key manager
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from llm.concurrency import ConcurrencyLimiter, LatencyTracker
+from llm.providers import RateLimitError
+from llm.router import RequestRouter
+
+
+KEYS = {
+    'flash-01': {'key_id': 'flash-01', 'secret': 's1', 'model': 'gemini-2.5-flash', 'provider': 'gemini'},
+    'flash-02': {'key_id': 'flash-02', 'secret': 's2', 'model': 'gemini-2.5-flash', 'provider': 'gemini'},
+}
+
+
+def test_limiter_caps_calls_per_key():
+    limiter = ConcurrencyLimiter(max_per_key=2, max_per_provider=10)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with limiter.slot('gemini', 'flash-01'):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 2
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker(min_samples=5)
+    for ms in [10, 20, 30, 40]:
+        tracker.record('m', ms)
+    assert tracker.percentile('m', 95) is None
+
+    for ms in range(50, 110, 10):
+        tracker.record('m', ms)
+    assert tracker.percentile('m', 50) == 50
+    assert tracker.percentile('m', 100) == 100
+
+
+def make_router(client, hedge_percentile=None):
+    key_manager = Mock()
+    key_manager.resolve_target.return_value = None
+    key_manager.select_key.side_effect = lambda exclude_keys=None, **kwargs: next(
+        (meta for key_id, meta in KEYS.items() if key_id not in (exclude_keys or [])), None
+    )
+    conv_store = Mock()
+    conv_store.get_context.return_value = ({}, [])
+
+    router = RequestRouter(
+        key_manager=key_manager,
+        conv_store=conv_store,
+        hedge_percentile=hedge_percentile
+    )
+    router.response_cache = None
+    return router
+
+
+def slow_client(delays, errors=None):
+    """Provider client whose latency (and error, if any) depends on the API key."""
+    client = Mock()
+
+    def chat_completion(api_key, model, messages, **kwargs):
+        time.sleep(delays[api_key])
+        if errors and api_key in errors:
+            raise errors[api_key]
+        return {'content': api_key, 'model': model, 'tokens': {}, 'finish_reason': 'stop'}
+
+    client.chat_completion.side_effect = chat_completion
+    return client
+
+
+def test_gather_one_shot_runs_concurrently():
+    client = slow_client({'s1': 0.1})
+    router = make_router(client)
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        start = time.time()
+        responses = asyncio.run(router.gather_one_shot(['a', 'b', {'prompt': 'c', 'temperature': 0.1}]))
+        elapsed = time.time() - start
+
+    assert [r['success'] for r in responses] == [True, True, True]
+    assert client.chat_completion.call_count == 3
+    assert elapsed < 0.25
+
+
+def test_hedge_fires_on_slow_key():
+    client = slow_client({'s1': 0.5, 's2': 0.01})
+    router = make_router(client, hedge_percentile=90)
+    for _ in range(router.latencies.min_samples):
+        router.latencies.record('gemini-2.5-flash', 20)
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        start = time.time()
+        response = router.send_one_shot('plan', use_cache=False)
+        elapsed = time.time() - start
+
+    assert response['success']
+    assert response['hedged'] is True
+    assert response['key_id'] == 'flash-02'
+    assert elapsed < 0.4
+
+
+def test_no_hedge_without_latency_history():
+    client = slow_client({'s1': 0.05, 's2': 0.01})
+    router = make_router(client, hedge_percentile=90)
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        response = router.send_one_shot('plan')
+
+    assert response['hedged'] is False
+    assert response['key_id'] == 'flash-01'
+    assert client.chat_completion.call_count == 1
+
+
+def test_hedge_pool_sized_from_provider_limit(monkeypatch):
+    monkeypatch.setenv('LLM_MAX_CONCURRENT_PER_PROVIDER', '5')
+    assert make_router(Mock())._hedge_executor._max_workers == 10
+
+    monkeypatch.setenv('LLM_HEDGE_WORKERS', '3')
+    assert make_router(Mock())._hedge_executor._max_workers == 3
+
+
+def hedged_router(client):
+    router = make_router(client, hedge_percentile=90)
+    for _ in range(router.latencies.min_samples):
+        router.latencies.record('gemini-2.5-flash', 20)
+    return router
+
+
+def test_rate_limited_hedge_is_reported_when_primary_wins():
+    client = slow_client({'s1': 0.15, 's2': 0.0}, errors={'s2': RateLimitError("429", retry_after=15)})
+    router = hedged_router(client)
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        response = router.send_one_shot('plan', use_cache=False)
+
+    assert response['key_id'] == 'flash-01'
+    router.key_manager.mark_key_unhealthy.assert_called_once()
+    args, kwargs = router.key_manager.mark_key_unhealthy.call_args
+    assert args == ('flash-02',) and kwargs['cooldown_seconds'] == 15
+
+
+def test_failed_primary_is_reported_when_hedge_wins():
+    client = slow_client({'s1': 0.15, 's2': 0.0}, errors={'s1': RateLimitError("429")})
+    router = hedged_router(client)
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        response = router.send_one_shot('plan', use_cache=False)
+        time.sleep(0.3)  # the discarded primary finishes in the background
+
+    assert response['key_id'] == 'flash-02'
+    args, kwargs = router.key_manager.mark_key_unhealthy.call_args
+    assert args == ('flash-01',) and kwargs['cooldown_seconds'] == 60
@@ -0,0 +1,167 @@
+"""
+Unit tests for single-flight request coalescing.
+
+Tests:
+- One call per key across threads, errors shared with waiters
+- Waiters call directly once the lock TTL has passed
+- Cross-process coalescing through a Redis lock (fakeredis)
+- Router: concurrent identical requests make one provider call
+"""
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from llm.single_flight import SingleFlight
+from llm.response_cache import ResponseCache
+from llm.router import RequestRouter
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.05)
+        return {'content': 'shared'}
+
+    results = run_concurrently(5, lambda: group.do('k', fn))
+
+    assert len(calls) == 1
+    assert all(result == {'content': 'shared'} for result, _ in results)
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+    # Finished calls are not reused
+    group.do('k', fn)
+    assert len(calls) == 2
+
+
+def test_error_is_shared_with_waiters():
+    group = SingleFlight()
+    errors = []
+
+    def fn():
+        time.sleep(0.05)
+        raise ValueError("provider down")
+
+    def call():
+        try:
+            group.do('k', fn)
+        except ValueError as e:
+            errors.append(str(e))
+
+    run_concurrently(3, call)
+    assert errors == ["provider down"] * 3
+
+
+def test_waiter_calls_directly_after_lock_ttl():
+    group = SingleFlight(lock_ttl_ms=50)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: group.do('k', lambda: release.wait(5) and 'leader'))
+    leader.start()
+    time.sleep(0.02)
+
+    try:
+        result = group.do('k', lambda: 'own')
+    finally:
+        release.set()
+        leader.join()
+
+    assert result == ('own', False)
+
+
+def test_cross_process_waiter_uses_published_result():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    published = {}
+
+    # Two groups on one Redis stand in for two processes
+    first = SingleFlight(redis_client, poll_interval_ms=10)
+    second = SingleFlight(redis_client, poll_interval_ms=10)
+    second_calls = []
+
+    def slow_call():
+        time.sleep(0.1)
+        published['k'] = 'result'
+        return 'result'
+
+    leader = threading.Thread(target=lambda: first.do('k', slow_call, lookup=lambda: published.get('k')))
+    leader.start()
+    time.sleep(0.02)
+    result = second.do('k', lambda: second_calls.append(1), lookup=lambda: published.get('k'))
+    leader.join()
+
+    assert result == ('result', True)
+    assert second_calls == []
+    assert redis_client.get('llm:inflight:k') is None
+
+
+def test_router_coalesces_identical_requests():
+    key_manager = Mock()
+    key_manager.resolve_target.return_value = {'provider': 'gemini', 'model': 'gemini-2.5-flash'}
+    key_manager.select_key.return_value = {
+        'key_id': 'flash-01', 'secret': 's1', 'model': 'gemini-2.5-flash', 'provider': 'gemini'
+    }
+    conv_store = Mock()
+    conv_store.get_context.return_value = ({}, [])
+
+    client = Mock()
+
+    def chat_completion(api_key, model, messages, **kwargs):
+        time.sleep(0.1)
+        return {'content': 'plan', 'model': model, 'tokens': {'output': 3}, 'finish_reason': 'stop'}
+
+    client.chat_completion.side_effect = chat_completion
+    router = RequestRouter(key_manager=key_manager, conv_store=conv_store, response_cache=ResponseCache())
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        responses = run_concurrently(4, lambda: router.send_one_shot('validate this strategy'))
+
+    assert client.chat_completion.call_count == 1
+    assert all(r['success'] and r['content'] == 'plan' for r in responses)
+    assert sorted(r['coalesced'] for r in responses) == [False, True, True, True]
+    assert len({r['conversation_id'] for r in responses}) == 4
+
+
+def test_response_stored_under_request_key_for_aliased_model():
+    key_manager = Mock()
+    key_manager.resolve_target.return_value = {'provider': 'gemini', 'model': 'gemini-2.5-flash'}
+    key_manager.select_key.return_value = {
+        'key_id': 'flash-01', 'secret': 's1', 'model': 'gemini-2.5-flash', 'provider': 'gemini'
+    }
+    conv_store = Mock()
+    conv_store.get_context.return_value = ({}, [])
+
+    # The provider reports a versioned name for the requested model
+    client = Mock()
+    client.chat_completion.return_value = {
+        'content': 'plan', 'model': 'gemini-2.5-flash-001', 'tokens': {'output': 3}, 'finish_reason': 'stop'
+    }
+    cache = ResponseCache()
+    router = RequestRouter(key_manager=key_manager, conv_store=conv_store, response_cache=cache)
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        first = router.send_one_shot('validate this strategy')
+        second = router.send_one_shot('validate this strategy')
+
+    assert first['success'] and second['success']
+    assert second['cache_hit'] is True
+    assert client.chat_completion.call_count == 1
@@ -0,0 +1,193 @@
+"""
+Unit tests for streaming responses.
+
+Tests:
+- Default single-chunk fallback in ProviderClient
+- Router chunk streaming, metrics and single persistence
+- Retry before the first token
+- Safety blocks escalate and sanitize without cooling keys down
+- Non-retryable errors fail without trying other keys
+"""
+import pytest
+from unittest.mock import Mock, patch
+
+from llm.providers import ProviderClient, ProviderError, RateLimitError, SafetyBlockError
+from llm.router import RequestRouter
+
+
+KEY_META = {'key_id': 'flash-01', 'secret': 's1', 'model': 'gemini-2.5-flash', 'provider': 'gemini'}
+
+
+class EchoClient(ProviderClient):
+    """Provider without native streaming."""
+
+    def chat_completion(self, api_key, model, messages, max_tokens=2048, temperature=0.7, **kwargs):
+        return {'content': 'echo', 'model': model, 'tokens': {'output': 1}, 'finish_reason': 'stop'}
+
+
+def test_default_stream_is_single_chunk():
+    events = list(EchoClient().stream_completion('k', 'm', [{'role': 'user', 'content': 'hi'}]))
+
+    assert events[0] == {'type': 'chunk', 'content': 'echo'}
+    assert events[1]['type'] == 'done'
+    assert events[1]['tokens'] == {'output': 1}
+
+
+def chunked_client(chunks, fail_keys=()):
+    client = Mock()
+
+    def stream_completion(api_key, model, messages, **kwargs):
+        if api_key in fail_keys:
+            raise RateLimitError("429", retry_after=5)
+        for chunk in chunks:
+            yield {'type': 'chunk', 'content': chunk}
+        yield {'type': 'done', 'model': model, 'tokens': {'output': 6}, 'finish_reason': 'stop'}
+
+    client.stream_completion.side_effect = stream_completion
+    return client
+
+
+@pytest.fixture
+def router():
+    key_manager = Mock()
+    key_manager.resolve_target.return_value = None
+    key_manager.select_key.side_effect = [
+        dict(KEY_META),
+        dict(KEY_META, key_id='flash-02', secret='s2'),
+    ]
+    conv_store = Mock()
+    conv_store.get_context.return_value = ({}, [])
+
+    router = RequestRouter(key_manager=key_manager, conv_store=conv_store, base_backoff_ms=1)
+    router.response_cache = None
+    return router
+
+
+def test_stream_chat_yields_chunks_and_persists_once(router):
+    client = chunked_client(['Buy ', 'when ', 'EMA crosses'])
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        events = list(router.stream_chat('conv-1', 'When do I buy?'))
+
+    chunks = [e['content'] for e in events if e['type'] == 'chunk']
+    final = events[-1]
+
+    assert chunks == ['Buy ', 'when ', 'EMA crosses']
+    assert final['type'] == 'done' and final['success']
+    assert final['content'] == 'Buy when EMA crosses'
+    assert final['ttft_ms'] >= 0
+    assert 'tokens_per_sec' in final
+
+    router.conv_store.append_messages.assert_called_once()
+    turn = router.conv_store.append_messages.call_args.args[1]
+    assert [m['role'] for m in turn] == ['user', 'assistant']
+    assert turn[1]['content'] == 'Buy when EMA crosses'
+    assert turn[1]['metadata']['ttft_ms'] == final['ttft_ms']
+
+
+def test_stream_chat_retries_before_first_token(router):
+    client = chunked_client(['ok'], fail_keys=('s1',))
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        events = list(router.stream_chat('conv-2', 'hello'))
+
+    assert events[-1]['success']
+    assert events[-1]['key_id'] == 'flash-02'
+    router.key_manager.mark_key_unhealthy.assert_called_once()
+
+
+def scripted_client(outcomes):
+    """Client that raises the next scripted error, or streams 'ok' once they run out."""
+    client = Mock()
+    remaining = list(outcomes)
+
+    def stream_completion(api_key, model, messages, **kwargs):
+        if remaining:
+            outcome = remaining.pop(0)
+            error = outcome(messages) if callable(outcome) else outcome
+            if error is not None:
+                raise error
+        yield {'type': 'chunk', 'content': 'ok'}
+        yield {'type': 'done', 'model': model, 'tokens': {'output': 1}, 'finish_reason': 'stop'}
+
+    client.stream_completion.side_effect = stream_completion
+    return client
+
+
+@pytest.fixture
+def any_key_router(router):
+    router.key_manager.select_key.side_effect = lambda **kwargs: dict(KEY_META)
+    return router
+
+
+def selected_workloads(router):
+    return [c.kwargs['workload'] for c in router.key_manager.select_key.call_args_list]
+
+
+def test_safety_block_escalates_workload(any_key_router):
+    blocked = SafetyBlockError("blocked", safety_ratings=[{'category': 'HARASSMENT'}])
+    client = scripted_client([blocked, blocked])
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        events = list(any_key_router.stream_chat('conv-3', 'hello', workload='light'))
+
+    assert events[-1]['success']
+    assert selected_workloads(any_key_router) == ['light', 'medium', 'heavy']
+    any_key_router.key_manager.mark_key_unhealthy.assert_not_called()
+
+
+def test_safety_block_sanitizes_prompt(any_key_router):
+    def blocked_unless_sanitized(messages):
+        if 'kill' in messages[-1]['content']:
+            return SafetyBlockError("blocked")
+
+    client = scripted_client([blocked_unless_sanitized, blocked_unless_sanitized])
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        events = list(any_key_router.stream_chat('conv-4', 'kill the position at `stop`'))
+
+    assert events[-1]['success']
+    assert client.stream_completion.call_count == 2
+    sent = client.stream_completion.call_args.kwargs['messages'][-1]['content']
+    assert sent == 'close the position at [CODE]'
+    any_key_router.key_manager.mark_key_unhealthy.assert_not_called()
+
+
+def test_persistent_safety_block_fails_without_cooldown(any_key_router):
+    blocked = SafetyBlockError("blocked", safety_ratings=[{'category': 'DANGEROUS'}])
+    client = scripted_client([blocked] * 10)
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        events = list(any_key_router.stream_chat('conv-5', 'hello', workload='heavy'))
+
+    final = events[-1]
+    assert not final['success']
+    assert final['error_type'] == 'safety_block'
+    assert final['safety_ratings'] == [{'category': 'DANGEROUS'}]
+    assert client.stream_completion.call_count == 2  # original and sanitized prompt
+    any_key_router.key_manager.mark_key_unhealthy.assert_not_called()
+    any_key_router.conv_store.append_messages.assert_not_called()
+
+
+def test_non_retryable_error_is_not_retried(any_key_router):
+    client = scripted_client([ProviderError("400 invalid argument: bad schema")])
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        events = list(any_key_router.stream_chat('conv-6', 'hello'))
+
+    final = events[-1]
+    assert not final['success']
+    assert final['error_type'] == 'provider_error'
+    assert client.stream_completion.call_count == 1
+    any_key_router.key_manager.mark_key_unhealthy.assert_called_once()
+
+
+def test_retryable_error_moves_to_another_key(router):
+    client = scripted_client([ProviderError("503 service unavailable")])
+
+    with patch('llm.router.get_provider_client', return_value=client):
+        events = list(router.stream_chat('conv-7', 'hello'))
+
+    assert events[-1]['success']
+    assert events[-1]['key_id'] == 'flash-02'
+    assert router.key_manager.select_key.call_args.kwargs['exclude_keys'] == ['flash-01']
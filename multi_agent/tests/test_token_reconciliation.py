@@ -0,0 +1,94 @@
+"""
+Unit tests for TPM reconciliation and estimate calibration.
+
+Tests:
+- Unused reserved tokens are credited back to the reservation window
+- Stale windows are left untouched
+- Per-model calibration of prompt estimates
+- Router reconciles after a provider call
+"""
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from keys.models import APIKey
+from keys.manager import KeyManager
+from keys.redis_client import RedisRateLimiter
+from llm.router import RequestRouter
+from llm.token_utils import TokenCalibrator, estimate_prompt_tokens
+
+
+@pytest.fixture
+def manager(tmp_path):
+    limiter = RedisRateLimiter(fakeredis.FakeRedis(decode_responses=True))
+    keys_file = tmp_path / "keys.json"
+    keys_file.write_text(json.dumps({"keys": [
+        APIKey(key_id="flash-01", model_name="gemini-2.5-flash", provider="gemini",
+               rpm=100, tpm=2000, active=True).to_dict()
+    ]}))
+    with patch('keys.manager.fetch_api_secret', return_value='test-secret'):
+        yield KeyManager(redis_limiter=limiter, key_store_path=keys_file)
+
+
+def test_unused_tokens_are_credited_back(manager):
+    with patch('keys.manager.fetch_api_secret', return_value='test-secret'):
+        first = manager.select_key(tokens_needed=1500)
+        # Only 500 left in this minute
+        assert manager.select_key(tokens_needed=1500) is None
+
+        assert manager.reconcile_usage(first, 300) == -1200
+        assert manager.redis_limiter.get_tpm_usage('flash-01')['used'] == 300
+        assert manager.select_key(tokens_needed=1500) is not None
+
+
+def test_stale_window_is_not_adjusted(manager):
+    with patch('keys.manager.fetch_api_secret', return_value='test-secret'):
+        key_meta = manager.select_key(tokens_needed=1000)
+
+    key_meta['reserved_window'] -= 1
+    assert manager.reconcile_usage(key_meta, 100) == 0
+    assert manager.redis_limiter.get_tpm_usage('flash-01')['used'] == 1000
+
+
+def test_calibrator_scales_prompt_estimate():
+    calibrator = TokenCalibrator(smoothing=0.5)
+    messages = [{'role': 'user', 'content': 'x' * 4000}]
+    base = estimate_prompt_tokens(messages)
+
+    assert calibrator.estimate(messages, 0, model='m') == base + 1
+
+    calibrator.observe('m', base, base // 2)
+    assert calibrator.ratio('m') == pytest.approx(0.5, abs=0.01)
+    assert calibrator.estimate(messages, 100, model='m') < base // 2 + 110
+
+    # Other models are unaffected
+    assert calibrator.ratio('other') == 1.0
+
+
+def test_router_reconciles_after_call():
+    key_manager = Mock()
+    key_manager.resolve_target.return_value = {'provider': 'gemini', 'model': 'gemini-2.5-flash'}
+    key_meta = {
+        'key_id': 'flash-01', 'secret': 's', 'model': 'gemini-2.5-flash', 'provider': 'gemini',
+        'reserved_tokens': 600, 'reserved_window': 1
+    }
+    key_manager.select_key.return_value = key_meta
+    conv_store = Mock()
+    conv_store.get_context.return_value = ({}, [])
+
+    client = Mock()
+    client.chat_completion.return_value = {
+        'content': 'ok', 'model': 'gemini-2.5-flash',
+        'tokens': {'input': 40, 'output': 10, 'total': 50}, 'finish_reason': 'stop'
+    }
+
+    router = RequestRouter(key_manager=key_manager, conv_store=conv_store)
+    router.response_cache = None
+    with patch('llm.router.get_provider_client', return_value=client):
+        assert router.send_one_shot('hello')['success']
+
+    key_manager.reconcile_usage.assert_called_once_with(key_meta, 50)
+    assert router.token_calibrator.ratio('gemini-2.5-flash') != 1.0
@@ -0,0 +1,40 @@
+"""
+Conversation Index Rebuilder - Rebuilds the per-user conversation indexes
+(conv:user:<user_id>) from conversation metadata in Redis.
+
+Run once after upgrading, for conversations created before the index
+existed, or to repair the index.
+
+Usage:
+    python tools/rebuild_conversation_index.py [--redis-url redis://localhost:6379/0]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import redis
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from conversation.store import ConversationStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild per-user conversation indexes')
+    parser.add_argument('--redis-url', default=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+                        help='Redis URL (default: REDIS_URL)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Conversations fetched per pipeline')
+    args = parser.parse_args()
+
+    client = redis.from_url(args.redis_url, decode_responses=True)
+    store = ConversationStore(client)
+
+    indexed = store.rebuild_user_index(batch_size=args.batch_size)
+    print(f"✅ Indexed {indexed} conversations")
+
+
+if __name__ == '__main__':
+    main()